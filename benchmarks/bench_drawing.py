@@ -0,0 +1,111 @@
+"""
+Drawing time and pen deviation of the `OXOPlayer` motion modes and path timings, in a kinematic simulation.
+
+Usage:
+    python benchmarks/bench_drawing.py --output drawing.json
+    python benchmarks/bench_drawing.py --model UR5 --draw_speed 0.05
+
+The grid, an O and an X are drawn with:
+
+- `waypoints`: one `move_to` per stroke point, stopping at each of them, the previous behaviour,
+- `trapezoid`: one `CartesianPath` per stroke, followed at every control tick, with the
+  trapezoidal timing of `--draw_speed`,
+- `optimal`: the same paths with the fastest timing within the joint limits of the model,
+  scaled by `--safety_factor`.
+
+The simulation integrates the joint velocities over the control period, so the report holds
+the control ticks and drawing time of each shape, and the largest and RMS distance between
+the pen and the path while drawing (only recorded along paths). The plans and their cache
+are disabled, so that every shape is servoed online.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import roboticstoolbox as rtb
+import spatialmath as sm
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from robot import OXOPlayer
+
+Q_REST = np.radians([0, -42, 30, 0, 50, 0])
+
+
+class KinematicSimulation:
+    """Stands in for Swift: integrates the joint velocities of the robot."""
+
+    def __init__(self, robot):
+        self.robot = robot
+
+    def launch(self, realtime=True):
+        pass
+
+    def add(self, ob):
+        pass
+
+    def step(self, dt):
+        self.robot.q = self.robot.q + np.asarray(self.robot.qd) * dt
+
+
+MODES = {"waypoints": ("waypoints", "trapezoid"), "trapezoid": ("path", "trapezoid"), "optimal": ("path", "optimal")}
+
+
+def draw_shapes(model, mode, rate, draw_speed, safety_factor, grid_size):
+    motion, timing = MODES[mode]
+    robot = getattr(rtb.models.URDF, model)()
+    q_rest = Q_REST[:robot.n] if robot.n == len(Q_REST) else robot.qr
+    robot.q = q_rest
+    # Drawing board 5 cm below the pen at rest
+    origin = robot.fkine(q_rest) * sm.SE3.Tz(0.05)
+    player = OXOPlayer(robot, origin, q_rest=q_rest, simulation=KinematicSimulation(robot), scene=[],
+                       control_loop_rate=rate, ik_solver="auto", precompute=False, motion=motion, draw_speed=draw_speed,
+                       timing=timing, safety_factor=safety_factor)
+    results = {}
+    start = time.perf_counter()
+    player.draw_grid(sm.SE3(0, 0, 0), grid_size)
+    results["grid"] = dict(player.last_drawing, wall_seconds=time.perf_counter() - start)
+    for cell, letter in (((1, 1), "O"), ((0, 0), "X")):
+        start = time.perf_counter()
+        player.draw_move(cell, letter)
+        results[letter] = dict(player.last_drawing, wall_seconds=time.perf_counter() - start)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Drawing time and pen deviation of the motion modes.")
+    parser.add_argument('--model', type=str, default="Lite6", help="Robot model of rtb.models.URDF.")
+    parser.add_argument('--rate', type=float, default=25, help="Control loop rate in Hz.")
+    parser.add_argument('--draw_speed', type=float, default=0.1, help="Pen speed of the paths in m/s.")
+    parser.add_argument('--safety_factor', type=float, default=0.5, help="Fraction of the joint limits used by the optimal timing.")
+    parser.add_argument('--grid_size', type=float, default=0.12, help="Side of the grid in meters.")
+    parser.add_argument('--output', type=str, help="Path of the JSON report, printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    modes = {}
+    for mode in MODES:
+        modes[mode] = draw_shapes(args.model, mode, args.rate, args.draw_speed, args.safety_factor, args.grid_size)
+        for shape, stats in modes[mode].items():
+            deviation = stats["max_deviation"]
+            deviation = f"{deviation * 1000:6.2f} mm" if deviation is not None else "     n/a"
+            print(f"{mode:>9} {shape:>4}: {stats['ticks']:5d} ticks  {stats['seconds']:6.2f} s  max deviation {deviation}")
+    report = {
+        "model": args.model,
+        "rate_hz": args.rate,
+        "draw_speed": args.draw_speed,
+        "safety_factor": args.safety_factor,
+        "grid_size": args.grid_size,
+        "modes": modes,
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,212 @@
+"""
+Engine benchmark: enumerates every reachable position, times `find_best_move`, counts `minimax`
+nodes, measures `check_win` throughput and checks that no move loses against perfect play.
+
+Usage:
+    python benchmarks/bench_engine.py --output engine_report.json
+
+The report is JSON so that runs before and after an engine change can be compared, e.g. with
+`--baseline previous_report.json`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import bitboard_engine
+import tictactoe_engine
+from engine_reference import losing_moves
+
+
+def to_board(cells):
+    return [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+
+
+def summarize(durations):
+    """Summary statistics of durations in seconds, reported in microseconds."""
+    durations = np.asarray(durations) * 1e6
+    return {
+        "count": int(durations.size),
+        "mean_us": float(durations.mean()),
+        "p50_us": float(np.percentile(durations, 50)),
+        "p95_us": float(np.percentile(durations, 95)),
+        "p99_us": float(np.percentile(durations, 99)),
+        "max_us": float(durations.max()),
+    }
+
+
+def reset_engine():
+    """Drops every cache of the engine, including a mapped opening book."""
+    tictactoe_engine._NODE_TABLE.clear()
+    tictactoe_engine._MOVE_TABLE.clear()
+    tictactoe_engine._DENSE_TABLE.clear()
+    tictactoe_engine._BOOK.clear()
+
+
+def time_find_best_move(boards, repeat):
+    durations = []
+    for _ in range(repeat):
+        for board in boards:
+            start = time.perf_counter()
+            tictactoe_engine.find_best_move(board)
+            durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def count_nodes(module, positions):
+    """
+    Runs the live root search of every position with `module.minimax` and counts its nodes.
+
+    Returns:
+        dict: Total nodes, search time and time per node.
+    """
+    original = module.minimax
+    nodes = [0]
+
+    def counting_minimax(*args):
+        nodes[0] += 1
+        return original(*args)
+
+    module.minimax = counting_minimax
+    start = time.perf_counter()
+    try:
+        for cells in positions:
+            board = to_board(cells)
+            player_letter = 'X' if cells.count('X') < cells.count('O') else 'O'
+            if module is bitboard_engine:
+                x_bits, o_bits = bitboard_engine.board_to_bits(board)
+                for k, bit in enumerate(bitboard_engine.CELL_BITS):
+                    if cells[k] != ' ':
+                        continue
+                    if player_letter == 'X':
+                        module.minimax(x_bits | bit, o_bits, 0, False, float('-inf'), float('inf'))
+                    else:
+                        module.minimax(x_bits, o_bits | bit, 0, True, float('-inf'), float('inf'))
+            else:
+                for k in range(9):
+                    if cells[k] != ' ':
+                        continue
+                    board[k // 3][k % 3] = player_letter
+                    module.minimax(board, 0, player_letter == 'O', float('-inf'), float('inf'))
+                    board[k // 3][k % 3] = ' '
+    finally:
+        module.minimax = original
+    elapsed = time.perf_counter() - start
+    return {"nodes": nodes[0], "seconds": elapsed, "us_per_node": elapsed / nodes[0] * 1e6}
+
+
+def check_win_throughput(positions, repeat):
+    boards = [to_board(cells) for cells in positions]
+    bits = [bitboard_engine.board_to_bits(board) for board in boards]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            tictactoe_engine.check_win(board)
+    list_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for x_bits, o_bits in bits:
+            bitboard_engine.check_win(x_bits, o_bits)
+    bits_seconds = time.perf_counter() - start
+
+    calls = repeat * len(boards)
+    return {
+        "calls": calls,
+        "list_calls_per_s": calls / list_seconds,
+        "bitboard_calls_per_s": calls / bits_seconds,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(repeat):
+    positions = tictactoe_engine.reachable_positions()
+    boards = [to_board(cells) for cells in positions]
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    book_path = tictactoe_engine.book_status().get("path")
+    reset_engine()
+    report["find_best_move_cold"] = time_find_best_move(boards, 1)
+    report["table"] = tictactoe_engine.build_table()
+    report["find_best_move_warm"] = time_find_best_move(boards, repeat)
+    if book_path and tictactoe_engine.load_opening_book(book_path):
+        report["find_best_move_book"] = time_find_best_move(boards, repeat)
+
+    playable = [cells for cells, board in zip(positions, boards) if tictactoe_engine.find_best_move(board)[0] is not None]
+    report["positions"] = {"reachable": len(positions), "with_move": len(playable)}
+
+    start = time.perf_counter()
+    tictactoe_engine.dense_table()
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    tictactoe_engine.find_best_moves(boards)
+    report["find_best_moves_batch"] = {
+        "boards": len(boards),
+        "build_seconds": build_seconds,
+        "seconds": time.perf_counter() - start,
+    }
+
+    report["minimax_list"] = count_nodes(tictactoe_engine, playable)
+    report["minimax_bitboard"] = count_nodes(bitboard_engine, playable)
+    report["check_win"] = check_win_throughput(positions, repeat)
+
+    mistakes = losing_moves()
+    report["correctness"] = {
+        "losing_moves": len(mistakes),
+        "examples": [{"board": "".join(cells), "move": list(move)} for cells, move, _, _ in mistakes[:10]],
+    }
+    return report
+
+
+def compare(report, baseline):
+    """Prints the relative change of the main timings against a previous report."""
+    metrics = [
+        ("find_best_move_warm", "mean_us"),
+        ("find_best_move_cold", "mean_us"),
+        ("minimax_list", "us_per_node"),
+        ("minimax_bitboard", "us_per_node"),
+        ("minimax_bitboard", "nodes"),
+    ]
+    for section, key in metrics:
+        if section in report and section in baseline:
+            old, new = baseline[section][key], report[section][key]
+            print(f"{section}.{key}: {old:.3f} -> {new:.3f} ({(new - old) / old * 100:+.1f}%)")
+    print(f"losing moves: {baseline['correctness']['losing_moves']} -> {report['correctness']['losing_moves']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Tic-Tac-Toe engine.")
+    parser.add_argument('--output', type=str, help="Path of the JSON report, printed to stdout if omitted.")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed passes over the positions.")
+    parser.add_argument('--baseline', type=str, help="Previous JSON report to compare against.")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    sys.exit(1 if report["correctness"]["losing_moves"] else 0)
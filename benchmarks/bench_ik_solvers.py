@@ -0,0 +1,133 @@
+"""
+Solve time per control tick of the resolved-rate solvers of `OXOPlayer.move_to`.
+
+Usage:
+    python benchmarks/bench_ik_solvers.py --output ik_solvers.json
+    python benchmarks/bench_ik_solvers.py --model UR5 --qd_max 0.5
+
+The ticks come from servoing the model through the strokes of an X in front of its rest pose,
+as `move_to` does. At every tick the same Jacobian and target twist are given to:
+
+- `rebuild`: a new pydrake `MathematicalProgram` built and solved, the previous implementation,
+- `qp`: the `QPRateSolver` built once and updated,
+- `dls`: the NumPy `DLSRateSolver`.
+
+The report holds the solve time statistics of each solver and the largest joint velocity
+difference with `rebuild`. The pydrake solvers are skipped if it is not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import roboticstoolbox as rtb
+import spatialmath as sm
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from rate_solvers import DLSRateSolver, QPRateSolver
+from bench_engine import summarize
+
+Q_REST = np.radians([0, -42, 30, 0, 50, 0])
+
+
+class RebuildSolver:
+    """Builds and solves a new program at every tick."""
+
+    def __init__(self):
+        from pydrake.solvers import MathematicalProgram, Solve
+        self._program = MathematicalProgram
+        self._solve = Solve
+
+    def solve(self, J, v, qd_max, linear_cost=None):
+        prog = self._program()
+        qd_opt = prog.NewContinuousVariables(J.shape[1], "v_opt")
+        error = J @ qd_opt - v
+        prog.AddCost(error.dot(error))
+        prog.AddBoundingBoxConstraint([-qd_max] * J.shape[1], [qd_max] * J.shape[1], qd_opt)
+        result = self._solve(prog)
+        return result.is_success(), result.GetSolution(qd_opt)
+
+
+def stroke_targets(robot, length=0.06):
+    """Start and end poses of the two strokes of an X centered below the rest pose."""
+    center = robot.fkine(robot.q)
+    half = length / 2
+    return [center * sm.SE3(x, y, 0) for x, y in ((-half, -half), (half, half), (-half, half), (half, -half))]
+
+
+def record_ticks(robot, qd_max, dt, max_ticks=5000):
+    """Servos through the strokes with the DLS solver and returns the (J, v) of every tick."""
+    ticks = []
+    solver = DLSRateSolver()
+    for target in stroke_targets(robot):
+        arrived = False
+        while not arrived and len(ticks) < max_ticks:
+            v, arrived = rtb.cp_servo(robot.fkine(robot.q), target, gain=2, threshold=0.001)
+            J = robot.jacobe(robot.q)
+            ticks.append((J, v))
+            robot.q = robot.q + solver.solve(J, v, qd_max)[1] * dt
+    return ticks
+
+
+def bench(ticks, solvers, qd_max, repeat):
+    durations = {name: [] for name in solvers}
+    solutions = {name: [] for name in solvers}
+    for _ in range(repeat):
+        for name, solver in solvers.items():
+            solutions[name] = []
+            for J, v in ticks:
+                start = time.perf_counter()
+                qd = solver.solve(J, v, qd_max)[1]
+                durations[name].append(time.perf_counter() - start)
+                solutions[name].append(qd)
+    report = {name: summarize(values) for name, values in durations.items()}
+    if "rebuild" in solutions:
+        reference = np.array(solutions["rebuild"])
+        for name in solvers:
+            report[name]["max_qd_difference"] = float(np.abs(np.array(solutions[name]) - reference).max())
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solve time per tick of the resolved-rate solvers.")
+    parser.add_argument('--model', type=str, default="Lite6", help="Robot model of rtb.models.URDF.")
+    parser.add_argument('--qd_max', type=float, default=1.0, help="Joint velocity bound in rad/s.")
+    parser.add_argument('--rate', type=float, default=25, help="Control loop rate in Hz.")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes over the recorded ticks.")
+    parser.add_argument('--output', type=str, help="Path of the JSON report, printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    robot = getattr(rtb.models.URDF, args.model)()
+    robot.q = Q_REST[:robot.n] if robot.n == len(Q_REST) else robot.qr
+    ticks = record_ticks(robot, args.qd_max, 1 / args.rate)
+
+    solvers = {}
+    try:
+        solvers["rebuild"] = RebuildSolver()
+        solvers["qp"] = QPRateSolver(robot.n, args.qd_max)
+    except ImportError:
+        print("pydrake is not installed, only timing the DLS solver.")
+    solvers["dls"] = DLSRateSolver()
+
+    results = bench(ticks, solvers, args.qd_max, args.repeat)
+    for name, stats in results.items():
+        print(f"{name:>8}: p50 {stats['p50_us']:9.1f} us  p95 {stats['p95_us']:9.1f} us  max {stats['max_us']:9.1f} us")
+    report = {
+        "model": args.model,
+        "ticks": len(ticks),
+        "qd_max": args.qd_max,
+        "tick_budget_us": 1e6 / args.rate,
+        "solvers": results,
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,106 @@
+"""
+Compares the latency and accuracy of the vision inference backends on tests/images.
+
+Usage:
+    python benchmarks/bench_vision_backends.py --output vision_backends.json
+
+Backends whose exported weights are missing are skipped (see export_model.py). Accuracy is
+measured against tests/images/expected_grids.json and agreement against the PyTorch backend.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import vision
+
+IMAGES_DIR = os.path.join(ROOT, "tests", "images")
+
+
+def load_images():
+    with open(os.path.join(IMAGES_DIR, "expected_grids.json")) as f:
+        expected = json.load(f)
+    images = {}
+    for name in expected:
+        image = cv2.imread(os.path.join(IMAGES_DIR, name))
+        # Same channel order as the /play endpoint
+        images[name] = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return images, expected
+
+
+def cell_accuracy(grid, expected_grid):
+    cells = [(a, b) for row, expected_row in zip(grid, expected_grid) for a, b in zip(row, expected_row)]
+    return sum(a == b for a, b in cells) / len(cells)
+
+
+def bench_backend(backend, images, expected, repeat, warmup):
+    vision.set_backend(backend)
+    start = time.perf_counter()
+    vision.get_model()
+    load_seconds = time.perf_counter() - start
+    first = next(iter(images.values()))
+    for _ in range(warmup):
+        vision.image_to_tictactoe_grid(first)
+
+    latencies, grids = [], {}
+    for name, image in images.items():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                grid = vision.image_to_tictactoe_grid(image)
+            except (KeyError, IndexError):
+                # No grid detected, or a mark outside of it
+                grid = None
+            latencies.append(time.perf_counter() - start)
+        grids[name] = grid
+
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "load_seconds": load_seconds,
+        "latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+        },
+        "grid_accuracy": sum(grids[name] == expected[name] for name in images) / len(images),
+        "cell_accuracy": float(np.mean([cell_accuracy(grids[name], expected[name]) if grids[name] else 0.0 for name in images])),
+        "grids": grids,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare vision inference backends.")
+    parser.add_argument('--backends', type=str, nargs='+', default=list(vision.BACKENDS), choices=list(vision.BACKENDS), help="Backends to compare.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per image.")
+    parser.add_argument('--warmup', type=int, default=2, help="Untimed runs before timing.")
+    parser.add_argument('--output', type=str, help="Path of the JSON report, printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    images, expected = load_images()
+    report = {}
+    for backend in args.backends:
+        if not os.path.exists(vision.BACKENDS[backend]):
+            print(f"Skipping {backend}: {vision.BACKENDS[backend]} not found")
+            continue
+        report[backend] = bench_backend(backend, images, expected, args.repeat, args.warmup)
+        print(f"{backend}: {report[backend]['latency_ms']['p50']:.1f} ms p50, "
+              f"grid accuracy {report[backend]['grid_accuracy']:.2f}")
+
+    if "torch" in report:
+        reference = report["torch"]["grids"]
+        for backend, result in report.items():
+            result["agreement_with_torch"] = sum(result["grids"][name] == reference[name] for name in images) / len(images)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,179 @@
+"""
+Per-stage latency of the /play vision pipeline.
+
+Usage:
+    python benchmarks/bench_vision_stages.py --output vision_stages.json
+    python benchmarks/bench_vision_stages.py --images_dir /path/to/more/images --repeat 20
+
+Every image goes through the same steps as a /play request: base64 decode, PIL decode,
+cv2.cvtColor, YOLO preprocessing, inference and NMS (timed by ultralytics in `Results.speed`),
+box postprocessing (`boxes_to_numpy` + `preprocess_bboxes`) and `bb_to_tictactoe_grid`.
+The report holds p50/p95/p99 per stage and the accuracy against tests/images/expected_grids.json
+(images of `--images_dir` without an expected grid are only timed).
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import vision
+from bench_vision_backends import IMAGES_DIR, cell_accuracy
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+STAGES = ("base64_decode", "pil_decode", "cvt_color", "yolo_preprocess", "yolo_inference",
+          "yolo_nms", "boxes_postprocess", "bb_to_grid", "total")
+
+
+def load_requests(images_dir=None):
+    """
+    Reads the images as the data URLs posted by the frontend, keyed by their path relative to the repository.
+
+    Returns:
+        tuple: (dict of image name to data URL, dict of image name to expected grid).
+    """
+    expected = _load_expected(IMAGES_DIR)
+    paths = [os.path.join(ROOT, name) for name in expected]
+    if images_dir:
+        expected.update(_load_expected(images_dir))
+        paths += sorted(
+            os.path.join(images_dir, name) for name in os.listdir(images_dir)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    requests = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            mime = "png" if path.lower().endswith(".png") else "jpeg"
+            requests[os.path.relpath(path, ROOT)] = f"data:image/{mime};base64," + base64.b64encode(f.read()).decode()
+    return requests, expected
+
+
+def _load_expected(images_dir):
+    path = os.path.join(images_dir, "expected_grids.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {os.path.relpath(os.path.join(images_dir, name), ROOT): grid for name, grid in json.load(f).items()}
+
+
+def run_once(data_url):
+    """
+    Runs one image through the /play vision steps.
+
+    Returns:
+        tuple: (grid state or None, dict of stage durations in ms).
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    t = time.perf_counter()
+    image_bytes = base64.b64decode(data_url.split(",")[1])
+    timings["base64_decode"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    image = np.array(Image.open(io.BytesIO(image_bytes)))
+    timings["pil_decode"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
+    timings["cvt_color"] = time.perf_counter() - t
+
+    result = vision.get_model()(image, stream=False, verbose=False)[0]
+    # Results.speed is in milliseconds
+    timings["yolo_preprocess"] = result.speed["preprocess"] / 1000
+    timings["yolo_inference"] = result.speed["inference"] / 1000
+    timings["yolo_nms"] = result.speed["postprocess"] / 1000
+
+    t = time.perf_counter()
+    arrays = vision.boxes_to_numpy(result.boxes)
+    bboxes = vision.preprocess_bboxes(arrays, vision.CLASS_NAMES)
+    timings["boxes_postprocess"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    try:
+        grid = vision.bb_to_tictactoe_grid(bboxes)
+    except (KeyError, IndexError):
+        # No grid detected, or a mark outside of it
+        grid = None
+    timings["bb_to_grid"] = time.perf_counter() - t
+
+    timings["total"] = time.perf_counter() - start
+    return grid, {stage: seconds * 1000 for stage, seconds in timings.items()}
+
+
+def percentiles(values):
+    values = np.asarray(values)
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+    }
+
+
+def bench(requests, expected, repeat, warmup):
+    start = time.perf_counter()
+    vision.get_model()
+    load_seconds = time.perf_counter() - start
+    for data_url in list(requests.values())[:1] * warmup:
+        run_once(data_url)
+
+    samples = {stage: [] for stage in STAGES}
+    grids = {}
+    for name, data_url in requests.items():
+        for _ in range(repeat):
+            grid, timings = run_once(data_url)
+            for stage in STAGES:
+                samples[stage].append(timings[stage])
+        grids[name] = grid
+
+    scored = [name for name in requests if name in expected]
+    return {
+        "backend": vision.BACKEND,
+        "images": len(requests),
+        "repeat": repeat,
+        "warmup": warmup,
+        "load_seconds": load_seconds,
+        "latency_ms": {stage: percentiles(values) for stage, values in samples.items()},
+        "scored_images": len(scored),
+        "grid_accuracy": sum(grids[name] == expected[name] for name in scored) / len(scored) if scored else None,
+        "cell_accuracy": float(np.mean([cell_accuracy(grids[name], expected[name]) if grids[name] else 0.0 for name in scored])) if scored else None,
+        "grids": grids,
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-stage latency of the vision pipeline.")
+    parser.add_argument('--images_dir', type=str, help="Additional folder of images, with an optional expected_grids.json.")
+    parser.add_argument('--backend', type=str, default=vision.BACKEND, choices=list(vision.BACKENDS), help="Inference backend.")
+    parser.add_argument('--repeat', type=int, default=10, help="Timed runs per image.")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed runs before timing.")
+    parser.add_argument('--output', type=str, help="Path of the JSON report, printed to stdout if omitted.")
+    args = parser.parse_args()
+
+    vision.set_backend(args.backend)
+    requests, expected = load_requests(args.images_dir)
+    report = bench(requests, expected, args.repeat, args.warmup)
+    for stage, stats in report["latency_ms"].items():
+        print(f"{stage:>18}: p50 {stats['p50']:8.2f} ms  p95 {stats['p95']:8.2f} ms  p99 {stats['p99']:8.2f} ms")
+    print(f"grid accuracy {report['grid_accuracy']}, cell accuracy {report['cell_accuracy']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,62 @@
+"""
+Reference solver of the 3x3 game, independent of the engine, against which `find_best_move` is
+checked by tests/test_engine_exhaustive.py and benchmarks/bench_engine.py.
+
+Plain recursion on flat boards (tuples of 9 letters), without the tables or the bitboards of
+the engine.
+"""
+import functools
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from tictactoe_engine import find_best_move, reachable_positions
+
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+
+def has_line(cells, letter):
+    return any(cells[a] == cells[b] == cells[c] == letter for a, b, c in LINES)
+
+
+@functools.lru_cache(maxsize=None)
+def perfect_play_value(cells, letter):
+    """
+    Outcome for `letter` to move under perfect play from both sides: 1 win, 0 draw, -1 loss.
+    """
+    other = 'O' if letter == 'X' else 'X'
+    best = -1
+    for k in range(9):
+        if cells[k] != ' ':
+            continue
+        child = cells[:k] + (letter,) + cells[k + 1:]
+        if has_line(child, letter):
+            return 1
+        value = 0 if ' ' not in child else -perfect_play_value(child, other)
+        best = max(best, value)
+    return best
+
+
+def losing_moves():
+    """
+    Plays `find_best_move` on every reachable position and lists the moves that are worse than perfect play.
+
+    Returns:
+        list: (cells, move, outcome of the move, best outcome) tuples.
+    """
+    mistakes = []
+    for cells in reachable_positions():
+        board = [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+        move, player, win, is_grid_complete = find_best_move(board)
+        if move is None:
+            continue
+        k = 3 * move[0] + move[1]
+        child = cells[:k] + (player,) + cells[k + 1:]
+        other = 'O' if player == 'X' else 'X'
+        outcome = 1 if has_line(child, player) else 0 if ' ' not in child else -perfect_play_value(child, other)
+        best = perfect_play_value(cells, player)
+        if outcome < best:
+            mistakes.append((cells, move, outcome, best))
+    return mistakes
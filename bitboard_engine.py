@@ -0,0 +1,215 @@
+"""
+Bitboard core of the Tic-Tac-Toe engine.
+
+X and O are stored as two 9-bit integers (bit `3 * row + col` set when the cell is taken)
+and wins are checked against precomputed line masks. The board is converted once at the
+boundary, in `find_best_move`, and every search node then works on integers only.
+"""
+
+FULL_MASK = 0b111111111
+
+# Winning lines as bit masks, in the order `tictactoe_engine.evaluate` scans them.
+LINE_MASKS = tuple(
+    sum(1 << k for k in line)
+    for line in (
+        (0, 1, 2), (0, 3, 6),
+        (3, 4, 5), (1, 4, 7),
+        (6, 7, 8), (2, 5, 8),
+        (0, 4, 8), (2, 4, 6),
+    )
+)
+
+CELL_BITS = tuple(1 << k for k in range(9))
+
+
+def _build_win_table():
+    table = bytearray(1 << 9)
+    for mask in range(1 << 9):
+        for line in LINE_MASKS:
+            if mask & line == line:
+                table[mask] = 1
+                break
+    return bytes(table)
+
+
+# WINS[mask] is 1 when the 9-bit mask contains a full line.
+WINS = _build_win_table()
+
+
+def board_to_bits(board):
+    """
+    Converts a 3x3 list board to bitboards.
+
+    Args:
+        board (list): 3x3 grid representing the Tic-Tac-Toe board state.
+
+    Returns:
+        tuple: (x_bits, o_bits).
+    """
+    x_bits = o_bits = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == 'X':
+                x_bits |= CELL_BITS[3 * i + j]
+            elif board[i][j] == 'O':
+                o_bits |= CELL_BITS[3 * i + j]
+    return x_bits, o_bits
+
+
+def bits_to_board(x_bits, o_bits):
+    """
+    Converts bitboards back to a 3x3 list board.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+
+    Returns:
+        list: 3x3 grid representing the Tic-Tac-Toe board state.
+    """
+    return [
+        ['X' if x_bits & CELL_BITS[3 * i + j] else 'O' if o_bits & CELL_BITS[3 * i + j] else ' ' for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def evaluate(x_bits, o_bits):
+    """
+    Evaluates the board to check for a win.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+
+    Returns:
+        int: 10 if X has a line, -10 if O has a line, 0 otherwise.
+    """
+    for line in LINE_MASKS:
+        if x_bits & line == line:
+            return 10
+        if o_bits & line == line:
+            return -10
+    return 0
+
+
+def check_win(x_bits, o_bits):
+    """
+    Checks if there is a win on the board.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+
+    Returns:
+        tuple: (win, winner letter or None, is_grid_complete).
+    """
+    is_grid_complete = (x_bits | o_bits) == FULL_MASK
+    score = evaluate(x_bits, o_bits)
+    if score:
+        return True, 'X' if score > 0 else 'O', is_grid_complete
+    return False, None, is_grid_complete
+
+
+def check_draw(x_bits, o_bits):
+    return (x_bits | o_bits) == FULL_MASK
+
+
+def minimax(x_bits, o_bits, depth, is_max, alpha, beta, player_letter=None):
+    """
+    Minimax algorithm with alpha-beta pruning on bitboards.
+
+    Mirrors `tictactoe_engine.minimax`: scores favour X, the maximizing side places X
+    and the minimizing side places O.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+        depth (int): Current depth of the recursion.
+        is_max (bool): Flag indicating if the current move is maximizing.
+        alpha (float): Alpha value for alpha-beta pruning.
+        beta (float): Beta value for alpha-beta pruning.
+        player_letter (str): Unused, the side to move is given by `is_max`. Kept so that calls
+            with the original signature still work.
+
+    Returns:
+        int: Best score for the current move.
+    """
+    if WINS[x_bits]:
+        return 10 - depth
+    if WINS[o_bits]:
+        return -10 + depth
+    taken = x_bits | o_bits
+    if taken == FULL_MASK:
+        return 0
+
+    if is_max:
+        best = float('-inf')
+    else:
+        best = float('inf')
+    for bit in CELL_BITS:
+        if taken & bit:
+            continue
+        if is_max:
+            value = minimax(x_bits | bit, o_bits, depth + 1, False, alpha, beta)
+            if value > best:
+                best = value
+            if value > alpha:
+                alpha = value
+        else:
+            value = minimax(x_bits, o_bits | bit, depth + 1, True, alpha, beta)
+            if value < best:
+                best = value
+            if value < beta:
+                beta = value
+        if beta <= alpha:
+            break
+    return best
+
+
+def find_best_move(board):
+    """
+    Finds the best move for the current board state.
+
+    Same signature and results as `tictactoe_engine.find_best_move`, searched on bitboards.
+
+    Args:
+        board (list): 3x3 grid representing the Tic-Tac-Toe board state.
+
+    Returns:
+        tuple: (best move (row, col) or None, player letter, win, is_grid_complete).
+    """
+    x_bits, o_bits = board_to_bits(board)
+    x_count, o_count = bin(x_bits).count('1'), bin(o_bits).count('1')
+    player_letter = 'X' if x_count < o_count else 'O'
+
+    win, winner_letter, is_grid_complete = check_win(x_bits, o_bits)
+    if win:
+        return None, winner_letter, True, is_grid_complete
+    if is_grid_complete:
+        return None, None, False, is_grid_complete
+
+    own, other = (x_bits, o_bits) if player_letter == 'X' else (o_bits, x_bits)
+    taken = x_bits | o_bits
+    best_move = None
+    best_val = float('-inf') if player_letter == 'X' else float('inf')
+    for k, bit in enumerate(CELL_BITS):
+        if taken & bit:
+            continue
+        if player_letter == 'X':
+            move_val = minimax(x_bits | bit, o_bits, 0, False, float('-inf'), float('inf'))
+        else:
+            move_val = minimax(x_bits, o_bits | bit, 0, True, float('-inf'), float('inf'))
+
+        if (player_letter == 'X' and move_val > best_val) or (player_letter == 'O' and move_val < best_val):
+            best_move = k
+            best_val = move_val
+        elif move_val == best_val:
+            # Tie-breaking: O prefers blocking the opponent, X prefers winning.
+            if (player_letter == 'O' and WINS[other | bit]) or (player_letter == 'X' and WINS[own | bit]):
+                best_move = k
+
+    if player_letter == 'X':
+        win, _, is_grid_complete = check_win(x_bits | CELL_BITS[best_move], o_bits)
+    else:
+        win, _, is_grid_complete = check_win(x_bits, o_bits | CELL_BITS[best_move])
+    return divmod(best_move, 3), player_letter, win, is_grid_complete
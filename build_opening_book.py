@@ -0,0 +1,19 @@
+"""
+Writes the opening book of tictactoe_engine: the solved move, player, flags and value of every
+3x3 board, memory-mapped by the engine at import.
+"""
+import argparse
+import time
+
+import tictactoe_engine
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the Tic-Tac-Toe opening book.")
+    parser.add_argument('--output', type=str, default=tictactoe_engine.BOOK_PATH, help="Path of the book file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    size = tictactoe_engine.write_opening_book(args.output)
+    print(f"Wrote {tictactoe_engine.NUM_CODES} positions ({size / 1024:.0f} KiB) to {args.output} "
+          f"in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,118 @@
+"""
+Exports weights/best.pt for CPU inference backends of vision.py.
+
+    python export_model.py --format onnx            # weights/best.onnx
+    python export_model.py --format onnx --int8 --calibration_dir calibration/  # also weights/best_int8.onnx
+    python export_model.py --format openvino --int8 --data data.yaml
+
+ONNX INT8 models are quantized statically with ONNX Runtime, calibrated on the images of
+--calibration_dir. They must be held out from tests/images, which bench_vision_backends.py
+scores the accuracy of the backends on. OpenVINO INT8 models are quantized by ultralytics with
+NNCF, which needs a dataset YAML (--data).
+"""
+import argparse
+import glob
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from vision import BACKENDS, MODEL_PATH, decode_image
+
+# Images the accuracy of the backends is measured on, never used for calibration
+BENCHMARK_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "images")
+
+
+def letterbox(image, size):
+    """
+    Resizes an image to a square input keeping its aspect ratio, padded as ultralytics does.
+
+    Args:
+        image (np.ndarray): Image as passed to ultralytics at runtime, i.e. from `decode_image`.
+        size (int): Side of the model input.
+
+    Returns:
+        np.ndarray: (1, 3, size, size) float32 tensor in [0, 1], with the channels swapped as
+        ultralytics does, which reads arrays as BGR.
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor)
+
+
+def quantize_onnx(fp32_path, int8_path, calibration_dir, imgsz):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    import onnxruntime
+
+    input_name = onnxruntime.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    paths = sorted(glob.glob(os.path.join(calibration_dir, "*.png")) + glob.glob(os.path.join(calibration_dir, "*.jpg")))
+    if not paths:
+        raise ValueError(f"No calibration images found in {calibration_dir}.")
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(paths)
+
+        def get_next(self):
+            path = next(self.paths, None)
+            if path is None:
+                return None
+            # Decoded as /play does, so the calibration sees the channel order of the runtime input
+            with open(path, "rb") as f:
+                return {input_name: letterbox(decode_image(f.read()), imgsz)}
+
+    quantize_static(
+        fp32_path, int8_path, ImageReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the detection model for CPU inference.")
+    parser.add_argument('--format', type=str, default="onnx", choices=["onnx", "openvino"], help="Export format.")
+    parser.add_argument('--int8', action='store_true', help="Also write an INT8 quantized model.")
+    parser.add_argument('--imgsz', type=int, default=640, help="Input size of the exported model.")
+    parser.add_argument('--calibration_dir', type=str, help="Calibration images for ONNX INT8, held out from tests/images.")
+    parser.add_argument('--data', type=str, help="Dataset YAML for OpenVINO INT8 calibration.")
+    args = parser.parse_args()
+    if args.format == "onnx" and args.int8:
+        if not args.calibration_dir:
+            parser.error("--calibration_dir is required for ONNX INT8 calibration.")
+        if os.path.abspath(args.calibration_dir) == BENCHMARK_IMAGES:
+            parser.error("tests/images is the accuracy benchmark set, calibrate on held-out images.")
+        if not os.path.isdir(args.calibration_dir):
+            parser.error(f"--calibration_dir {args.calibration_dir} is not a directory.")
+    # Checked before any export, so that a missing argument does not leave a partial export
+    if args.format == "openvino" and args.int8:
+        if not args.data:
+            parser.error("--data is required for OpenVINO INT8 calibration.")
+        if not os.path.isfile(args.data):
+            parser.error(f"--data {args.data} does not exist.")
+
+    from ultralytics import YOLO
+    model = YOLO(MODEL_PATH)
+
+    if args.format == "onnx":
+        exported = model.export(format="onnx", imgsz=args.imgsz, simplify=True)
+        if os.path.abspath(exported) != os.path.abspath(BACKENDS["onnx"]):
+            shutil.move(exported, BACKENDS["onnx"])
+        print(f"Wrote {BACKENDS['onnx']}")
+        if args.int8:
+            quantize_onnx(BACKENDS["onnx"], BACKENDS["onnx-int8"], args.calibration_dir, args.imgsz)
+            print(f"Wrote {BACKENDS['onnx-int8']}")
+    else:
+        exported = model.export(format="openvino", imgsz=args.imgsz)
+        print(f"Wrote {exported}")
+        if args.int8:
+            exported = model.export(format="openvino", imgsz=args.imgsz, int8=True, data=args.data)
+            print(f"Wrote {exported}")
@@ -0,0 +1,183 @@
+"""
+Background execution of robot motions.
+
+Drawing a letter or the grid takes tens of seconds. Asynchronous `/play` and `/draw_grid`
+requests return once the move is decided, with the id of a job drawing it on a single worker
+thread: the robot only runs one motion at a time. Each job records its progress events, which
+`/jobs/<id>` returns and `/jobs/<id>/events` streams as server-sent events.
+"""
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, ERROR = "queued", "running", "done", "error"
+
+
+class RobotBusyError(Exception):
+    pass
+
+
+class Job:
+    """
+    A motion run in the background and the events it reported.
+
+    Args:
+        kind (str): What the job does, e.g. "play" or "draw_grid".
+        result (dict): Response already known when the job is submitted, e.g. the decided move.
+    """
+
+    def __init__(self, kind, result=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.result = result
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    def emit(self, event, status=None, **info):
+        """
+        Records a progress event and wakes up the event streams.
+
+        Args:
+            event (str): Name of the event, e.g. "stroke_started".
+            status (str): New status of the job, set together with the event.
+            **info: Details of the event.
+        """
+        with self._condition:
+            if status is not None:
+                self.status = status
+                if self.is_finished():
+                    self.finished = time.time()
+            self.events.append({"id": next(self._sequence), "event": event, "time": time.time(), **info})
+            self._condition.notify_all()
+
+    def is_finished(self):
+        return self.status in (DONE, ERROR)
+
+    def wait_events(self, since, timeout=None):
+        """
+        Returns the events after index `since`, waiting for one if there is none yet.
+
+        Args:
+            since (int): Number of events already read.
+            timeout (float): Seconds to wait for a new event.
+
+        Returns:
+            list: New events, empty on timeout or when the job is finished.
+        """
+        with self._condition:
+            if len(self.events) <= since and not self.is_finished():
+                self._condition.wait(timeout)
+            return self.events[since:]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+            "events": list(self.events),
+        }
+
+
+class JobManager:
+    """
+    Runs robot jobs one at a time on a background thread.
+
+    Args:
+        max_jobs (int): Number of jobs kept for polling, oldest finished ones dropped first.
+    """
+
+    def __init__(self, max_jobs=100):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="robot-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def busy(self):
+        """
+        Returns True while a job is queued or running.
+        """
+        with self._lock:
+            return any(not job.is_finished() for job in self._jobs.values())
+
+    def submit(self, kind, fn, result=None):
+        """
+        Queues a motion.
+
+        Args:
+            kind (str): What the job does.
+            fn (callable): Called as fn(job) on the worker thread; `job.emit` reports progress.
+            result (dict): Response already known, returned with the job status.
+
+        Returns:
+            Job: The submitted job.
+
+        Raises:
+            RobotBusyError: If another job has not finished yet.
+        """
+        with self._lock:
+            if any(not job.is_finished() for job in self._jobs.values()):
+                raise RobotBusyError("The robot is still executing the previous move.")
+            job = Job(kind, result)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs))
+                if not self._jobs[oldest].is_finished():
+                    break
+                del self._jobs[oldest]
+        job.emit("queued")
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job, fn):
+        job.emit("started", status=RUNNING)
+        try:
+            fn(job)
+        except Exception as e:
+            job.error = str(e)
+            job.emit("error", status=ERROR, message=str(e))
+        else:
+            job.emit("done", status=DONE)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def sse_stream(job, keepalive=15.0):
+    """
+    Yields the events of a job as server-sent events until it is finished.
+
+    Args:
+        job (Job): Job to follow.
+        keepalive (float): Seconds between comment lines keeping idle connections open.
+
+    Yields:
+        str: `event:`/`data:` blocks, starting with the events already recorded.
+    """
+    since = 0
+    while True:
+        events = job.wait_events(since, timeout=keepalive)
+        for event in events:
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        since += len(events)
+        if job.is_finished() and since >= len(job.events):
+            return
+        if not events:
+            yield ": keepalive\n\n"
@@ -1,23 +1,22 @@
 # main.py
 
+from startup import STARTUP, INIT, BACKGROUND
 import argparse
+import functools
 import signal
 import atexit
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import base64
 import numpy as np
-from vision import image_to_tictactoe_grid
-from tictactoe_engine import find_best_move
-from robot import OXOPlayer
-import spatialmath as sm
-import spatialgeometry as sg
-from PIL import Image
-import io
-import swift
-import roboticstoolbox as rtb
-import cv2
+from vision import decode_image, start_warm_up, is_model_ready, set_backend, enable_batching, BACKENDS, VisionCache
+from tictactoe_engine import build_table, book_status
+from stream import StreamPlayer, read_frames
+from jobs import JobManager, RobotBusyError, sse_stream
+from workers import RemotePlayer, RobotController, VisionPool
+from sessions import Session, DEFAULT_ROBOT, load_robots
+from plan_cache import PlanCache, PLAN_CACHE_PATH
+import metrics
 import os
-from robotsAPI import Lite6API
 
 
 
@@ -47,19 +46,135 @@ def joint_to_SE3(origin, x_point, y_point):
     T[:3, :3] = R
     T[:3, 3] = t
     
+    import spatialmath as sm
     return sm.SE3(T)
 
 app = Flask(__name__)
+vision_cache = VisionCache()
+# Robots served by the backend, by id
+sessions = {}
 
-def initialize_app(modes, robot_ip=None):
-    global ROBOT, api, simulation, scene, oxoplayer
+def initialize_app(modes=None, robot_ip=None, grid_dim=3, warm_up=True, vision_backend=None, change_threshold=0.002, stream_source=None, stream_rate=2.0, robot_starts=False, workers=0, robots=None, ik_solver="auto", plan_cache=None, motion="path", draw_speed=0.1, timing="optimal", safety_factor=0.5, tracking_margin=0.2):
+    """
+    Builds the players of the robots and returns the Flask app.
+
+    Args:
+        robots (list): Robots to serve, as returned by `sessions.load_robots`. A single robot
+            with id "default", `modes` and `robot_ip` if None. The stream is played by the first one.
+        motion (str): Drawing motion of the players, "path" or "waypoints".
+        draw_speed (float): Pen speed of the paths in m/s.
+        timing (str): Timing of the paths, "optimal" within the joint limits or "trapezoid" at `draw_speed`.
+        safety_factor (float): Fraction of the joint limits used by the optimal timing.
+        tracking_margin (float): Fraction of the joint velocity limits added to the safety factor
+            for the correction while tracking a path.
+
+    Returns:
+        Flask: The app.
+    """
+    if robots is None:
+        # Validate modes
+        if not modes:
+            raise ValueError("At least one mode must be specified: SIMULATION or REAL.")
+        robots = [{"id": DEFAULT_ROBOT, "modes": modes, "robot_ip": robot_ip}]
+
+    if vision_backend:
+        set_backend(vision_backend)
+
+    vision_pool = None
+    if workers:
+        with STARTUP.step(INIT, "vision pool"):
+            vision_pool = VisionPool(workers, vision_backend)
+    else:
+        if warm_up:
+            # Loads ultralytics and the model in the background, reported once done
+            start_warm_up(on_done=functools.partial(STARTUP.record, BACKGROUND, "vision warm-up"))
+        if len(robots) > 1:
+            # Coinciding requests of different robots share one inference
+            enable_batching()
+
+    sessions.clear()
+    for robot in robots:
+        player_kwargs = {
+            "modes": robot["modes"],
+            "robot_ip": robot.get("robot_ip"),
+            "grid_dim": robot.get("grid_dim", grid_dim),
+            "change_threshold": change_threshold,
+            "calibration": robot.get("calibration"),
+            "ik_solver": ik_solver,
+            # One cache root per robot, pruned independently
+            "plan_cache": os.path.join(plan_cache, robot["id"]) if plan_cache else plan_cache,
+            "motion": motion,
+            "draw_speed": draw_speed,
+            "timing": timing,
+            "safety_factor": safety_factor,
+            "tracking_margin": tracking_margin,
+        }
+        if workers:
+            # Robot control and detection run in their own processes
+            with STARTUP.step(INIT, f"robot controller {robot['id']}"):
+                controller = RobotController(create_oxoplayer, **player_kwargs)
+            player = RemotePlayer(controller, vision_pool, grid_dim=player_kwargs["grid_dim"], change_threshold=change_threshold)
+        else:
+            player = create_oxoplayer(**player_kwargs)
+        sessions[robot["id"]] = Session(robot["id"], player, JobManager())
+
+    if stream_source is not None:
+        session = next(iter(sessions.values()))
+        # Moves of the stream are robot jobs, exclusive with those of /play
+        session.streamer = StreamPlayer(session.player, max_rate=stream_rate, change_threshold=change_threshold, robot_starts=robot_starts,
+                                        jobs=session.jobs, lock=session.lock)
+        session.streamer.start(read_frames(stream_source))
+    return app
 
-    # Validate modes
-    MODES = modes
-    if not MODES:
-        raise ValueError("At least one mode must be specified: SIMULATION or REAL.")
 
-    ROBOT = rtb.models.URDF.Lite6()
+# Drawing board points of the default setup, in the world frame
+DEFAULT_CALIBRATION = {
+    "origin": [0.26181, -0.40603, 0.7570],
+    "x_point": [-0.25917, -0.41053, 0.7570],
+    "y_point": [0.26958, -0.11686, 0.7540],
+}
+
+
+def create_oxoplayer(modes, robot_ip=None, grid_dim=3, change_threshold=0.002, calibration=None, ik_solver="auto", plan_cache=None, motion="path", draw_speed=0.1, timing="optimal", safety_factor=0.5, tracking_margin=0.2):
+    """
+    Prepares the engine and builds the robot model, the simulation, the robot connection and the player.
+
+    Runs in the Flask process, or in the robot-controller process when started with --workers.
+    spatialmath, roboticstoolbox and pydrake (through `robot`) are imported on the first call,
+    spatialgeometry and swift only in SIMULATION mode.
+
+    Args:
+        calibration (dict): `origin`, `x_point` and `y_point` of the drawing board passed to
+            `joint_to_SE3`, `DEFAULT_CALIBRATION` if None.
+        ik_solver (str): Resolved-rate solver of the player, see `rate_solvers.make_rate_solver`.
+        plan_cache (str): Directory of the planned trajectories kept across restarts, disabled if None.
+        motion (str): "path" to follow continuous Cartesian paths, "waypoints" to servo through points.
+        draw_speed (float): Pen speed of the paths in m/s.
+        timing (str): Timing of the paths, "optimal" within the joint limits or "trapezoid" at `draw_speed`.
+        safety_factor (float): Fraction of the joint limits used by the optimal timing.
+        tracking_margin (float): Fraction of the joint velocity limits added to the safety factor
+            for the correction while tracking a path.
+
+    Returns:
+        OXOPlayer: The player.
+    """
+    MODES = modes
+    calibration = calibration or DEFAULT_CALIBRATION
+
+    with STARTUP.step(INIT, "engine table"):
+        book = book_status()
+        if book["loaded"]:
+            print(f"Engine opening book: {book['path']} ({book['size'] / 1024:.0f} KiB, memory-mapped)")
+        else:
+            table_stats = build_table()
+            print(f"Engine table: {table_stats['positions']} positions, {table_stats['nodes']} nodes, "
+                  f"{table_stats['memory_bytes'] / 1024:.0f} KiB built in {table_stats['build_seconds']:.2f} s")
+
+    sm = STARTUP.import_module("spatialmath")
+    rtb = STARTUP.import_module("roboticstoolbox")
+    OXOPlayer = STARTUP.import_module("robot").OXOPlayer
+    with STARTUP.step(INIT, "robot model"):
+        ROBOT = rtb.models.URDF.Lite6()
     origin = np.array([0.40603, 0.26181, 0.053635])
     x_point = np.array([0.41053, -0.25917, 0.056265])
     y_point = np.array([0.11686, 0.26958,0.051699])
@@ -71,36 +186,42 @@ def initialize_app(modes, robot_ip=None):
     simulation = None
     scene = []
 
-    table = sg.Mesh(
-        filename=str(os.path.abspath("assets/stand.dae")),
-        scale=(1.0,) * 3,
-        color=[240, 103, 103],
-    )
-    
-    table.T = table.T * sm.SE3.Rz(90, 'deg')* sm.SE3.Tz(0.7) 
-    origin = np.array([0.26181, -0.40603, 0.7570])
-    x_point = np.array([-0.25917, -0.41053, 0.7570])
-    y_point = np.array([0.26958, -0.11686, 0.7540])
+    origin = np.array(calibration["origin"])
+    x_point = np.array(calibration["x_point"])
+    y_point = np.array(calibration["y_point"])
     #screen_origin = table.T * sm.SE3.Tx(-0.1) * sm.SE3.Ty(-0.2) * sm.SE3.Tz(0.1) * sm.SE3.RPY([0, 180, 0], order='xyz', unit='deg')
     screen_origin = joint_to_SE3(origin, x_point , y_point)
     screen_origin = screen_origin * sm.SE3.Tz(-0.003)
     #screen_origin = sm.SE3(ROBOT.fkine(np.radians([32.1, 82.4, 165, -178.7, -72.7, -190.5])).t) * sm.SE3.RPY([0, 180, 0], order='xyz', unit='deg')# * sm.SE3.Tz(0.002)
-    axes = sg.Axes(length=0.1, pose=screen_origin)
     screen_corner_z_offset = [0, 0, 3.5, 3.5]
     if "SIMULATION" in MODES:
-        simulation = swift.Swift()
+        sg = STARTUP.import_module("spatialgeometry")
+        swift = STARTUP.import_module("swift")
+        table = sg.Mesh(
+            filename=str(os.path.abspath("assets/stand.dae")),
+            scale=(1.0,) * 3,
+            color=[240, 103, 103],
+        )
+        table.T = table.T * sm.SE3.Rz(90, 'deg')* sm.SE3.Tz(0.7) 
+        axes = sg.Axes(length=0.1, pose=screen_origin)
+        with STARTUP.step(INIT, "simulation"):
+            simulation = swift.Swift()
         scene.append(table)
         scene.append(axes)
     if "REAL" in MODES:
         if not ROBOT_IP:
             raise ValueError("Robot IP must be provided for REAL mode.")
-        api = Lite6API(ip=ROBOT_IP)
+        from robotsAPI import Lite6API
+        with STARTUP.step(INIT, "robot connection"):
+            api = Lite6API(ip=ROBOT_IP)
 
     q_rest = [0, -42, 30, 0, 50, 0]
     q_rest = np.radians(q_rest)
     ROBOT.q = q_rest
-    oxoplayer = OXOPlayer(ROBOT, drawing_board_origin=screen_origin, z_boundary = screen_origin.t[2]-0.005, q_rest=q_rest, api=api, simulation=simulation, scene=scene, record=False)
-    return app
+    with STARTUP.step(INIT, "player"):
+        return OXOPlayer(ROBOT, drawing_board_origin=screen_origin, z_boundary = screen_origin.t[2]-0.005, q_rest=q_rest, api=api, simulation=simulation, scene=scene, record=False, grid_dim=grid_dim, change_threshold=change_threshold, ik_solver=ik_solver,
+                         plan_cache=PlanCache(plan_cache) if plan_cache else None, motion=motion, draw_speed=draw_speed,
+                         timing=timing, safety_factor=safety_factor, tracking_margin=tracking_margin)
 
 
 @app.route('/draw_grid', methods=['POST'])
@@ -111,9 +232,11 @@ def draw_grid():
     Request Body:
         center (list): Coordinates of the grid center.
         size (list): Size of the grid.
+        async (bool): Returns a job id right away instead of waiting for the drawing.
+        robot (str): Id of the robot drawing the grid (also accepted as a query parameter).
 
     Returns:
-        json: Response message.
+        json: Response message, and the job id when asynchronous.
     """
     try:
         data = request.get_json()
@@ -123,29 +246,114 @@ def draw_grid():
         if not center or not size:
             return jsonify({"message": "Invalid input"}), 400
 
+        session = get_session(data)
+        if session is None:
+            return jsonify({"message": "Unknown robot"}), 404
+
+        import spatialmath as sm
         center_position = sm.SE3(center[0], center[1], 0)  # Convert to SE3
         size_value = size[0]  # Assuming size is a single value for simplicity
 
-        oxoplayer.draw_grid(center_position, size_value)
+        def run(job=None):
+            with_progress(job, session.player, session.player.draw_grid, center_position, size_value)
+            if session.streamer:
+                session.streamer.reset()
+
+        if is_async(data):
+            try:
+                job = session.jobs.submit("draw_grid", run, result={"message": "Grid generation started"})
+            except RobotBusyError as e:
+                return jsonify({"message": str(e)}), 409
+            return jsonify({"message": "Grid generation started", "job_id": job.id}), 202
+
+        if session.jobs.busy():
+            return jsonify({"message": "The robot is still executing the previous move."}), 409
+        run()
         return jsonify({"message": "Grid generated successfully"}), 200
 
     except Exception as e:
         raise e
         return jsonify({"message": str(e)}), 500
 
+@app.route('/status', methods=['GET'])
+def status():
+    """
+    API endpoint reporting whether the backend is ready to play.
+
+    Query Parameters:
+        robot (str): Id of the robot reported on.
+
+    Returns:
+        json: Readiness of the vision model, unchanged-frame detector counters and startup time report.
+    """
+    session = get_session()
+    if session is None:
+        return jsonify({"message": "Unknown robot"}), 404
+    player = session.player
+    response = {
+        "robot": session.robot_id,
+        "robots": list(sessions),
+        "vision_ready": player.vision_pool.is_ready() if isinstance(player, RemotePlayer) else is_model_ready(),
+        "change_detector": player.change_detector.stats(),
+        "vision_cache": vision_cache.stats(),
+        "startup": STARTUP.to_dict(),
+    }
+    if session.streamer:
+        response["stream"] = session.streamer.stats()
+    return jsonify(response), 200
+
+
 @app.route('/play', methods=['POST'])
 def play():
     """
     API endpoint to play a move in the Tic-Tac-Toe game.
 
     Request Body:
-        image (str): Base64 encoded image data.
+        image (str): Base64 encoded image data, in a JSON body.
+        Or the raw JPEG/PNG bytes, as an application/octet-stream (or image/*) body or as the
+        `image` file of a multipart/form-data body.
+
+    Query Parameters:
+        reduce (int): Decodes raw images at 1/reduce of their resolution (1, 2, 4 or 8).
+        async (bool): Returns once the move is decided, with the id of the job drawing it
+            (also accepted as an `async` field of a JSON body).
+        robot (str): Id of the robot playing (also accepted as a `robot` field of a JSON body).
 
     Returns:
         json: Response containing the grid state, move, game status, and winner.
     """
     try:
-        data = request.get_json()
+        data = request.get_json() if request.mimetype == 'application/json' else None
+        session = get_session(data)
+        if session is None:
+            return jsonify({"message": "Unknown robot"}), 404
+        # Two requests deciding at once would both pass the busy check and share the player state
+        if not session.lock.acquire(blocking=False):
+            return jsonify({"message": "The robot is still executing the previous move."}), 409
+        try:
+            return play_move(session, data)
+        finally:
+            session.lock.release()
+
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+def play_move(session, data):
+    """
+    Decides and draws (or submits) a move of `/play`, with the lock of the session held.
+
+    Args:
+        session (Session): Session of the robot.
+        data (dict): JSON body of the request, None for a raw image.
+
+    Returns:
+        tuple: (JSON response, status code).
+    """
+    player = session.player
+    if session.jobs.busy():
+        return jsonify({"message": "The robot is still executing the previous move."}), 409
+    if data is not None:
         image_data = data.get('image')
 
         if not image_data:
@@ -156,31 +364,162 @@ def play():
             image_bytes = base64.b64decode(image_data.split(",")[1])
         except IndexError:
             return jsonify({"error": "Invalid image data format"}), 400
-
-        # Convert the decoded bytes to a PIL Image
-        image = Image.open(io.BytesIO(image_bytes))
-        # Convert the PIL Image to a numpy array
-        image = np.array(image)
-        image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
+        reduction = 1
+        decode = decode_data_url
+    else:
+        if request.mimetype == 'multipart/form-data':
+            image_file = request.files.get('image')
+            image_bytes = image_file.read() if image_file else b""
+        else:
+            image_bytes = request.get_data()
+        if not image_bytes:
+            return jsonify({"message": "Invalid input"}), 400
+        reduction = request.args.get('reduce', 1, type=int)
+        decode = functools.partial(decode_image, reduction=reduction)
+
+    # The move is only decided here when the drawing runs as a background job
+    draw = not is_async(data)
+
+    # Byte-identical images reuse the cached vision result of the same robot, grid size and reduction
+    cache_key = vision_cache.key(image_bytes, session.robot_id, player.grid_dim, reduction)
+    cached = vision_cache.get(cache_key)
+    if cached is not None:
+        response, decided = player.play(None, grid_state=cached["grid_state"], draw=draw, return_move=True)
+    else:
+        try:
+            with metrics.REQUEST_DECODE_SECONDS.time(format="json" if data is not None else "raw"):
+                image = decode(image_bytes)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
         # Use the play method of OXOPlayer
-        response = oxoplayer.play(image)
+        response, decided = player.play(image, draw=draw, return_move=True)
+        if "grid_state" in response:
+            vision_cache.put(cache_key, player.last_detections, response["grid_state"])
+
+    if "error" in response:
+        return jsonify({"message": response["error"]}), 400
+    print(response)
+    if not draw and decided:
+        move, player_letter = decided
+        try:
+            job = session.jobs.submit("play", lambda job: with_progress(job, player, player.draw_move, move, player_letter), result=response)
+        except RobotBusyError as e:
+            return jsonify({"message": str(e)}), 409
+        return jsonify({**response, "job_id": job.id}), 202
+    return jsonify(response), 200
 
-        if "error" in response:
-            return jsonify({"message": response["error"]}), 400
-        print(response)
-        return jsonify(response), 200
 
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    API endpoint exposing the in-process metrics in the Prometheus text format.
+
+    Returns:
+        text/plain: Histograms and counters of `metrics`.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.after_request
+def count_errors(response):
+    if response.status_code >= 400:
+        metrics.ERRORS_TOTAL.inc(endpoint=request.endpoint or "unknown", status=response.status_code)
+    return response
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    API endpoint polling a background job.
+
+    Returns:
+        json: Status, result, error and progress events of the job.
+    """
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    API endpoint streaming the progress events of a background job as server-sent events.
+
+    Returns:
+        text/event-stream: queued, started, stroke_started, stroke_finished, then done or error.
+    """
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({"message": "Unknown job"}), 404
+    return Response(stream_with_context(sse_stream(job)), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def get_session(data=None):
+    """
+    Session of the robot selected by the `robot` query parameter or JSON field, the first robot by default.
+
+    Returns:
+        Session: The session, None if the id is unknown.
+    """
+    robot_id = request.args.get('robot') or (data or {}).get('robot')
+    if robot_id is None:
+        return next(iter(sessions.values()))
+    return sessions.get(robot_id)
+
+
+def find_job(job_id):
+    for session in sessions.values():
+        job = session.jobs.get(job_id)
+        if job is not None:
+            return job
+    return None
+
+
+def is_async(data=None):
+    value = request.args.get('async') or (data or {}).get('async')
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def with_progress(job, player, fn, *args):
+    """
+    Runs a drawing method of a player, reporting its strokes as events of the job if provided.
+    """
+    player.on_progress = job.emit if job else None
+    try:
+        fn(*args)
+    finally:
+        player.on_progress = None
+
+
+def decode_data_url(image_bytes):
+    """
+    Decodes the image of a base64 JSON request with PIL.
+
+    Args:
+        image_bytes (bytes): Decoded base64 payload.
+
+    Returns:
+        np.ndarray: RGB image.
+    """
+    import io
+    import cv2
+    from PIL import Image
+    # Convert the decoded bytes to a PIL Image
+    image = Image.open(io.BytesIO(image_bytes))
+    # Convert the PIL Image to a numpy array
+    image = np.array(image)
+    return cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
     
 
 
 def on_exit():
     print("Terminal closed. Performing cleanup...")
     # Call the specific function you need
-    if oxoplayer:
-        oxoplayer.cleanup()  # Assuming you have a cleanup method in OXOPlayer
+    for session in sessions.values():
+        session.player.cleanup()  # Assuming you have a cleanup method in OXOPlayer
     func = request.environ.get('werkzeug.server.shutdown')
     if func:
         func()
@@ -188,11 +527,42 @@ def on_exit():
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run the Tic-Tac-Toe Flask app.")
-    parser.add_argument('--modes', type=str, nargs='+', required=True, choices=["SIMULATION", "REAL"], help="Modes to run the application in.")
+    parser.add_argument('--modes', type=str, nargs='+', choices=["SIMULATION", "REAL"], help="Modes to run the application in.")
     parser.add_argument('--robot_ip', type=str, help="IP address of the robot for REAL mode.")
+    parser.add_argument('--grid_dim', type=int, default=3, help="Number of cells per side of the grid (3 by default).")
+    parser.add_argument('--change_threshold', type=float, default=0.002, help="Fraction of changed pixels in the grid region above which a frame is considered new.")
+    parser.add_argument('--vision_backend', type=str, choices=list(BACKENDS), help="Inference backend of the detection model (torch by default).")
+    parser.add_argument('--stream', type=str, help="Video device index or video file to play from instead of /play snapshots.")
+    parser.add_argument('--stream_rate', type=float, default=2.0, help="Maximum number of stream frames inferred per second.")
+    parser.add_argument('--robot_starts', action='store_true', help="In streaming mode, the robot plays first on an empty board.")
+    parser.add_argument('--workers', type=int, default=0, help="Runs the robot in a dedicated process and the detection in this many worker processes (0, the default, runs everything in one process).")
+    parser.add_argument('--robots', type=str, help="JSON file listing several robots to serve, with their ids, modes, IPs and calibrations (replaces --modes and --robot_ip).")
+    parser.add_argument('--ik_solver', type=str, default="auto", choices=["auto", "qp", "dls"], help="Resolved-rate solver of the motions: the pydrake QP, NumPy damped least squares, or auto (QP if pydrake is installed).")
+    parser.add_argument('--plan_cache', type=str, default=PLAN_CACHE_PATH, help="Directory of the planned grid and letter trajectories kept across restarts (weights/plans by default, empty to disable).")
+    parser.add_argument('--motion', type=str, default="path", choices=["path", "waypoints"], help="Drawing motion: continuous Cartesian paths with feedforward velocity (default) or move_to through waypoints.")
+    parser.add_argument('--draw_speed', type=float, default=0.1, help="Pen speed along the paths in m/s, with the trapezoid timing.")
+    parser.add_argument('--timing', type=str, default="optimal", choices=["optimal", "trapezoid"], help="Timing of the paths: fastest within the joint velocity and acceleration limits (default) or trapezoidal at --draw_speed.")
+    parser.add_argument('--safety_factor', type=float, default=0.5, help="Fraction of the joint limits used by the optimal timing.")
+    parser.add_argument('--tracking_margin', type=float, default=0.2, help="Fraction of the joint velocity limits added to the safety factor for the tracking correction, at most 90%% of the limits in total.")
+    parser.add_argument('--startup_target', type=float, help="Seconds within which the backend should be ready; a warning is printed when startup takes longer.")
     args = parser.parse_args()
-
-    initialize_app(args.modes, args.robot_ip).run(debug=True)
+    if not args.modes and not args.robots:
+        parser.error("--modes or --robots is required.")
+    robots = load_robots(args.robots) if args.robots else None
+
+    flask_app = initialize_app(args.modes, args.robot_ip, args.grid_dim, vision_backend=args.vision_backend, change_threshold=args.change_threshold,
+                               stream_source=args.stream, stream_rate=args.stream_rate, robot_starts=args.robot_starts,
+                               workers=args.workers, robots=robots, ik_solver=args.ik_solver, plan_cache=args.plan_cache,
+                               motion=args.motion, draw_speed=args.draw_speed, timing=args.timing, safety_factor=args.safety_factor,
+                               tracking_margin=args.tracking_margin)
+    ready_seconds = STARTUP.mark_ready()
+    print(STARTUP.format())
+    if args.startup_target and ready_seconds > args.startup_target:
+        print(f"Warning: startup took {ready_seconds:.2f} s, above the target of {args.startup_target:.2f} s.")
+    # The reloader of debug mode runs the app in a second process: the robot and worker
+    # processes, the stream and the real robots would then be driven twice
+    real_robot = any("REAL" in robot["modes"] for robot in robots) if robots else "REAL" in args.modes
+    flask_app.run(debug=True, use_reloader=not (args.workers or args.stream is not None or real_robot))
     # Register the exit handler
     signal.signal(signal.SIGINT, lambda sig, frame: on_exit())
     signal.signal(signal.SIGTERM, lambda sig, frame: on_exit())
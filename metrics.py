@@ -0,0 +1,168 @@
+"""
+In-process metrics exposed by `/metrics` in the Prometheus text format.
+
+Counters and histograms are kept in memory by the module, with no client library or external
+service. Metrics are created once at import and updated from the request handlers, the player
+and the robot API callbacks.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a control tick to a full drawing
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_REGISTRY = []
+_LOCK = threading.Lock()
+
+
+def _label_key(label_names, labels):
+    if set(labels) != set(label_names):
+        raise ValueError(f"Expected labels {label_names}, got {tuple(labels)}.")
+    return tuple(str(labels[name]) for name in label_names)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names, key, extra=()):
+    pairs = list(zip(label_names, key)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter, one value per combination of label values.
+
+    Args:
+        name (str): Metric name, ending with `_total`.
+        documentation (str): Help text.
+        label_names (tuple): Names of the labels.
+    """
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.label_names, labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with _LOCK:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Distribution of observed values over cumulative buckets, one per combination of label values.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text.
+        label_names (tuple): Names of the labels.
+        buckets (tuple): Increasing upper bounds of the buckets, +Inf is added.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Per label values: [bucket counts..., +Inf count], sum
+        self._values = {}
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _LOCK:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the block in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(_label_key(self.label_names, labels), ((0,), 0.0))
+        return sum(counts)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with _LOCK:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', le)])} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    with _LOCK:
+        metrics = list(_REGISTRY)
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REQUEST_DECODE_SECONDS = Histogram(
+    "oxo_request_decode_seconds", "Time to decode the image of a /play request.", ("format",))
+VISION_INFERENCE_SECONDS = Histogram(
+    "oxo_vision_inference_seconds", "Time to detect the grid state of an image.")
+ENGINE_SEARCH_SECONDS = Histogram(
+    "oxo_engine_search_seconds", "Time to find the best move.", ("engine",))
+STROKE_SECONDS = Histogram(
+    "oxo_stroke_seconds", "Time to draw one stroke.", ("shape",))
+PATH_DEVIATION_METERS = Histogram(
+    "oxo_path_deviation_meters", "Largest distance between the pen and its reference during a drawing.", ("shape",),
+    buckets=(0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05))
+PATH_TIMING_SECONDS = Histogram(
+    "oxo_path_timing_seconds", "Duration of the time-optimal timing of a path, before following it.")
+MOVE_TO_ITERATIONS = Histogram(
+    "oxo_move_to_iterations", "Control loop iterations of a move_to call.", buckets=COUNT_BUCKETS)
+CONTROL_TICK_SECONDS = Histogram(
+    "oxo_control_tick_seconds", "Duration of one control loop iteration of move_to.")
+STROKE_PLANS_TOTAL = Counter(
+    "oxo_stroke_plans_total", "Letters replayed from their background plan or servoed online.", ("result",))
+ERRORS_TOTAL = Counter(
+    "oxo_errors_total", "Requests answered with an error status.", ("endpoint", "status"))
+UNCHANGED_BOARD_TOTAL = Counter(
+    "oxo_unchanged_board_rejections_total", "Plays rejected because the board has not changed.", ("stage",))
+ROBOT_STATE_TRANSITIONS_TOTAL = Counter(
+    "oxo_robot_state_transitions_total", "State changes reported by the Lite6API callbacks.", ("state",))
+ROBOT_ERROR_WARN_CHANGES_TOTAL = Counter(
+    "oxo_robot_error_warn_changes_total", "Error or warning code changes reported by the Lite6API callbacks.", ("error_code", "warn_code"))
@@ -0,0 +1,302 @@
+"""
+Tic-Tac-Toe engine for N x N boards with k-in-a-row, e.g. 4x4 or 5x5 with 4 in a row.
+
+Exhaustive minimax does not finish on these boards, so the search is an alpha-beta negamax
+with iterative deepening, a transposition table and move ordering, bounded by a wall-clock
+budget per move. When the budget runs out the best move of the deepest completed iteration
+is returned.
+"""
+import time
+
+WIN_SCORE = 10 ** 9
+# Values beyond this are wins, WIN_SCORE minus their distance in plies; heuristic scores stay below.
+WIN_THRESHOLD = WIN_SCORE // 2
+# Heuristic weight of an open window holding n stones of a single player, indexed by n.
+WINDOW_WEIGHTS = (0, 1, 10, 100, 1000, 10000)
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def _to_table(value, ply):
+    """Stores a win as its distance from the stored position rather than from the root."""
+    if value > WIN_THRESHOLD:
+        return value + ply
+    if value < -WIN_THRESHOLD:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    """Converts a stored win back to its distance from the current root."""
+    if value > WIN_THRESHOLD:
+        return value - ply
+    if value < -WIN_THRESHOLD:
+        return value + ply
+    return value
+
+
+def default_k(size):
+    """
+    Default number of aligned marks needed to win on a board of the given size.
+
+    Args:
+        size (int): Grid dimension N.
+
+    Returns:
+        int: 3 on 3x3, N on 4x4, 4 on larger boards.
+    """
+    return size if size <= 4 else 4
+
+
+class Geometry:
+    """
+    Precomputed bit masks for an N x N board with k-in-a-row. Cell (row, col) is bit `row * size + col`.
+    """
+
+    _cache = {}
+
+    def __init__(self, size, k):
+        if not 1 <= k <= size:
+            raise ValueError(f"k must be between 1 and the grid size, got k={k} for size={size}.")
+        self.size = size
+        self.k = k
+        self.full_mask = (1 << size * size) - 1
+        self.cell_bits = tuple(1 << c for c in range(size * size))
+        windows = []
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row, end_col = row + d_row * (k - 1), col + d_col * (k - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        windows.append(sum(1 << (row + d_row * s) * size + col + d_col * s for s in range(k)))
+        self.windows = tuple(windows)
+        # Windows going through each cell, used to test a move for a win.
+        self.cell_windows = tuple(tuple(w for w in self.windows if w & bit) for bit in self.cell_bits)
+        # Cells closer to the center are searched first.
+        center = (size - 1) / 2
+        self.center_order = tuple(sorted(
+            range(size * size),
+            key=lambda c: abs(c // size - center) + abs(c % size - center),
+        ))
+
+    @classmethod
+    def get(cls, size, k):
+        geometry = cls._cache.get((size, k))
+        if geometry is None:
+            geometry = cls._cache[(size, k)] = cls(size, k)
+        return geometry
+
+    def has_line(self, bits):
+        return any(bits & w == w for w in self.windows)
+
+    def wins_with(self, bits, cell):
+        """Checks if `bits` contains a full window through `cell`."""
+        return any(bits & w == w for w in self.cell_windows[cell])
+
+
+def board_to_bits(board):
+    """
+    Converts an N x N list board to bitboards.
+
+    Args:
+        board (list): N x N grid representing the board state.
+
+    Returns:
+        tuple: (x_bits, o_bits).
+    """
+    size = len(board)
+    x_bits = o_bits = 0
+    for i in range(size):
+        for j in range(size):
+            if board[i][j] == 'X':
+                x_bits |= 1 << (i * size + j)
+            elif board[i][j] == 'O':
+                o_bits |= 1 << (i * size + j)
+    return x_bits, o_bits
+
+
+def check_win(board, k=None):
+    """
+    Checks if there is a win on an N x N board.
+
+    Args:
+        board (list): N x N grid representing the board state.
+        k (int): Number of aligned marks needed to win, `default_k(N)` if None.
+
+    Returns:
+        tuple: (win, winner letter or None, is_grid_complete).
+    """
+    size = len(board)
+    geometry = Geometry.get(size, k or default_k(size))
+    x_bits, o_bits = board_to_bits(board)
+    is_grid_complete = (x_bits | o_bits) == geometry.full_mask
+    if geometry.has_line(x_bits):
+        return True, 'X', is_grid_complete
+    if geometry.has_line(o_bits):
+        return True, 'O', is_grid_complete
+    return False, None, is_grid_complete
+
+
+class Search:
+    """
+    Iterative-deepening alpha-beta search for one move.
+
+    Args:
+        geometry (Geometry): Board geometry.
+        deadline (float): `time.perf_counter()` value at which the search stops.
+        table (dict): Transposition table, shared across moves of a game if provided.
+    """
+
+    # The clock is read once every CHECK_INTERVAL nodes.
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, geometry, deadline, table=None):
+        self.geometry = geometry
+        self.deadline = deadline
+        self.table = {} if table is None else table
+        self.nodes = 0
+
+    def evaluate(self, own, other):
+        """Heuristic score of a position from the point of view of the player owning `own`."""
+        score = 0
+        for w in self.geometry.windows:
+            own_in, other_in = own & w, other & w
+            if own_in and not other_in:
+                score += WINDOW_WEIGHTS[min(bin(own_in).count('1'), len(WINDOW_WEIGHTS) - 1)]
+            elif other_in and not own_in:
+                score -= WINDOW_WEIGHTS[min(bin(other_in).count('1'), len(WINDOW_WEIGHTS) - 1)]
+        return score
+
+    def ordered_moves(self, own, other, table_move):
+        geometry = self.geometry
+        taken = own | other
+        moves = [c for c in geometry.center_order if not taken & geometry.cell_bits[c]]
+        # Immediate wins first, then blocks, then the transposition table move.
+        wins = [c for c in moves if geometry.wins_with(own | geometry.cell_bits[c], c)]
+        if wins:
+            return wins[:1]
+        blocks = [c for c in moves if geometry.wins_with(other | geometry.cell_bits[c], c)]
+        if blocks:
+            return blocks[:1]
+        if table_move is not None and table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+        return moves
+
+    def negamax(self, own, other, depth, ply, alpha, beta):
+        self.nodes += 1
+        if self.nodes % self.CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        geometry = self.geometry
+        if (own | other) == geometry.full_mask:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(own, other), None
+
+        key = (own, other)
+        entry = self.table.get(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_value, entry_flag, table_move = entry
+            # The table is reused across moves, so the root of the stored value may differ
+            entry_value = _from_table(entry_value, ply)
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_value, table_move
+                if entry_flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                elif entry_flag == UPPER:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, table_move
+
+        alpha_start = alpha
+        best_value, best_move = -WIN_SCORE - 1, None
+        for cell in self.ordered_moves(own, other, table_move):
+            bit = geometry.cell_bits[cell]
+            if geometry.wins_with(own | bit, cell):
+                value = WIN_SCORE - ply
+            else:
+                value = -self.negamax(other, own | bit, depth - 1, ply + 1, -beta, -alpha)[0]
+            if value > best_value:
+                best_value, best_move = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_start:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, _to_table(best_value, ply), flag, best_move)
+        return best_value, best_move
+
+    def run(self, own, other, max_depth):
+        """
+        Deepens the search until `max_depth` or the deadline.
+
+        Returns:
+            tuple: (best cell, its value, depth of the last completed iteration).
+        """
+        best_move, best_value, completed_depth = None, 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.negamax(own, other, depth, 0, -WIN_SCORE - 1, WIN_SCORE + 1)
+            except SearchTimeout:
+                break
+            best_move, best_value, completed_depth = move, value, depth
+            if abs(value) >= WIN_SCORE - max_depth:
+                # The result is already proven, deeper iterations cannot change it.
+                break
+        return best_move, best_value, completed_depth
+
+
+def find_best_move(board, k=None, time_budget=1.0, table=None):
+    """
+    Finds the best move on an N x N board within a wall-clock budget.
+
+    Args:
+        board (list): N x N grid representing the board state.
+        k (int): Number of aligned marks needed to win, `default_k(N)` if None.
+        time_budget (float): Search time in seconds.
+        table (dict): Transposition table to reuse across moves of the same game.
+
+    Returns:
+        tuple: (best move (row, col) or None, player letter, win, is_grid_complete),
+        as `tictactoe_engine.find_best_move`.
+    """
+    deadline = time.perf_counter() + time_budget
+    size = len(board)
+    geometry = Geometry.get(size, k or default_k(size))
+    x_bits, o_bits = board_to_bits(board)
+    x_count, o_count = bin(x_bits).count('1'), bin(o_bits).count('1')
+    player_letter = 'X' if x_count < o_count else 'O'
+
+    is_grid_complete = (x_bits | o_bits) == geometry.full_mask
+    if geometry.has_line(x_bits):
+        return None, 'X', True, is_grid_complete
+    if geometry.has_line(o_bits):
+        return None, 'O', True, is_grid_complete
+    if is_grid_complete:
+        return None, None, False, is_grid_complete
+
+    own, other = (x_bits, o_bits) if player_letter == 'X' else (o_bits, x_bits)
+    empty_cells = size * size - x_count - o_count
+    search = Search(geometry, deadline, table)
+    cell = search.run(own, other, empty_cells)[0]
+    if cell is None:
+        # Not even the first iteration finished: fall back to the first ordered move.
+        cell = search.ordered_moves(own, other, None)[0]
+
+    own |= geometry.cell_bits[cell]
+    win = geometry.wins_with(own, cell)
+    is_grid_complete = (own | other) == geometry.full_mask
+    return divmod(cell, size), player_letter, win, is_grid_complete
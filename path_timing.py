@@ -0,0 +1,266 @@
+"""
+Time-optimal timing of the Cartesian paths within the joint velocity and acceleration limits.
+
+The trapezoidal timing of `CartesianPath` uses a hand-set pen speed and acceleration, which is
+conservative where the arm could go faster and says nothing about the joints. Here each
+segment of a path is first converted to joint positions q(s) along its arc length s, by
+inverse kinematics from the configuration the robot starts the path from. The timing is then
+computed on a grid of s as in TOPP-RA (Pham and Pham, 2018), with the squared pen speed
+x = ṡ² and the path acceleration u = s̈ constant between two grid points:
+
+- q̇ = q'(s) ṡ bounds x by the joint velocity limits, and by the pen speed limit,
+- q̈ = q'(s) u + q''(s) x bounds u, linearly in x, by the joint acceleration limits,
+- a backward pass computes the largest x from which the end of the segment can still be
+  reached at rest, and a forward pass accelerates as much as possible within it.
+
+Each segment starts and ends at rest, as with the trapezoidal timing.
+"""
+import numpy as np
+import spatialmath as sm
+
+from paths import CartesianPath, Trapezoid
+
+# Bound of the squared pen speed (m²/s²) where no limit applies
+UNBOUNDED_SPEED = 1e4
+# Lite6 datasheet: 180°/s on every joint and 500 mm/s at the tool
+LITE6_QD_MAX = np.radians(180)
+LITE6_TCP_SPEED = 0.5
+# Default joint acceleration of the xArm controller, the URDF has no acceleration limits
+LITE6_QDD_MAX = np.radians(500)
+# Largest fraction of the joint velocity limits ever sent while tracking a path
+MAX_TRACKING_FRACTION = 0.9
+# Largest ratio of the duration of a segment to its trapezoidal timing, beyond which the
+# velocity bound collapsed (e.g. near a singularity) and the trapezoid is kept instead
+MAX_DURATION_RATIO = 10.0
+
+
+class JointLimits:
+    """
+    Limits the timing keeps the path within.
+
+    Args:
+        qd (float or array-like): Velocity limit of each joint in rad/s.
+        qdd (float or array-like): Acceleration limit of each joint in rad/s².
+        tcp_speed (float): Pen speed limit in m/s, None for no limit.
+        safety_factor (float): Fraction of the limits used by the timing.
+        tracking_margin (float): Fraction of the joint velocity limits added to the safety
+            factor for the correction of the tracking error, see `tracking_qd`.
+    """
+
+    def __init__(self, qd=LITE6_QD_MAX, qdd=LITE6_QDD_MAX, tcp_speed=LITE6_TCP_SPEED, safety_factor=0.5, tracking_margin=0.2):
+        if not 0 < safety_factor <= 1:
+            raise ValueError(f"The safety factor must be in (0, 1], got {safety_factor}.")
+        if tracking_margin < 0:
+            raise ValueError(f"The tracking margin must be positive, got {tracking_margin}.")
+        self.qd = np.asarray(qd, dtype=float)
+        self.qdd = np.asarray(qdd, dtype=float)
+        self.tcp_speed = tcp_speed
+        self.safety_factor = safety_factor
+        self.tracking_margin = tracking_margin
+
+    @classmethod
+    def from_robot(cls, robot, safety_factor=0.5, tracking_margin=0.2):
+        """
+        Returns the limits of a robot model: the velocity limits of its URDF when the model has
+        them, the Lite6 limits otherwise.
+
+        Args:
+            robot (rtb.Robot): The robot model.
+            safety_factor (float): Fraction of the limits used by the timing.
+            tracking_margin (float): Fraction of the joint velocity limits left to the correction.
+        """
+        qd = getattr(robot, "qdlim", None)
+        if qd is not None:
+            # Models with a gripper list the limits of its joints after the arm joints
+            qd = np.asarray(qd, dtype=float).ravel()[:robot.n]
+        if qd is None or len(qd) not in (1, robot.n) or not np.all(np.isfinite(qd)) or not np.all(qd > 0):
+            qd = LITE6_QD_MAX
+        return cls(np.broadcast_to(qd, (robot.n,)), np.broadcast_to(LITE6_QDD_MAX, (robot.n,)),
+                   safety_factor=safety_factor, tracking_margin=tracking_margin)
+
+    def tracking_qd(self):
+        """
+        Returns the joint velocity bound while tracking a path timed within these limits: the
+        safety factor plus the tracking margin, at most `MAX_TRACKING_FRACTION` of the limits.
+        """
+        return min(self.safety_factor + self.tracking_margin, MAX_TRACKING_FRACTION) * self.qd
+
+    def fingerprint(self):
+        """
+        Returns the limits as an array, e.g. for cache keys.
+        """
+        return np.r_[self.qd.ravel(), self.qdd.ravel(), self.tcp_speed or 0.0, self.safety_factor, self.tracking_margin]
+
+
+def segment_joint_positions(robot, frame, segment, q, step=0.002, iterations=10, tolerance=1e-7):
+    """
+    Inverse kinematics along a segment, each point solved from the solution of the previous one.
+
+    Args:
+        robot (rtb.Robot): The robot model, its configuration is left unchanged.
+        frame (sm.SE3): Frame of the segment and orientation of the pen.
+        segment (LineSegment or ArcSegment): The segment.
+        q (np.ndarray): Configuration close to the start of the segment.
+        step (float): Largest distance in meters between two points.
+        iterations (int): Gauss-Newton iterations per point at most.
+        tolerance (float): Pose error norm at which a point is solved.
+
+    Returns:
+        tuple: (s, the arc length of the points, and q, one row of joint positions per point).
+    """
+    s = np.linspace(0.0, segment.length, max(int(np.ceil(segment.length / step)), 2) + 1)
+    q = np.array(q, dtype=float)
+    positions = []
+    for distance in s:
+        target = (frame * sm.SE3(segment.point(distance))).A
+        for _ in range(iterations):
+            pose = robot.fkine(q).A
+            # Pose error in the end-effector frame, as for `robot.jacobe`
+            R = pose[:3, :3].T @ target[:3, :3]
+            e = np.r_[pose[:3, :3].T @ (target[:3, 3] - pose[:3, 3]), 0.5 * np.array([R[2, 1] - R[1, 2], R[0, 2] - R[2, 0], R[1, 0] - R[0, 1]])]
+            if np.linalg.norm(e) < tolerance:
+                break
+            q = q + np.linalg.lstsq(robot.jacobe(q), e, rcond=None)[0]
+        positions.append(q.copy())
+    return s, np.array(positions)
+
+
+class TimeOptimalProfile:
+    """
+    Speed profile along a segment, from rest to rest, given by the squared speed at grid points
+    and a constant acceleration between them. Called like `paths.Trapezoid`.
+
+    Args:
+        s (np.ndarray): Arc length of the grid points, from 0 to the length of the segment.
+        x (np.ndarray): Squared speed at the grid points.
+    """
+
+    def __init__(self, s, x):
+        self.s = np.asarray(s, dtype=float)
+        self.x = np.maximum(np.asarray(x, dtype=float), 0.0)
+        self.length = float(self.s[-1])
+        ds = np.diff(self.s)
+        speeds = np.sqrt(self.x)
+        # Constant acceleration over each stage
+        self.u = np.diff(self.x) / (2 * ds)
+        stage_durations = 2 * ds / np.maximum(speeds[:-1] + speeds[1:], 1e-12)
+        self.times = np.r_[0.0, np.cumsum(stage_durations)]
+        self.duration = float(self.times[-1])
+        self.speed = float(speeds.max())
+
+    def __call__(self, t):
+        """
+        Returns (distance, speed) at time t of the segment.
+        """
+        t = min(max(t, 0.0), self.duration)
+        k = min(int(np.searchsorted(self.times, t, side="right")) - 1, len(self.u) - 1)
+        tau = t - self.times[k]
+        speed = np.sqrt(self.x[k])
+        s = self.s[k] + speed * tau + 0.5 * self.u[k] * tau ** 2
+        return min(float(s), float(self.s[k + 1])), max(float(speed + self.u[k] * tau), 0.0)
+
+
+def _max_x(G, h):
+    """
+    Largest x of the polygon G [u, x] <= h, which contains the origin, from its vertices.
+    """
+    i, j = np.triu_indices(len(h), 1)
+    det = G[i, 0] * G[j, 1] - G[i, 1] * G[j, 0]
+    valid = np.abs(det) > 1e-12
+    i, j, det = i[valid], j[valid], det[valid]
+    # Intersections of each pair of constraint lines, by Cramer's rule
+    u = (h[i] * G[j, 1] - G[i, 1] * h[j]) / det
+    x = (G[i, 0] * h[j] - h[i] * G[j, 0]) / det
+    feasible = np.all(G @ np.vstack([u, x]) <= h[:, np.newaxis] + 1e-9 * (1 + np.abs(h[:, np.newaxis])), axis=0)
+    return float(max(x[feasible].max(initial=0.0), 0.0))
+
+
+def time_optimal_profile(s, q, limits):
+    """
+    Computes the fastest rest-to-rest timing of a joint path within the limits.
+
+    Args:
+        s (np.ndarray): Arc length of the pen at the grid points.
+        q (np.ndarray): Joint positions at the grid points, one row per point.
+        limits (JointLimits): Limits of the joints and the pen.
+
+    Returns:
+        TimeOptimalProfile: The timing.
+    """
+    s = np.asarray(s, dtype=float)
+    dq = np.gradient(q, s, axis=0)
+    ddq = np.gradient(dq, s, axis=0)
+    qd_max = limits.safety_factor * np.broadcast_to(limits.qd, dq.shape[1:])
+    qdd_max = limits.safety_factor * np.broadcast_to(limits.qdd, dq.shape[1:])
+    ds = np.diff(s)
+    n = len(s)
+
+    # Largest squared speed allowed by the velocity limits at each grid point
+    with np.errstate(divide="ignore"):
+        x_max = np.min((qd_max / np.abs(dq)) ** 2, axis=1)
+    if limits.tcp_speed:
+        x_max = np.minimum(x_max, (limits.safety_factor * limits.tcp_speed) ** 2)
+
+    def acceleration_bounds(k, x):
+        # -qdd_max <= dq u + ddq x <= qdd_max, as lo <= u <= hi
+        a, b = dq[k], ddq[k]
+        upper = qdd_max - b * x
+        lower = -qdd_max - b * x
+        moving = np.abs(a) > 1e-9
+        if np.any(~moving & (np.abs(b * x) > qdd_max)):
+            return np.inf, -np.inf
+        a = a[moving]
+        hi = np.min(np.where(a > 0, upper[moving] / a, lower[moving] / a), initial=np.inf)
+        lo = np.max(np.where(a > 0, lower[moving] / a, upper[moving] / a), initial=-np.inf)
+        return lo, hi
+
+    # Backward pass: largest squared speeds from which the segment can end at rest. The
+    # constraints of a stage on (u, x) are G [u, x] <= h, with the acceleration limits, the
+    # velocity limit and 0 <= x + 2 ds u <= x of the next point.
+    controllable = np.zeros(n)
+    for k in range(n - 2, -1, -1):
+        G = np.vstack([
+            np.c_[dq[k], ddq[k]],
+            -np.c_[dq[k], ddq[k]],
+            [[2 * ds[k], 1.0], [-2 * ds[k], -1.0], [0.0, 1.0], [0.0, -1.0]],
+        ])
+        h = np.r_[qdd_max, qdd_max, controllable[k + 1], 0.0, min(x_max[k], UNBOUNDED_SPEED), 0.0]
+        controllable[k] = _max_x(G, h)
+
+    # Forward pass: largest acceleration keeping the next point controllable
+    x = np.zeros(n)
+    for k in range(n - 1):
+        hi = acceleration_bounds(k, x[k])[1]
+        u = min(hi, (controllable[k + 1] - x[k]) / (2 * ds[k]))
+        x[k + 1] = min(max(x[k] + 2 * ds[k] * u, 0.0), controllable[k + 1])
+    return TimeOptimalProfile(s, x)
+
+
+def time_optimal_path(robot, path, q, limits, step=0.002):
+    """
+    Replaces the trapezoidal timing of a path with the time-optimal timing of each segment.
+
+    A segment whose optimal timing is not finite or longer than `MAX_DURATION_RATIO` times its
+    trapezoid, where the path goes through a point the limits cannot move through, keeps the
+    trapezoid.
+
+    Args:
+        robot (rtb.Robot): The robot model.
+        path (CartesianPath): Path of the pen.
+        q (np.ndarray): Configuration of the robot at the start of the path.
+        limits (JointLimits): Limits of the joints and the pen.
+        step (float): Spacing in meters of the timing grid.
+
+    Returns:
+        CartesianPath: The same segments with the new timing.
+    """
+    profiles = []
+    for segment in path.segments:
+        s, positions = segment_joint_positions(robot, path.frame, segment, q, step)
+        profile = time_optimal_profile(s, positions, limits)
+        trapezoid = Trapezoid(segment.length, segment.max_speed(path.speed, path.acceleration), path.acceleration)
+        if not np.isfinite(profile.duration) or profile.duration > MAX_DURATION_RATIO * trapezoid.duration:
+            profile = trapezoid
+        profiles.append(profile)
+        q = positions[-1]
+    return CartesianPath(path.frame, path.segments, path.speed, path.acceleration, timings=profiles)
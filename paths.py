@@ -0,0 +1,183 @@
+"""
+Time-parameterized Cartesian paths of the pen.
+
+`OXOPlayer.move_to` servos to a target until it is within a threshold, then stops, so a shape
+drawn through waypoints slows down at every one of them (50 times around an O). A
+`CartesianPath` is instead a sequence of line and arc segments in the frame of the shape, timed
+with a trapezoidal speed profile. `OXOPlayer.follow_path` tracks its pose at every control tick,
+with its velocity as feedforward.
+"""
+import bisect
+
+import numpy as np
+import spatialmath as sm
+
+
+class LineSegment:
+    """
+    Straight segment between two points of the path frame.
+
+    Args:
+        start (array-like): Start point (x, y, z).
+        end (array-like): End point (x, y, z).
+        draws (bool): False if the pen moves in the air, e.g. when lowered or lifted.
+    """
+
+    def __init__(self, start, end, draws=True):
+        self.draws = draws
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.length = float(np.linalg.norm(self.end - self.start))
+        self._direction = (self.end - self.start) / self.length if self.length else np.zeros(3)
+
+    def point(self, s):
+        return self.start + self._direction * s
+
+    def tangent(self, s):
+        return self._direction
+
+    def max_speed(self, speed, acceleration):
+        return speed
+
+    def params(self):
+        return np.r_[0, self.start, self.end]
+
+
+class ArcSegment:
+    """
+    Arc of a circle parallel to the xy plane of the path frame.
+
+    Args:
+        center (array-like): Center of the circle (x, y, z).
+        radius (float): Radius in meters.
+        start_angle (float): Angle of the start point in radians.
+        sweep (float): Swept angle in radians, counterclockwise if positive.
+        draws (bool): False if the pen moves in the air.
+    """
+
+    def __init__(self, center, radius, start_angle=0.0, sweep=2 * np.pi, draws=True):
+        self.draws = draws
+        self.center = np.asarray(center, dtype=float)
+        self.radius = radius
+        self.start_angle = start_angle
+        self.sweep = sweep
+        self.length = abs(sweep) * radius
+
+    def _angle(self, s):
+        return self.start_angle + np.sign(self.sweep) * s / self.radius
+
+    def point(self, s):
+        angle = self._angle(s)
+        return self.center + self.radius * np.array([np.cos(angle), np.sin(angle), 0.0])
+
+    def tangent(self, s):
+        angle = self._angle(s)
+        return np.sign(self.sweep) * np.array([-np.sin(angle), np.cos(angle), 0.0])
+
+    def max_speed(self, speed, acceleration):
+        # Keeps the centripetal acceleration v²/r within the acceleration limit
+        return min(speed, np.sqrt(acceleration * self.radius))
+
+    def params(self):
+        return np.r_[1, self.center, self.radius, self.start_angle, self.sweep]
+
+
+class Trapezoid:
+    """
+    Speed profile along a segment, from rest to rest: constant acceleration, cruise at `speed`,
+    constant deceleration, or a triangle if the segment is too short to reach `speed`.
+
+    Args:
+        length (float): Length of the segment.
+        speed (float): Cruise speed.
+        acceleration (float): Acceleration and deceleration.
+    """
+
+    def __init__(self, length, speed, acceleration):
+        self.length = length
+        self.acceleration = acceleration
+        self.speed = min(speed, np.sqrt(acceleration * length))
+        self.ramp = self.speed / acceleration if self.speed else 0.0
+        cruise = (length - self.speed * self.ramp) / self.speed if self.speed else 0.0
+        self.duration = 2 * self.ramp + cruise
+
+    def __call__(self, t):
+        """
+        Returns (distance, speed) at time t of the segment.
+        """
+        t = min(max(t, 0.0), self.duration)
+        if t < self.ramp:
+            return 0.5 * self.acceleration * t ** 2, self.acceleration * t
+        remaining = self.duration - t
+        if remaining < self.ramp:
+            return self.length - 0.5 * self.acceleration * remaining ** 2, self.acceleration * remaining
+        return self.speed * (t - self.ramp / 2), self.speed
+
+
+class CartesianPath:
+    """
+    Segments followed one after the other at a constant pen orientation.
+
+    Each segment starts and ends at rest, so corners are sharp; an arc is followed at a constant
+    speed between its ends.
+
+    Args:
+        frame (sm.SE3): Frame of the segment points, e.g. the cell center, and pen orientation.
+        segments (list): `LineSegment` and `ArcSegment`, each starting where the previous one ends.
+        speed (float): Cruise speed in m/s.
+        acceleration (float): Acceleration limit in m/s².
+        timings (list): Speed profile of each segment, called like `Trapezoid`, e.g. from
+            `path_timing.time_optimal_path`. Trapezoids of `speed` and `acceleration` if None.
+    """
+
+    def __init__(self, frame, segments, speed=0.1, acceleration=0.5, timings=None):
+        self.frame = sm.SE3(frame)
+        self.segments = [segment for segment in segments if segment.length > 0]
+        self.speed = speed
+        self.acceleration = acceleration
+        if timings is None:
+            timings = [Trapezoid(segment.length, segment.max_speed(speed, acceleration), acceleration)
+                       for segment in self.segments]
+        self.timings = list(timings)
+        self._starts = list(np.cumsum([0.0] + [timing.duration for timing in self.timings]))
+        self.duration = self._starts[-1]
+
+    def _index(self, t):
+        return min(max(bisect.bisect_right(self._starts, t) - 1, 0), len(self.segments) - 1)
+
+    def draws(self, t):
+        """
+        Returns True if the pen draws at time t.
+        """
+        return self.segments[self._index(t)].draws
+
+    def sample(self, t):
+        """
+        Returns the reference of the pen at time t.
+
+        Args:
+            t (float): Time since the start of the path, clamped to [0, duration].
+
+        Returns:
+            tuple: (sm.SE3 pose, np.ndarray linear velocity in the world frame).
+        """
+        index = self._index(t)
+        s, speed = self.timings[index](t - self._starts[index])
+        segment = self.segments[index]
+        pose = self.frame * sm.SE3(segment.point(s))
+        return pose, self.frame.R @ (segment.tangent(s) * speed)
+
+    @property
+    def start_pose(self):
+        return self.sample(0.0)[0]
+
+    @property
+    def end_pose(self):
+        return self.sample(self.duration)[0]
+
+    def fingerprint(self):
+        """
+        Returns the geometry and timing parameters as an array, e.g. for cache keys.
+        """
+        return np.concatenate([self.frame.A.ravel(), [self.speed, self.acceleration]]
+                              + [segment.params() for segment in self.segments])
@@ -0,0 +1,180 @@
+"""
+Persistent cache of the planned joint trajectories of the grid and the letters.
+
+The same grid placement and drawing board calibration are used day after day, so the plans of
+`StrokePlanner` are written to disk and memory-mapped on the next start instead of being
+servoed again. Plans are stored in one directory per calibration, named after a hash of the
+robot base transform, the drawing board origin, the rest configuration, the control period,
+the solver, the path timing and joint limits, and the planning sources. Each plan file is named after a hash of its stroke
+targets, which depend on the grid center and size, the cell and the letter. A new calibration
+or grid therefore never matches stale plans, and only the most recently used calibrations are
+kept. Each robot served by the backend has its own root, so that pruning never removes the
+plans of another robot.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from stroke_plans import StrokePlan
+
+PLAN_CACHE_PATH = os.environ.get(
+    "OXO_PLAN_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights", "plans"),
+)
+PLAN_VERSION = 1
+# Calibration directories opened by this process, never pruned while it runs
+_OPENED = set()
+_OPENED_LOCK = threading.Lock()
+# Sources whose changes alter the planned trajectories
+PLAN_SOURCES = ("robot.py", "rate_solvers.py", "stroke_plans.py", "paths.py", "path_timing.py")
+
+
+def _hash_parts(parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if hasattr(part, "fingerprint"):
+            part = part.fingerprint()
+        elif hasattr(part, "A"):
+            part = part.A
+        if isinstance(part, (np.ndarray, list, tuple, float, int)) and not isinstance(part, bool):
+            # Rounded, so that the float noise of a recomputed transform keeps the same key
+            digest.update(np.round(np.asarray(part, dtype=float), 7).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()[:24]
+
+
+def sources_fingerprint():
+    """
+    Hashes the planning sources, so that plans made by another version are not reused.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in PLAN_SOURCES:
+        with open(os.path.join(root, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def strokes_key(strokes):
+    """
+    Hashes the targets and `move_to` arguments of strokes.
+
+    Args:
+        strokes (list): One list of (target, `move_to` arguments) per stroke.
+
+    Returns:
+        str: Hex digest naming the plan file.
+    """
+    parts = []
+    for targets in strokes:
+        parts.append("stroke")
+        for dest, kwargs in targets:
+            parts.append(dest)
+            parts.append(json.dumps(kwargs, sort_keys=True))
+    return _hash_parts(parts)
+
+
+class PlanCache:
+    """
+    On-disk plans of one calibration.
+
+    Args:
+        path (str): Root directory of the cache of one robot, e.g. `PLAN_CACHE_PATH/<robot id>`.
+        keep (int): Number of calibration directories kept, least recently used removed first.
+    """
+
+    def __init__(self, path=PLAN_CACHE_PATH, keep=4):
+        self.path = path
+        self.keep = keep
+        self.directory = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def open(self, *calibration):
+        """
+        Selects the directory of a calibration, creating it if needed.
+
+        Args:
+            *calibration: Transforms, arrays and values the plans depend on, e.g. the robot base,
+                the drawing board origin and the rest configuration.
+        """
+        key = _hash_parts((PLAN_VERSION, sources_fingerprint()) + calibration)
+        self.directory = os.path.join(self.path, key)
+        os.makedirs(self.directory, exist_ok=True)
+        # Marks the calibration as the most recently used
+        os.utime(self.directory)
+        with _OPENED_LOCK:
+            _OPENED.add(os.path.abspath(self.directory))
+        self._prune()
+
+    def _prune(self):
+        directories = [os.path.join(self.path, name) for name in os.listdir(self.path)]
+        directories = sorted((d for d in directories if os.path.isdir(d)), key=os.path.getmtime, reverse=True)
+        with _OPENED_LOCK:
+            opened = set(_OPENED)
+        for directory in directories[self.keep:]:
+            # Plans of an open directory may be memory-mapped by a player
+            if os.path.abspath(directory) not in opened:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def load(self, strokes):
+        """
+        Memory-maps the plan of strokes.
+
+        Args:
+            strokes (list): One list of (target, `move_to` arguments) per stroke.
+
+        Returns:
+            StrokePlan: The plan, or None if it is not cached.
+        """
+        positions_path, index_path = self._paths(strokes_key(strokes))
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            positions = np.load(positions_path, mmap_mode="r")
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        bounds = np.cumsum([1] + index["strokes"])
+        with self._lock:
+            self.hits += 1
+        return StrokePlan(positions[0], [positions[start:end] for start, end in zip(bounds[:-1], bounds[1:])])
+
+    def save(self, strokes, plan, name=None):
+        """
+        Writes the plan of strokes.
+
+        Args:
+            strokes (list): One list of (target, `move_to` arguments) per stroke.
+            plan (StrokePlan): Planned trajectory.
+            name (str): Readable description stored in the index, e.g. "X in (0, 1)".
+        """
+        positions_path, index_path = self._paths(strokes_key(strokes))
+        positions = np.vstack([plan.start[np.newaxis]] + list(plan.strokes)).astype(np.float64)
+        # Written next to the target and renamed, the index last, so a partial plan is never loaded
+        tmp_suffix = f".tmp{os.getpid()}-{threading.get_ident()}"
+        with open(positions_path + tmp_suffix, "wb") as f:
+            np.save(f, positions)
+        os.replace(positions_path + tmp_suffix, positions_path)
+        with open(index_path + tmp_suffix, "w") as f:
+            json.dump({"name": name, "strokes": [len(stroke) for stroke in plan.strokes]}, f)
+        os.replace(index_path + tmp_suffix, index_path)
+
+    def stats(self):
+        entries = len([name for name in os.listdir(self.directory) if name.endswith(".json")]) if self.directory else 0
+        return {"directory": self.directory, "entries": entries, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,130 @@
+"""
+Resolved-rate solvers of `OXOPlayer.move_to`: the joint velocities qd minimizing ||J qd - v||²
+within the joint velocity bounds, once per control tick.
+
+- `QPRateSolver` builds the pydrake program once and only updates the cost coefficients (from
+  the Jacobian and the target twist) and the bounds at each tick, warm-started from the
+  previous qd.
+- `DLSRateSolver` is a pure NumPy damped least-squares solution scaled into the bounds, used
+  when pydrake is not installed or the QP fails.
+"""
+import numpy as np
+
+
+class DLSRateSolver:
+    """
+    Damped least-squares resolved-rate solver.
+
+    The damping is only applied near singularities: it grows from 0 to `max_damping` as the
+    smallest singular value of the Jacobian drops below `singular_threshold`. A solution
+    exceeding the bounds is scaled down as a whole, which keeps the direction of the motion.
+
+    Args:
+        max_damping (float): Damping factor at a singular configuration.
+        singular_threshold (float): Smallest singular value below which damping is applied.
+    """
+
+    def __init__(self, max_damping=0.05, singular_threshold=0.03):
+        self.max_damping = max_damping
+        self.singular_threshold = singular_threshold
+
+    def solve(self, J, v, qd_max, linear_cost=None):
+        """
+        Computes the joint velocities of a target twist.
+
+        Args:
+            J (np.ndarray): 6×n Jacobian.
+            v (np.ndarray): Target twist.
+            qd_max (float or np.ndarray): Joint velocity bound, per joint or for all of them.
+            linear_cost (np.ndarray): Ignored, only the QP supports the potential field term.
+
+        Returns:
+            tuple: (success, qd).
+        """
+        U, sigma, Vt = np.linalg.svd(J, full_matrices=False)
+        sigma_min = sigma[-1]
+        damping = 0.0
+        if sigma_min < self.singular_threshold:
+            damping = self.max_damping ** 2 * (1 - (sigma_min / self.singular_threshold) ** 2)
+        qd = Vt.T @ (sigma / (sigma ** 2 + damping) * (U.T @ v))
+        ratio = np.max(np.abs(qd) / qd_max)
+        if ratio > 1:
+            qd = qd / ratio
+        return True, qd
+
+
+class QPRateSolver:
+    """
+    Resolved-rate QP built once and updated at every tick.
+
+    The cost ||J qd - v||² is the quadratic cost 0.5 qd'(2 J'J) qd - 2 (J'v)' qd + v'v, whose
+    coefficients are replaced with `UpdateCoefficients`; the bounding box constraint is updated
+    in place. The previous solution is the initial guess of the next solve.
+
+    Args:
+        n (int): Number of joints.
+        qd_max (float): Initial joint velocity bound.
+
+    Raises:
+        ImportError: If pydrake is not installed.
+    """
+
+    def __init__(self, n=6, qd_max=1):
+        # conda install -c conda-forge libstdcxx-ng=12
+        from pydrake.solvers import MathematicalProgram, ChooseBestSolver, MakeSolver
+        self.n = n
+        self.prog = MathematicalProgram()
+        self.qd = self.prog.NewContinuousVariables(n, "v_opt")
+        self.cost = self.prog.AddQuadraticCost(np.eye(n), np.zeros(n), 0.0, self.qd, is_convex=True)
+        self.bounds = self.prog.AddBoundingBoxConstraint(-qd_max * np.ones(n), qd_max * np.ones(n), self.qd)
+        self.solver = MakeSolver(ChooseBestSolver(self.prog))
+        self.previous = np.zeros(n)
+
+    def solve(self, J, v, qd_max, linear_cost=None):
+        """
+        Computes the joint velocities of a target twist.
+
+        Args:
+            J (np.ndarray): 6×n Jacobian.
+            v (np.ndarray): Target twist.
+            qd_max (float or np.ndarray): Joint velocity bound, per joint or for all of them.
+            linear_cost (np.ndarray): Additional linear cost on qd, e.g. the potential field term.
+
+        Returns:
+            tuple: (success, qd).
+        """
+        b = -2 * J.T @ v
+        if linear_cost is not None:
+            b = b + linear_cost
+        self.cost.evaluator().UpdateCoefficients(2 * J.T @ J, b, float(v @ v), is_convex=True)
+        upper = np.broadcast_to(np.asarray(qd_max, dtype=float), (self.n,))
+        self.bounds.evaluator().set_bounds(-upper, upper)
+        result = self.solver.Solve(self.prog, np.clip(self.previous, -upper, upper), None)
+        if not result.is_success():
+            return False, self.previous
+        self.previous = result.GetSolution(self.qd)
+        return True, self.previous
+
+
+def make_rate_solver(kind="auto", n=6, qd_max=1):
+    """
+    Builds a resolved-rate solver.
+
+    Args:
+        kind (str): "qp", "dls", or "auto" for the QP if pydrake is installed and DLS otherwise.
+        n (int): Number of joints.
+        qd_max (float): Initial joint velocity bound.
+
+    Returns:
+        QPRateSolver or DLSRateSolver: The solver.
+    """
+    if kind == "dls":
+        return DLSRateSolver()
+    if kind == "qp":
+        return QPRateSolver(n, qd_max)
+    if kind != "auto":
+        raise ValueError(f"Unknown solver {kind}, expected qp, dls or auto.")
+    try:
+        return QPRateSolver(n, qd_max)
+    except ImportError:
+        return DLSRateSolver()
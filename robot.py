@@ -1,41 +1,38 @@
+import contextlib
+import copy
 import time
 import roboticstoolbox as rtb
 import numpy as np
 import spatialmath as sm
-import spatialgeometry as sg
-from pydrake.solvers import MathematicalProgram, Solve
-# conda install -c conda-forge libstdcxx-ng=12
-import swift
 import json
-from vision import image_to_tictactoe_grid
+from vision import image_to_detections, bb_to_tictactoe_grid, GridTracker, FrameChangeDetector
 from tictactoe_engine import find_best_move
+import nxn_engine
+import metrics
+from rate_solvers import DLSRateSolver, make_rate_solver
+from stroke_plans import StrokePlan, StrokePlanner
+from paths import ArcSegment, CartesianPath, LineSegment
+from path_timing import JointLimits, time_optimal_path
 
 CONTROL_FREQUENCY = 10
+# move_to threshold of the returns to rest, within the tolerance of `StrokePlan.can_start`
+REST_TRESHOLD = 0.0005
 
 
-def jacobian_i_k_optimisation(robot, v, z_boundary= 0, qd_max=1, potiential_field=False):
+def jacobian_i_k_optimisation(robot, v, z_boundary= 0, qd_max=1, potiential_field=False, solver=None):
     J = robot.jacobe(robot.q)
-    J_trans = J[:3, :]  # Extract the translational part of the Jacobian
-    prog = MathematicalProgram()
-    qd_opt = prog.NewContinuousVariables(6, "v_opt")
-
-    # Define the error term for the cost function
-    error = J @ qd_opt - v
-    prog.AddCost(error.dot(error))
+    linear_cost = None
     if potiential_field:
+        J_trans = J[:3, :]  # Extract the translational part of the Jacobian
         # Calculate the potential field gradient
         robot_position = robot.fkine(robot.q).t  # Get the current end-effector position
         _, gradient = potential_field(robot_position, z_boundary)
         # Incorporate the potential field gradient into the cost function
-        prog.AddCost(0.000001*np.dot(gradient, J_trans @ qd_opt))
-
-    # Add bounding box constraint for joint velocities
-    lower_bounds = [-qd_max] * 6  # Lower bounds for each joint velocity
-    upper_bounds = [qd_max] * 6   # Upper bounds for each joint velocity
-    prog.AddBoundingBoxConstraint(lower_bounds, upper_bounds, qd_opt)
-    # Solve the optimization problem
-    result = Solve(prog)
-    return result.is_success(), result.GetSolution(qd_opt)
+        linear_cost = 0.000001 * J_trans.T @ gradient
+    if solver is None:
+        # One-off solve, the player reuses its solver across ticks
+        solver = make_rate_solver(n=J.shape[1], qd_max=qd_max)
+    return solver.solve(J, v, qd_max, linear_cost)
 
 
 def potential_field(robot_position, z_limit, influence_distance=0.004):
@@ -52,7 +49,7 @@ def potential_field(robot_position, z_limit, influence_distance=0.004):
 
 
 class OXOPlayer:
-    def __init__(self, robot, drawing_board_origin, q_rest=None, qd_max = 1, z_boundary = 0, control_loop_rate=25, api=None, simulation=None, scene=None, record=False):
+    def __init__(self, robot, drawing_board_origin, q_rest=None, qd_max = 1, z_boundary = 0, control_loop_rate=25, api=None, simulation=None, scene=None, record=False, grid_dim=3, k=None, time_budget=1.0, change_threshold=0.002, ik_solver="auto", precompute=True, plan_cache=None, motion="path", draw_speed=0.1, draw_acceleration=0.5, timing="optimal", safety_factor=0.5, tracking_margin=0.2):
         self.robot = robot
         self.api = api
         self.drawing_board_origin = drawing_board_origin
@@ -64,10 +61,45 @@ class OXOPlayer:
         self.control_loop_rate = control_loop_rate
         self.dt = 1/control_loop_rate
         self.traj = []
+        # "path" follows continuous Cartesian paths, "waypoints" servos through points with move_to
+        self.motion = motion
+        self.draw_speed = draw_speed
+        self.draw_acceleration = draw_acceleration
+        # "optimal" times the paths within the joint limits, "trapezoid" at draw_speed and draw_acceleration
+        self.timing = timing
+        self.limits = JointLimits.from_robot(robot, safety_factor, tracking_margin) if timing == "optimal" else None
+        self.ticks = 0
+        self.last_drawing = None
+        self._path_errors = []
         self.previous_grid_state = None
+        self.last_detections = None
+        self.last_move = None
+        # Called as on_progress(event, **info) when a stroke starts or finishes
+        self.on_progress = None
+        self._stroke_start = None
         self.grid_size = None
         self.grid_center = None
         self.z_boundary = z_boundary
+        # Built once, updated at every tick of move_to
+        self.ik_solver = ik_solver
+        self.rate_solver = make_rate_solver(ik_solver, n=robot.n, qd_max=qd_max)
+        self.fallback_solver = DLSRateSolver()
+        # Letters planned in the background after the grid is drawn
+        self.stroke_planner = StrokePlanner(self._plan) if precompute else None
+        self._planning_robot = None
+        self._planning_solver = None
+        self._grid_strokes = None
+        # Plans kept on disk for this robot base, drawing board and rest configuration
+        self.plan_cache = plan_cache
+        if self.plan_cache:
+            self.plan_cache.open(robot.name, robot.base, drawing_board_origin, q_rest if q_rest is not None else "no rest",
+                                 self.dt, type(self.rate_solver).__name__, self.timing, self.limits)
+        self.grid_dim = grid_dim
+        self.k = k
+        self.time_budget = time_budget
+        self.search_table = {}
+        self.grid_tracker = GridTracker()
+        self.change_detector = FrameChangeDetector(threshold=change_threshold)
         if self.api:
             self.api.connect()
             self.move_to(self.q_rest, qd_max=0.2)
@@ -100,24 +132,122 @@ class OXOPlayer:
         
     def move_to(self, dest, gain=2, treshold=0.005, qd_max=1): 
         arrived = False
+        iterations = 0
         while not arrived:
+            tick_start = time.perf_counter()
+            iterations += 1
             if self.api:
                 q = self.api.get_joint_positions(is_radian=True)
                 self.robot.q = q
-            else:
-                q = self.robot.q
-            if isinstance(dest, sm.SE3) or (isinstance(dest, np.ndarray) and dest.shape==(4,4)):
-                v, arrived = rtb.cp_servo(self.robot.fkine(q), dest, gain=gain, threshold=treshold)
-                qd = jacobian_i_k_optimisation(self.robot, v, z_boundary = self.z_boundary, qd_max=qd_max)[1]
-            else:
-                qd, arrived = rtb.jp_servo(q, dest, gain=gain, threshold=50*treshold)
+            qd, arrived = self.servo_step(self.robot, dest, self.rate_solver, gain=gain, treshold=treshold, qd_max=qd_max)
             self.robot.qd = qd
             self.step(qd, control_variable="qd")
+            metrics.CONTROL_TICK_SECONDS.observe(time.perf_counter() - tick_start)
+        metrics.MOVE_TO_ITERATIONS.observe(iterations)
         if self.api:
             self.api.set_joint_velocities([0.0, 0.0, 0.0, 0.0, 0.0, 0.0], is_radian=True, duration=self.dt)
         return arrived, self.robot.q
 
+    def servo_step(self, robot, dest, solver, gain=2, treshold=0.005, qd_max=1):
+        """
+        Computes the joint velocities of one `move_to` tick from the configuration `robot.q`.
+
+        Args:
+            robot (rtb.Robot): The robot, or the copy the planner simulates.
+            dest (sm.SE3 or np.ndarray): Target pose, or target joint configuration.
+            solver: Resolved-rate solver, see `rate_solvers`.
+
+        Returns:
+            tuple: (qd, arrived).
+        """
+        if isinstance(dest, sm.SE3) or (isinstance(dest, np.ndarray) and dest.shape==(4,4)):
+            v, arrived = rtb.cp_servo(robot.fkine(robot.q), dest, gain=gain, threshold=treshold)
+            success, qd = jacobian_i_k_optimisation(robot, v, z_boundary = self.z_boundary, qd_max=qd_max, solver=solver)
+            if not success:
+                qd = self.fallback_solver.solve(robot.jacobe(robot.q), v, qd_max)[1]
+        else:
+            qd, arrived = rtb.jp_servo(robot.q, dest, gain=gain, threshold=50*treshold)
+        return qd, arrived
+
+    def follow_path(self, path, gain=10, qd_max=1):
+        """
+        Tracks a `CartesianPath` at the control rate, then settles on its end pose.
+
+        Args:
+            path (CartesianPath): Path of the pen.
+            gain (float): Gain of the correction of the pose error.
+            qd_max (float): Joint velocity bound.
+
+        Returns:
+            list: Distance in meters between the pen and its reference at every drawing tick.
+        """
+        errors = []
+        path, tracking_qd = self.timed_path(self.robot, path, qd_max)
+        for tick in range(int(np.ceil(path.duration / self.dt)) + 1):
+            tick_start = time.perf_counter()
+            if self.api:
+                self.robot.q = self.api.get_joint_positions(is_radian=True)
+            qd, error = self.path_step(self.robot, path, tick * self.dt, self.rate_solver, gain=gain, qd_max=tracking_qd)
+            if path.draws(tick * self.dt):
+                errors.append(error)
+            self.robot.qd = qd
+            self.step(qd, control_variable="qd")
+            metrics.CONTROL_TICK_SECONDS.observe(time.perf_counter() - tick_start)
+        self._path_errors.extend(errors)
+        self.move_to(path.end_pose, treshold=0.001, qd_max=qd_max)
+        return errors
+
+    def timed_path(self, robot, path, qd_max=1):
+        """
+        Returns the path to follow from the configuration `robot.q` and its joint velocity bound.
+
+        With the "optimal" timing, the path is retimed within `limits` from `robot.q`, and the
+        bound is `limits.tracking_qd()`: the reference stays within the safety factor of the
+        limits, and the correction within the tracking margin above it.
+
+        Args:
+            robot (rtb.Robot): The robot, or the copy the planner simulates.
+            path (CartesianPath): Path of the pen.
+            qd_max (float): Joint velocity bound of the trapezoidal timing.
+
+        Returns:
+            tuple: (CartesianPath, joint velocity bound).
+        """
+        if self.timing != "optimal":
+            return path, qd_max
+        with metrics.PATH_TIMING_SECONDS.time():
+            path = time_optimal_path(robot, path, robot.q, self.limits)
+        return path, self.limits.tracking_qd()
+
+    def path_step(self, robot, path, t, solver, gain=10, qd_max=1):
+        """
+        Computes the joint velocities of one `follow_path` tick from the configuration `robot.q`:
+        the velocity of the path as feedforward plus a proportional correction of the pose error.
+
+        Args:
+            robot (rtb.Robot): The robot, or the copy the planner simulates.
+            path (CartesianPath): Path of the pen.
+            t (float): Time since the start of the path.
+            solver: Resolved-rate solver, see `rate_solvers`.
+
+        Returns:
+            tuple: (qd, distance between the pen and its reference).
+        """
+        reference = path.sample(t)[0]
+        # Mean velocity of the reference over the tick, exact for the accelerating parts as well
+        velocity = (path.sample(t + self.dt)[0].t - reference.t) / self.dt
+        pose = robot.fkine(robot.q)
+        # Pose error and feedforward in the end-effector frame, as for `robot.jacobe`
+        error = pose.inv() * reference
+        rotation_error = 0.5 * np.array([error.R[2, 1] - error.R[1, 2], error.R[0, 2] - error.R[2, 0], error.R[1, 0] - error.R[0, 1]])
+        v = np.r_[pose.R.T @ velocity, 0, 0, 0] + gain * np.r_[error.t, rotation_error]
+        success, qd = jacobian_i_k_optimisation(robot, v, z_boundary = self.z_boundary, qd_max=qd_max, solver=solver)
+        if not success:
+            qd = self.fallback_solver.solve(robot.jacobe(robot.q), v, qd_max)[1]
+        return qd, float(np.linalg.norm(reference.t - pose.t))
+
     def step(self, value, control_variable="qd"):
+        self.ticks += 1
         if self.api:
             if control_variable == "qd":
                 self.api.set_joint_velocities(value, is_radian=True, duration=self.dt)
@@ -134,90 +264,408 @@ class OXOPlayer:
             
     
     def draw_grid(self, grid_center, grid_size, lift_height=0.01, qd_max=1.5):
-        self.api._clear_errors()
+        if self.api:
+            self.api._clear_errors()
+        if self.stroke_planner:
+            # The plans of the previous grid are no longer valid
+            self.stroke_planner.cancel()
         grid_center = self.drawing_board_origin*grid_center
         self.grid_size = grid_size
         self.grid_center = grid_center
-        
-        for i in [-1, 1]:
-            self.move_to(grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * i, -lift_height),  qd_max=qd_max)
-            self.move_to(grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * i, 0), treshold=0.001, qd_max=qd_max)
-            self.move_to(grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * -i, 0), treshold=0.001,qd_max=qd_max)
-            self.move_to(grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * -i, -lift_height), qd_max=qd_max)
-        for i in [-1, 1]: 
-            self.move_to(grid_center * sm.SE3(grid_size/2 * -i, grid_size/6 * i, -lift_height),  qd_max=qd_max)
-            self.move_to(grid_center * sm.SE3(grid_size/2 * -i, grid_size/6 * i, 0), treshold=0.001, qd_max=qd_max)
-            self.move_to(grid_center * sm.SE3(grid_size/2 * i, grid_size/6 * i, 0), treshold=0.001, qd_max=qd_max)
-        if self.q_rest.any():
-            #probably better to implement qrest
-            self.move_to(self.q_rest, qd_max=qd_max)
+        self.search_table = {}
+        self.grid_tracker.reset()
+        self.change_detector.reset()
+        self._grid_strokes = self.grid_strokes(grid_center, grid_size, lift_height, qd_max)
+        plan = self.plan_cache.load(self._grid_strokes) if self.plan_cache else None
+        self.execute_strokes("grid", self._grid_strokes, plan, qd_max)
+        if self.stroke_planner:
+            # Plans every letter from the rest configuration while the human thinks, and the
+            # grid itself for the next start if it is not cached yet
+            keys = [
+                (row, col, letter)
+                for row in range(self.grid_dim)
+                for col in range(self.grid_dim)
+                for letter in ("X", "O")
+            ]
+            if self.plan_cache and plan is None:
+                keys.append("grid")
+            self.stroke_planner.start(keys)
+
+    def grid_strokes(self, grid_center, grid_size, lift_height=0.01, qd_max=1.5):
+        """
+        Returns the strokes of the grid lines.
+
+        Returns:
+            list: One list of (target, `move_to` arguments) per stroke.
+        """
+        # Offsets of the inner lines, drawn in alternating directions from -y (-x for the
+        # horizontal lines) for the first one: a 3x3 grid keeps the strokes, order and
+        # directions of the original `for i in [-1, 1]` loops
+        lines = [(grid_size * (m / self.grid_dim - 0.5), -1 if m % 2 else 1) for m in range(1, self.grid_dim)]
+        if self.motion == "path":
+            return [self.path_stroke(grid_center, [LineSegment((offset, grid_size/2 * i, 0), (offset, grid_size/2 * -i, 0))], lift_height, qd_max)
+                    for offset, i in lines] + \
+                   [self.path_stroke(grid_center, [LineSegment((grid_size/2 * -i, offset, 0), (grid_size/2 * i, offset, 0))], lift_height, qd_max)
+                    for offset, i in lines]
+        strokes = []
+        for offset, i in lines:
+            strokes.append([
+                (grid_center * sm.SE3(offset, grid_size/2 * i, -lift_height), {"qd_max": qd_max}),
+                (grid_center * sm.SE3(offset, grid_size/2 * i, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (grid_center * sm.SE3(offset, grid_size/2 * -i, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (grid_center * sm.SE3(offset, grid_size/2 * -i, -lift_height), {"qd_max": qd_max}),
+            ])
+        for offset, i in lines:
+            strokes.append([
+                (grid_center * sm.SE3(grid_size/2 * -i, offset, -lift_height), {"qd_max": qd_max}),
+                (grid_center * sm.SE3(grid_size/2 * -i, offset, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (grid_center * sm.SE3(grid_size/2 * i, offset, 0), {"treshold": 0.001, "qd_max": qd_max}),
+            ])
+        return strokes
 
     def draw_x(self, center: sm.SE3, length, lift_height=0.01, qd_max=1):
+        self.draw_strokes("X", self.x_strokes(center, length, lift_height, qd_max), qd_max)
+
+    def x_strokes(self, center: sm.SE3, length, lift_height=0.01, qd_max=1):
+        """
+        Returns the two strokes of an X.
+
+        Returns:
+            list: One list of (target, `move_to` arguments) per stroke.
+        """
         half_length = length / 2
-        self.move_to(center * sm.SE3(-half_length, -half_length, -lift_height), qd_max=qd_max)
-        self.move_to(center * sm.SE3(-half_length, -half_length, 0), treshold=0.001, qd_max=qd_max)
-        self.move_to(center * sm.SE3(half_length, half_length, 0), treshold=0.001, qd_max=qd_max)
-        self.move_to(center * sm.SE3(half_length, half_length, -lift_height), qd_max=qd_max)
-        
-        self.move_to(center * sm.SE3(-half_length, half_length, -lift_height), qd_max=qd_max)
-        self.move_to(center * sm.SE3(-half_length, half_length, 0), treshold=0.001, qd_max=qd_max)
-        self.move_to(center * sm.SE3(half_length, -half_length, 0), treshold=0.001, qd_max=qd_max)
-        if self.q_rest.any():
-            #probably better to implement qrest
-            self.move_to(self.q_rest, qd_max=qd_max)
+        if self.motion == "path":
+            return [
+                self.path_stroke(center, [LineSegment((-half_length, -half_length, 0), (half_length, half_length, 0))], lift_height, qd_max),
+                self.path_stroke(center, [LineSegment((-half_length, half_length, 0), (half_length, -half_length, 0))], lift_height, qd_max),
+            ]
+        return [
+            [
+                (center * sm.SE3(-half_length, -half_length, -lift_height), {"qd_max": qd_max}),
+                (center * sm.SE3(-half_length, -half_length, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (center * sm.SE3(half_length, half_length, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (center * sm.SE3(half_length, half_length, -lift_height), {"qd_max": qd_max}),
+            ],
+            [
+                (center * sm.SE3(-half_length, half_length, -lift_height), {"qd_max": qd_max}),
+                (center * sm.SE3(-half_length, half_length, 0), {"treshold": 0.001, "qd_max": qd_max}),
+                (center * sm.SE3(half_length, -half_length, 0), {"treshold": 0.001, "qd_max": qd_max}),
+            ],
+        ]
 
     def draw_o(self, center: sm.SE3, radius, lift_height=0.01, qd_max=1):
-        self.move_to(center * sm.SE3(radius , 0, -lift_height), qd_max= qd_max)
+        self.draw_strokes("O", self.o_strokes(center, radius, lift_height, qd_max), qd_max)
+
+    def o_strokes(self, center: sm.SE3, radius, lift_height=0.01, qd_max=1):
+        """
+        Returns the stroke of an O, a circle path or 50 points of the circle.
+
+        Returns:
+            list: One list of (target, `move_to` arguments) per stroke.
+        """
+        if self.motion == "path":
+            return [self.path_stroke(center, [ArcSegment((0, 0, 0), radius, 0.0, 2 * np.pi)], lift_height, qd_max)]
+        stroke = [(center * sm.SE3(radius , 0, -lift_height), {"qd_max": qd_max})]
         for i in range(50):
             theta = 2 * np.pi * i / 50
             T = center * sm.SE3(radius * np.cos(theta), radius * np.sin(theta), 0) #* sm.SE3.Rz(theta, unit='rad')
-            self.move_to(T, gain=10) 
-        self.move_to(center * sm.SE3(0, radius, -lift_height))
+            stroke.append((T, {"gain": 10}))
+        stroke.append((center * sm.SE3(0, radius, -lift_height), {}))
+        return [stroke]
+
+    def path_stroke(self, frame, segments, lift_height=0.01, qd_max=1):
+        """
+        Returns a stroke drawing segments as one path: lowering the pen, the segments, lifting it.
+
+        Args:
+            frame (sm.SE3): Frame of the segments, e.g. the cell center.
+            segments (list): `LineSegment` and `ArcSegment` on the drawing surface (z = 0).
+
+        Returns:
+            list: (lifted start pose, `move_to` arguments) and (`CartesianPath`, `follow_path` arguments).
+        """
+        start = segments[0].point(0.0)
+        end = segments[-1].point(segments[-1].length)
+        up = np.array([0.0, 0.0, -lift_height])
+        # The correction catches up with the approach error while the pen is lowered
+        path = CartesianPath(frame, [LineSegment(start + up, start, draws=False)] + list(segments) + [LineSegment(end, end + up, draws=False)],
+                             speed=self.draw_speed, acceleration=self.draw_acceleration)
+        return [(frame * sm.SE3(start + up), {"qd_max": qd_max}), (path, {"qd_max": qd_max})]
+
+    def draw_strokes(self, shape, strokes, qd_max=1):
+        """
+        Servos through the targets of each stroke, reporting its progress, then returns to rest.
+
+        Args:
+            shape (str): "grid", "X" or "O".
+            strokes (list): One list of (target, `move_to` arguments) per stroke.
+        """
+        start = self.start_drawing()
+        for stroke, targets in enumerate(strokes, 1):
+            self.report_progress("stroke_started", shape=shape, stroke=stroke, strokes=len(strokes))
+            for dest, kwargs in targets:
+                if isinstance(dest, CartesianPath):
+                    self.follow_path(dest, **kwargs)
+                else:
+                    self.move_to(dest, **kwargs)
+            self.report_progress("stroke_finished", shape=shape, stroke=stroke, strokes=len(strokes))
         if self.q_rest.any():
             #probably better to implement qrest
-            self.move_to(self.q_rest, qd_max=qd_max)
+            # Settles close enough to the start of the plans for the next replay
+            self.move_to(self.q_rest, treshold=REST_TRESHOLD, qd_max=qd_max)
+        self.finish_drawing(shape, start)
+
+    def start_drawing(self):
+        self._path_errors = []
+        return self.ticks
+
+    def finish_drawing(self, shape, start):
+        """
+        Records the duration of a drawing and the deviation of the pen from its reference, in
+        `last_drawing`, and reports them as a "drawing_finished" progress event.
 
-    def play(self, image):
+        Args:
+            shape (str): "grid", "X" or "O".
+            start (int): Tick count returned by `start_drawing`.
+        """
+        ticks = self.ticks - start
+        errors = np.asarray(self._path_errors)
+        self.last_drawing = {
+            "shape": shape,
+            "motion": self.motion,
+            "timing": self.timing if self.motion == "path" else None,
+            "ticks": ticks,
+            # Control time, equal to the duration of the motion in simulation
+            "seconds": ticks * self.dt,
+            "max_deviation": float(errors.max()) if errors.size else None,
+            "rms_deviation": float(np.sqrt(np.mean(errors ** 2))) if errors.size else None,
+        }
+        if errors.size:
+            metrics.PATH_DEVIATION_METERS.observe(self.last_drawing["max_deviation"], shape=shape)
+        self.report_progress("drawing_finished", **self.last_drawing)
+
+    def execute_strokes(self, shape, strokes, plan=None, qd_max=1):
+        """
+        Replays the plan of strokes if the robot is at its start, and servos online otherwise.
+
+        Args:
+            shape (str): "grid", "X" or "O".
+            strokes (list): One list of (target, `move_to` arguments) per stroke.
+            plan (StrokePlan): Planned trajectory of the strokes, if any.
+        """
+        q = self.api.get_joint_positions(is_radian=True) if self.api else self.robot.q
+        if plan is not None and plan.can_start(q, robot=self.robot):
+            metrics.STROKE_PLANS_TOTAL.inc(result="replayed")
+            self.replay_strokes(shape, plan, qd_max)
+        else:
+            metrics.STROKE_PLANS_TOTAL.inc(result="online")
+            self.draw_strokes(shape, strokes, qd_max)
+
+    def replay_strokes(self, shape, plan, qd_max=1, gain=5, correction_max=0.5):
+        """
+        Replays a `StrokePlan` at the control rate, then returns to rest.
+
+        Each tick commands the planned velocity plus a proportional correction towards the
+        planned position, so that the robot converges onto the plan.
+
+        Args:
+            shape (str): "X" or "O".
+            plan (StrokePlan): Planned joint trajectory.
+            gain (float): Gain of the correction.
+            correction_max (float): Largest correction in rad/s.
+        """
+        start = self.start_drawing()
+        previous = plan.start
+        for stroke, trajectory in enumerate(plan.strokes, 1):
+            self.report_progress("stroke_started", shape=shape, stroke=stroke, strokes=len(plan.strokes))
+            for q_planned in trajectory:
+                tick_start = time.perf_counter()
+                if self.api:
+                    self.robot.q = self.api.get_joint_positions(is_radian=True)
+                correction = np.clip(gain * (previous - self.robot.q), -correction_max, correction_max)
+                qd = (q_planned - previous) / self.dt + correction
+                self.robot.qd = qd
+                self._path_errors.append(float(np.linalg.norm(self.robot.fkine(previous).t - self.robot.fkine(self.robot.q).t)))
+                self.step(qd, control_variable="qd")
+                previous = q_planned
+                metrics.CONTROL_TICK_SECONDS.observe(time.perf_counter() - tick_start)
+            self.report_progress("stroke_finished", shape=shape, stroke=stroke, strokes=len(plan.strokes))
+        if self.api:
+            self.api.set_joint_velocities([0.0, 0.0, 0.0, 0.0, 0.0, 0.0], is_radian=True, duration=self.dt)
+        if self.q_rest.any():
+            # Settles close enough to the start of the plans for the next replay
+            self.move_to(self.q_rest, treshold=REST_TRESHOLD, qd_max=qd_max)
+        self.finish_drawing(shape, start)
+
+    def plan_strokes(self, strokes, should_stop=None, max_ticks=2000):
+        """
+        Runs the servo loop of `move_to` offline on a copy of the robot, from `q_rest`.
+
+        Args:
+            strokes (list): One list of (target, `move_to` arguments) per stroke.
+            should_stop (callable): Checked at every tick, planning is abandoned when it returns True.
+            max_ticks (int): Ticks after which a target is considered unreachable.
+
+        Returns:
+            StrokePlan: The joint positions of every tick, or None if abandoned.
+        """
+        if self._planning_robot is None:
+            # Only used by the planner thread
+            self._planning_robot = copy.deepcopy(self.robot)
+            self._planning_solver = make_rate_solver(self.ik_solver, n=self.robot.n, qd_max=self.qd_max)
+        robot = self._planning_robot
+        robot.q = np.array(self.q_rest, dtype=float)
+        trajectories = []
+        for targets in strokes:
+            trajectory = []
+            for dest, kwargs in targets:
+                if isinstance(dest, CartesianPath):
+                    # Same ticks as `follow_path`, settling on the end pose afterwards
+                    qd_max = kwargs.get("qd_max", 1)
+                    dest, tracking_qd = self.timed_path(robot, dest, qd_max)
+                    kwargs = dict(kwargs, qd_max=tracking_qd)
+                    for tick in range(int(np.ceil(dest.duration / self.dt)) + 1):
+                        if should_stop and should_stop():
+                            return None
+                        qd, _ = self.path_step(robot, dest, tick * self.dt, self._planning_solver, **kwargs)
+                        robot.q = robot.q + np.asarray(qd) * self.dt
+                        trajectory.append(robot.q.copy())
+                    dest, kwargs = dest.end_pose, {"treshold": 0.001, "qd_max": qd_max}
+                arrived = False
+                ticks = 0
+                while not arrived:
+                    if (should_stop and should_stop()) or ticks >= max_ticks:
+                        return None
+                    qd, arrived = self.servo_step(robot, dest, self._planning_solver, **kwargs)
+                    robot.q = robot.q + np.asarray(qd) * self.dt
+                    trajectory.append(robot.q.copy())
+                    ticks += 1
+            trajectories.append(np.array(trajectory))
+        return StrokePlan(self.q_rest, trajectories)
+
+    def move_strokes(self, move, player_letter):
+        """
+        Returns the strokes of a letter in a cell of the grid, as drawn by `draw_move`.
+        """
+        cell_center, size = self.get_cell_center(move)
+        if player_letter == 'X':
+            return self.x_strokes(cell_center, size / 2)
+        return self.o_strokes(cell_center, size / 4)
+
+    def _plan(self, key, should_stop):
+        if key == "grid":
+            strokes, name = self._grid_strokes, "grid"
+        else:
+            row, col, letter = key
+            strokes, name = self.move_strokes((row, col), letter), f"{letter} in ({row}, {col})"
+        if self.plan_cache:
+            plan = self.plan_cache.load(strokes)
+            if plan is not None:
+                return plan
+        plan = self.plan_strokes(strokes, should_stop)
+        if plan is not None and self.plan_cache:
+            self.plan_cache.save(strokes, plan, name=name)
+        return plan
+
+    def report_progress(self, event, **info):
+        if event == "stroke_started":
+            self._stroke_start = time.perf_counter()
+        elif event == "stroke_finished" and self._stroke_start is not None:
+            metrics.STROKE_SECONDS.observe(time.perf_counter() - self._stroke_start, shape=info.get("shape"))
+            self._stroke_start = None
+        if self.on_progress:
+            self.on_progress(event, **info)
+
+    def draw_move(self, move, player_letter):
+        """
+        Draws a letter in a cell of the grid, replaying its plan if the planner has finished it or it is cached.
+
+        Args:
+            move (tuple): (row, col) of the cell.
+            player_letter (str): 'X' or 'O'.
+        """
+        strokes = self.move_strokes(move, player_letter)
+        with self.stroke_planner.paused() if self.stroke_planner else contextlib.nullcontext():
+            plan = self.stroke_planner.get((move[0], move[1], player_letter)) if self.stroke_planner else None
+            if plan is None and self.plan_cache:
+                # Not reached by the planner yet, but cached by a previous run
+                plan = self.plan_cache.load(strokes)
+            self.execute_strokes(player_letter, strokes, plan)
+
+    def detect(self, image):
+        """
+        Detects the grid and the letters of an image, within the region of the grid tracker.
+
+        Returns:
+            dict: Detections of `vision.image_to_detections`.
+        """
+        return image_to_detections(image, tracker=self.grid_tracker)
+
+    def play(self, image, grid_state=None, draw=True, return_move=False):
         """
         Play a move in the Tic-Tac-Toe game.
 
         Args:
             image (np.ndarray): Image data.
+            grid_state (list): Grid state already detected in the image (e.g. cached), skips the detection.
+            draw (bool): Draws the move before returning. If False, the move is only decided and
+                kept in `last_move`, for `draw_move` to draw it later.
+            return_move (bool): Also returns the decided move, which unlike `last_move` is not
+                overwritten by the next call.
 
         Returns:
-            dict: Response containing the grid state, move, game status, and winner.
+            dict: Response containing the grid state, move, game status, and winner. With
+            `return_move`, a (response, (move, letter) or None) tuple.
         """
-        # Get the current state of the grid
-        grid_state = image_to_tictactoe_grid(image)
+        unchanged = {"error": "Please play first, the board has not changed"}
+        if grid_state is None:
+            # Reject frames identical to the previous one before running the detection
+            if self.previous_grid_state is not None and not self.change_detector.has_changed(image):
+                metrics.UNCHANGED_BOARD_TOTAL.inc(stage="frame")
+                return (unchanged, None) if return_move else unchanged
+
+            # Get the current state of the grid
+            with metrics.VISION_INFERENCE_SECONDS.time():
+                self.last_detections = self.detect(image)
+                grid_state = bb_to_tictactoe_grid(self.last_detections, self.grid_dim)
+            if isinstance(image, np.ndarray):
+                self.change_detector.update(image, self.grid_tracker.roi(image.shape))
         # Check if the board has changed
         if self.previous_grid_state is not None and np.array_equal(grid_state, self.previous_grid_state):
-            return {"error": "Please play first, the board has not changed"}
+            metrics.UNCHANGED_BOARD_TOTAL.inc(stage="grid")
+            return (unchanged, None) if return_move else unchanged
 
         # Find the best move
-        best_move, player_letter, win, is_grid_complete = find_best_move(grid_state)
+        if self.grid_dim == 3:
+            with metrics.ENGINE_SEARCH_SECONDS.time(engine="table"):
+                best_move, player_letter, win, is_grid_complete = find_best_move(grid_state)
+        else:
+            with metrics.ENGINE_SEARCH_SECONDS.time(engine="nxn"):
+                best_move, player_letter, win, is_grid_complete = nxn_engine.find_best_move(
+                    grid_state, k=self.k, time_budget=self.time_budget, table=self.search_table)
 
         
-        if best_move:
-            cell_center, size = self.get_cell_center(best_move)
-            if player_letter == 'X':
-                self.draw_x(cell_center, size / 2)
-            else:
-                self.draw_o(cell_center, size / 4)
+        if best_move and draw:
+            self.draw_move(best_move, player_letter)
 
   
 
         # Update the previous grid state
         self.previous_grid_state = grid_state
+        move = (best_move, player_letter) if best_move else None
+        self.last_move = move
         if win:
-            return {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": True, "winner": player_letter}
+            response = {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": True, "winner": player_letter}
         elif is_grid_complete:
-            return {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": True, "winner": None}
+            response = {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": True, "winner": None}
         else:
-            return {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": False, "winner": None}
+            response = {"grid_state": grid_state, "move": f"letter: {player_letter} in {best_move}", "game_is_finished": False, "winner": None}
+        return (response, move) if return_move else response
        
 
-    def get_cell_center(self, cell_index):
-        cell_size = self.grid_size / 3
+    def get_cell_center(self, cell_index, grid_dim=None):
+        grid_dim = grid_dim or self.grid_dim
+        cell_size = self.grid_size / grid_dim
         # Calculate the offset from the top-left corner of the grid to the center
         half_grid_size = self.grid_size / 2
         row, col = cell_index
@@ -231,6 +679,8 @@ class OXOPlayer:
 
     def cleanup(self):
         print("yo")
+        if self.stroke_planner:
+            self.stroke_planner.cancel()
         self.api._emergency_stop()
 
 
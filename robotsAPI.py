@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import time
+import metrics
 class RoboticArmAPI(ABC):
     @abstractmethod
     def __init__(self):
@@ -186,6 +187,8 @@ class Lite6API(RoboticArmAPI):
         
     # Register error/warn changed callback
     def _error_warn_changed_callback(self, data):
+        if data:
+            metrics.ROBOT_ERROR_WARN_CHANGES_TOTAL.inc(error_code=data.get('error_code'), warn_code=data.get('warn_code'))
         if data and data['error_code'] != 0:
             self.alive = False
             print('err={}, quit'.format(data['error_code']))
@@ -193,6 +196,8 @@ class Lite6API(RoboticArmAPI):
 
     # Register state changed callback
     def _state_changed_callback(self, data):
+        if data:
+            metrics.ROBOT_STATE_TRANSITIONS_TOTAL.inc(state=data.get('state'))
         if data and data['state'] == 4:
             self.alive = False
             print(self._api.get_state())
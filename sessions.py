@@ -0,0 +1,58 @@
+"""
+Several robots served by one backend.
+
+Each robot has its own `OXOPlayer`, drawing board calibration, game state and job queue, and
+requests select it by id. The detection model is shared by all of them.
+"""
+import json
+import threading
+
+DEFAULT_ROBOT = "default"
+
+
+class Session:
+    """
+    A robot and the game it plays.
+
+    Args:
+        robot_id (str): Id selecting the robot in requests.
+        player (OXOPlayer): Player of the robot.
+        jobs (JobManager): Background motions of the robot.
+    """
+
+    def __init__(self, robot_id, player, jobs):
+        self.robot_id = robot_id
+        self.player = player
+        self.jobs = jobs
+        self.streamer = None
+        # Held from the busy check to the submission of the drawing, so that one move at a
+        # time is decided and queued
+        self.lock = threading.Lock()
+
+
+def load_robots(path):
+    """
+    Reads the robots served by the backend from a JSON file.
+
+    The file holds a list of robots, e.g.
+    `[{"id": "left", "modes": ["REAL"], "robot_ip": "192.168.1.159",
+    "calibration": {"origin": [...], "x_point": [...], "y_point": [...]}}, ...]`.
+    `modes` defaults to SIMULATION; `robot_ip`, `calibration` and `grid_dim` are optional.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        list: One dict per robot.
+    """
+    with open(path) as f:
+        robots = json.load(f)
+    ids = [robot.get("id") for robot in robots]
+    if not robots or None in ids or len(set(ids)) != len(ids):
+        raise ValueError(f"{path} must list robots with distinct ids.")
+    for robot in robots:
+        robot.setdefault("modes", ["SIMULATION"])
+        calibration = robot.get("calibration")
+        if calibration is not None and not {"origin", "x_point", "y_point"} <= set(calibration):
+            raise ValueError(f"Calibration of robot {robot['id']} needs origin, x_point and y_point.")
+    return robots
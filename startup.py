@@ -0,0 +1,104 @@
+"""
+Startup time report.
+
+The heavy modules (roboticstoolbox, spatialgeometry, swift, pydrake, ultralytics) are imported
+when the selected modes first need them instead of at the top of `main.py`. `STARTUP` records
+how long each of these imports and each initialization step took; the report is printed once
+the backend is ready and returned by `/status`.
+"""
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+IMPORT, INIT, BACKGROUND = "import", "init", "background"
+
+
+class StartupReport:
+    """
+    Durations of the import and initialization steps of the backend.
+
+    The clock starts when the report is created, i.e. when `main.py` imports this module.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ready_seconds = None
+        self.steps = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, kind, name):
+        """
+        Records the duration of the block.
+
+        Args:
+            kind (str): IMPORT, INIT, or BACKGROUND for steps running after the backend is ready.
+            name (str): Name of the step.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start)
+
+    def record(self, kind, name, seconds):
+        """
+        Records a step timed elsewhere, e.g. in a background thread.
+        """
+        with self._lock:
+            self.steps.append({"kind": kind, "name": name, "seconds": seconds})
+
+    def import_module(self, name):
+        """
+        Imports a module, recording the import time if it was not loaded yet.
+
+        Args:
+            name (str): Module name, e.g. "swift".
+
+        Returns:
+            module: The module.
+        """
+        if name in sys.modules:
+            return sys.modules[name]
+        with self.step(IMPORT, name):
+            return importlib.import_module(name)
+
+    def mark_ready(self):
+        """
+        Records the time at which the backend is ready to serve requests.
+
+        Returns:
+            float: Seconds since the report was created.
+        """
+        self.ready_seconds = time.perf_counter() - self.start
+        return self.ready_seconds
+
+    def to_dict(self):
+        with self._lock:
+            steps = list(self.steps)
+        totals = {kind: sum(step["seconds"] for step in steps if step["kind"] == kind) for kind in (IMPORT, INIT, BACKGROUND)}
+        return {
+            "ready_seconds": self.ready_seconds,
+            "import_seconds": totals[IMPORT],
+            "init_seconds": totals[INIT],
+            "other_seconds": None if self.ready_seconds is None else self.ready_seconds - totals[IMPORT] - totals[INIT],
+            "background_seconds": totals[BACKGROUND],
+            "steps": steps,
+        }
+
+    def format(self):
+        """
+        Returns the report as printable lines, after `mark_ready`.
+        """
+        report = self.to_dict()
+        lines = [f"Startup: ready in {report['ready_seconds']:.2f} s "
+                 f"(imports {report['import_seconds']:.2f} s, init {report['init_seconds']:.2f} s, "
+                 f"other {report['other_seconds']:.2f} s)"]
+        for step in report["steps"]:
+            lines.append(f"  {step['kind']:>10} {step['name']:<28} {step['seconds']:7.3f} s")
+        return "\n".join(lines)
+
+
+STARTUP = StartupReport()
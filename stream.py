@@ -0,0 +1,310 @@
+"""
+Streaming mode: plays from a video device or file instead of snapshots posted to `/play`.
+
+Frames are read by a generator on a reader thread that only keeps the latest one. A worker
+thread takes that frame at a bounded rate, skips the detector when the frame has not changed,
+and votes the detected grid states over the last frames. Only a stable board with a new mark
+on it triggers the engine and the robot move. Detection runs through the player, i.e. in the
+vision pool in the split process model, and with a `JobManager` the move is drawn as a job of
+the robot, so that `/play` and the stream never command the robot at the same time.
+"""
+import threading
+import time
+from collections import Counter, deque
+
+import cv2
+
+from vision import bb_to_tictactoe_grid, FrameChangeDetector
+
+
+def read_frames(source, realtime=None):
+    """
+    Yields the frames of a video device or file.
+
+    Args:
+        source (int | str): Device index (or its string, e.g. "0") or path/URL of a video.
+        realtime (bool): Paces the frames at the frame rate of the source. Defaults to True for
+            files, devices already deliver frames in real time.
+
+    Yields:
+        np.ndarray: RGB frame, as the images decoded by `/play`.
+    """
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    if realtime is None:
+        realtime = not isinstance(source, int)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source {source!r}.")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    next_time = time.monotonic()
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            if realtime:
+                next_time += 1 / fps
+                time.sleep(max(next_time - time.monotonic(), 0))
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+
+class GridVoter:
+    """
+    Smooths grid states over the last frames by a per-cell majority vote.
+
+    A hand over the board or a missed detection only affects a few frames; the board is
+    reported once every cell holds the same value in at least `min_votes` of the last
+    `window` grid states.
+
+    Args:
+        window (int): Number of grid states voted on.
+        min_votes (int): Votes a cell value needs for the board to be stable.
+    """
+
+    def __init__(self, window=5, min_votes=4):
+        if not 1 <= min_votes <= window:
+            raise ValueError(f"min_votes must be between 1 and window, got {min_votes} for window={window}.")
+        self.window = window
+        self.min_votes = min_votes
+        self.history = deque(maxlen=window)
+
+    def update(self, grid_state):
+        """
+        Adds the grid state of a frame.
+
+        Args:
+            grid_state (list): Grid detected on the frame.
+
+        Returns:
+            list: Stable grid state, or None while the vote is not settled.
+        """
+        self.history.append(tuple(tuple(row) for row in grid_state))
+        if len(self.history) < self.min_votes or any(len(g) != len(grid_state) for g in self.history):
+            return None
+        stable = []
+        for i, row in enumerate(grid_state):
+            stable_row = []
+            for j in range(len(row)):
+                value, votes = Counter(g[i][j] for g in self.history).most_common(1)[0]
+                if votes < self.min_votes:
+                    return None
+                stable_row.append(value)
+            stable.append(stable_row)
+        return stable
+
+    def reset(self):
+        self.history.clear()
+
+
+def count_marks(grid_state):
+    return sum(cell != ' ' for row in grid_state for cell in row)
+
+
+class StreamPlayer:
+    """
+    Plays the game from a stream of frames.
+
+    The first stable board is taken as the reference without moving, unless `robot_starts`
+    is set and it is empty. Afterwards a stable board holding more marks than the reference
+    is the human's move: it is sent to `OXOPlayer.play` and the reference becomes that board
+    plus the robot's mark, so the robot's own drawing is not mistaken for a move.
+
+    Args:
+        oxoplayer (OXOPlayer): Player drawing the moves.
+        max_rate (float): Maximum number of frames inferred per second.
+        window (int): Number of grid states voted on, see `GridVoter`.
+        min_votes (int): Votes a cell value needs for the board to be stable.
+        change_threshold (float): Threshold of the `FrameChangeDetector` skipping unchanged frames.
+        robot_starts (bool): Plays on the first stable board if it is empty.
+        jobs (JobManager): Jobs of the robot, shared with `/play`: moves are drawn as jobs and
+            frames are ignored while one runs. None draws the moves on the worker thread.
+        lock (threading.Lock): Lock of the session held by `/play` while it decides a move.
+    """
+
+    def __init__(self, oxoplayer, max_rate=2.0, window=5, min_votes=4, change_threshold=0.002, robot_starts=False, jobs=None, lock=None):
+        self.oxoplayer = oxoplayer
+        self.jobs = jobs
+        self.lock = lock
+        self.max_rate = max_rate
+        self.voter = GridVoter(window, min_votes)
+        self.change_detector = FrameChangeDetector(threshold=change_threshold)
+        self.robot_starts = robot_starts
+        self.reference = None
+        self.last_grid_state = None
+        self.last_response = None
+        self.frames_read = 0
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.moves = 0
+        self._frame = None
+        self._frame_id = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def reset(self):
+        """
+        Forgets the reference board, e.g. after a new grid has been drawn.
+        """
+        self.reference = None
+        self._reset_votes()
+
+    def start(self, frames):
+        """
+        Starts the reader and worker threads.
+
+        Args:
+            frames (iterable): Frames to play from, e.g. `read_frames(source)`.
+        """
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._read, args=(frames,), name="stream-reader", daemon=True),
+            threading.Thread(target=self._work, name="stream-worker", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _read(self, frames):
+        try:
+            for frame in frames:
+                if self._stop.is_set():
+                    break
+                with self._condition:
+                    # Only the latest frame is kept, the worker never falls behind the source
+                    self._frame = frame
+                    self._frame_id += 1
+                    self.frames_read += 1
+                    self._condition.notify()
+        finally:
+            self._stop.set()
+            with self._condition:
+                self._condition.notify_all()
+
+    def _work(self):
+        seen_id = 0
+        while True:
+            started = time.monotonic()
+            with self._condition:
+                while self._frame_id == seen_id and not self._stop.is_set():
+                    self._condition.wait()
+                if self._frame_id == seen_id:
+                    return
+                frame, seen_id = self._frame, self._frame_id
+            try:
+                self.process(frame)
+            except Exception as e:
+                print(f"Stream: frame skipped, {e}")
+            time.sleep(max(1 / self.max_rate - (time.monotonic() - started), 0))
+
+    def process(self, frame):
+        """
+        Detects the grid of a frame, unless it is unchanged, and votes it.
+
+        Args:
+            frame (np.ndarray): RGB frame.
+
+        Returns:
+            dict: Response of `OXOPlayer.play` if the frame triggered a move, None otherwise.
+        """
+        if self.jobs is not None and self.jobs.busy():
+            # The arm hides the board while it draws, the board is voted again afterwards
+            self._reset_votes()
+            return None
+        if self.last_grid_state is not None and not self.change_detector.has_changed(frame):
+            # Same frame as the last inferred one: its grid votes again without running the detector
+            self.frames_skipped += 1
+            return self.observe(self.last_grid_state)
+
+        self.frames_inferred += 1
+        tracker = self.oxoplayer.grid_tracker
+        detections = self.oxoplayer.detect(frame)
+        if not len(detections["grid"]):
+            self.last_grid_state = None
+            self.change_detector.reset()
+            return None
+        self.last_grid_state = bb_to_tictactoe_grid(detections, self.oxoplayer.grid_dim)
+        self.change_detector.update(frame, tracker.roi(frame.shape))
+        return self.observe(self.last_grid_state)
+
+    def observe(self, grid_state):
+        """
+        Votes a detected grid state and plays when the stable board has a new mark.
+
+        Args:
+            grid_state (list): Grid detected on a frame.
+
+        Returns:
+            dict: Response of `OXOPlayer.play` if a move was played, None otherwise.
+        """
+        stable = self.voter.update(grid_state)
+        if stable is None or self.oxoplayer.grid_size is None:
+            return None
+        if self.reference is None and not (self.robot_starts and count_marks(stable) == 0):
+            self.reference = stable
+            return None
+        if self.reference is not None:
+            marks, reference_marks = count_marks(stable), count_marks(self.reference)
+            if marks == 0 and reference_marks:
+                # The board was wiped: a new game, taken as the reference
+                self.reference = stable
+            if marks <= reference_marks:
+                return None
+
+        if self.lock is not None and not self.lock.acquire(blocking=False):
+            # A /play request is deciding a move, the next stable frame tries again
+            return None
+        try:
+            if self.jobs is not None and self.jobs.busy():
+                return None
+            response, move = self._play(stable)
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+        self.last_response = response
+        if "error" in response:
+            return response
+        self.moves += 1
+        self.reference = [row[:] for row in stable]
+        if move is not None:
+            (row, col), letter = move
+            self.reference[row][col] = letter
+        # Frames voted before the move show the old board
+        self._reset_votes()
+        return response
+
+    def _play(self, grid_state):
+        if self.jobs is None:
+            return self.oxoplayer.play(None, grid_state=grid_state, return_move=True)
+        response, move = self.oxoplayer.play(None, grid_state=grid_state, draw=False, return_move=True)
+        if move is not None:
+            self.jobs.submit("play", lambda job: self.oxoplayer.draw_move(*move), result=response)
+        return response, move
+
+    def _reset_votes(self):
+        self.last_grid_state = None
+        self.voter.reset()
+        self.change_detector.reset()
+
+    def stats(self):
+        return {
+            "running": self.is_running(),
+            "frames_read": self.frames_read,
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": self.frames_skipped,
+            "moves": self.moves,
+            "reference": self.reference,
+            "last_response": self.last_response,
+        }
@@ -0,0 +1,175 @@
+"""
+Joint trajectories of the letters, planned in the background once the grid is drawn.
+
+After `OXOPlayer.draw_grid`, the strokes of an X or an O in every cell are fully determined.
+`StrokePlanner` runs the `move_to` servo loop offline for each of them on a copy of the robot,
+one control tick at a time, while the human thinks. `OXOPlayer.draw_move` then replays the
+recorded joint positions at the control rate, or falls back to online servoing if the plan of
+the cell is not ready.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StrokePlan:
+    """
+    Joint trajectory of a letter drawn from a known configuration.
+
+    Args:
+        start (np.ndarray): Joint configuration the plan starts from.
+        strokes (list): One (ticks × n) array per stroke, with the joint positions after each control tick.
+    """
+
+    def __init__(self, start, strokes):
+        self.start = np.asarray(start, dtype=float)
+        self.strokes = [np.asarray(stroke, dtype=float) for stroke in strokes]
+
+    @property
+    def ticks(self):
+        return sum(len(stroke) for stroke in self.strokes)
+
+    def can_start(self, q, tolerance=0.05, robot=None, position_tolerance=0.01):
+        """
+        Returns True if the robot at `q` is close enough to the start of the plan for the
+        replay to converge onto it before the pen nears the board.
+
+        Args:
+            q (np.ndarray): Current joint configuration.
+            tolerance (float): Largest joint error in radians, about the arrival threshold of
+                the returns to rest.
+            robot (rtb.Robot): Robot model, to also compare the pen position with the start of
+                the plan.
+            position_tolerance (float): Largest pen position error in meters. The default is
+                the lift height of the strokes, so the correction of the replay absorbs the
+                offset while the pen is still above the board.
+        """
+        q = np.asarray(q, dtype=float)
+        if np.max(np.abs(q - self.start)) > tolerance:
+            return False
+        if robot is None:
+            return True
+        return bool(np.linalg.norm(robot.fkine(q).t - robot.fkine(self.start).t) <= position_tolerance)
+
+
+class StrokePlanner:
+    """
+    Plans letters one after the other on a background thread.
+
+    Args:
+        plan_fn (callable): Called on the planner thread as plan_fn(key, should_stop) and
+            returns a `StrokePlan`, or None if planning failed or `should_stop()` returned True.
+    """
+
+    def __init__(self, plan_fn):
+        self.plan_fn = plan_fn
+        self._plans = {}
+        self._pending = []
+        self._failed = set()
+        self._planning_seconds = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cancel = threading.Event()
+        # Cleared while the robot moves, so that planning does not delay control ticks
+        self._resume = threading.Event()
+        self._resume.set()
+
+    def start(self, keys):
+        """
+        Drops the previous plans and starts planning `keys`.
+
+        Args:
+            keys (list): Keys of the letters, e.g. (row, col, letter), in planning order.
+        """
+        self.cancel()
+        with self._lock:
+            self._pending = list(keys)
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, name="stroke-planner", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Stops planning and drops every plan.
+        """
+        self._cancel.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._plans.clear()
+            self._pending = []
+            self._failed.clear()
+            self._planning_seconds = 0.0
+
+    def get(self, key):
+        """
+        Returns the plan of a letter, or None if it is not planned yet.
+        """
+        with self._lock:
+            return self._plans.get(key)
+
+    def wait(self, timeout=None):
+        """
+        Waits for the planning to finish.
+
+        Returns:
+            bool: True if every key was processed.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            return not self._pending
+
+    @contextmanager
+    def paused(self):
+        """
+        Suspends planning between two ticks for the duration of the block.
+        """
+        self._resume.clear()
+        try:
+            yield
+        finally:
+            self._resume.set()
+
+    def should_stop(self):
+        """
+        Called by `plan_fn` at every tick: blocks while paused and returns True once cancelled.
+        """
+        while not self._resume.wait(0.1):
+            if self._cancel.is_set():
+                return True
+        return self._cancel.is_set()
+
+    def _run(self):
+        while not self._cancel.is_set():
+            with self._lock:
+                if not self._pending:
+                    return
+                key = self._pending[0]
+            start = time.perf_counter()
+            try:
+                plan = self.plan_fn(key, self.should_stop)
+            except Exception as e:
+                print(f"Planning {key} failed: {e}")
+                plan = None
+            if self._cancel.is_set():
+                return
+            with self._lock:
+                self._pending.pop(0)
+                self._planning_seconds += time.perf_counter() - start
+                if plan is None:
+                    self._failed.add(key)
+                else:
+                    self._plans[key] = plan
+
+    def stats(self):
+        with self._lock:
+            return {
+                "planned": len(self._plans),
+                "pending": len(self._pending),
+                "failed": len(self._failed),
+                "planning_seconds": self._planning_seconds,
+            }
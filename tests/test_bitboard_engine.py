@@ -0,0 +1,60 @@
+import unittest
+import copy
+import bitboard_engine
+import tictactoe_engine
+
+
+def reference_move_values(board, player_letter):
+    """Move values computed by the list-based minimax, as the original find_best_move did."""
+    values = []
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] != ' ':
+                values.append(None)
+                continue
+            board[i][j] = player_letter
+            values.append(tictactoe_engine.minimax(board, 0, player_letter == 'O', float('-inf'), float('inf'), player_letter))
+            board[i][j] = ' '
+    return values
+
+
+class TestBitboardEngine(unittest.TestCase):
+
+    def test_board_conversion_round_trip(self):
+        board = [['X', ' ', 'O'],
+                 [' ', 'X', ' '],
+                 ['O', ' ', ' ']]
+        x_bits, o_bits = bitboard_engine.board_to_bits(board)
+        self.assertEqual(x_bits, 0b000010001)
+        self.assertEqual(o_bits, 0b001000100)
+        self.assertEqual(bitboard_engine.bits_to_board(x_bits, o_bits), board)
+
+    def test_check_win(self):
+        board = [['O', 'X', ' '],
+                 ['X', 'O', ' '],
+                 ['X', ' ', 'O']]
+        self.assertEqual(bitboard_engine.check_win(*bitboard_engine.board_to_bits(board)), tictactoe_engine.check_win(board))
+
+    def test_identical_to_list_engine_on_reachable_positions(self):
+        for cells in tictactoe_engine.reachable_positions():
+            board = [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+            expected = tictactoe_engine.find_best_move(copy.deepcopy(board))
+            self.assertEqual(bitboard_engine.find_best_move(board), expected, cells)
+
+            move, player_letter, win, is_grid_complete = expected
+            if move is None:
+                continue
+            x_bits, o_bits = bitboard_engine.board_to_bits(board)
+            values = []
+            for k, bit in enumerate(bitboard_engine.CELL_BITS):
+                if (x_bits | o_bits) & bit:
+                    values.append(None)
+                elif player_letter == 'X':
+                    values.append(bitboard_engine.minimax(x_bits | bit, o_bits, 0, False, float('-inf'), float('inf'), 'X'))
+                else:
+                    values.append(bitboard_engine.minimax(x_bits, o_bits | bit, 0, True, float('-inf'), float('inf'), 'O'))
+            self.assertEqual(values, reference_move_values(board, player_letter), cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+# Add the parent and benchmarks directories to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from tictactoe_engine import find_best_move, reachable_positions
+from engine_reference import has_line, losing_moves
+
+
+class TestEngineExhaustive(unittest.TestCase):
+
+    def test_no_move_loses_against_perfect_play(self):
+        self.assertEqual(losing_moves(), [])
+
+    def test_results_on_every_reachable_position(self):
+        for cells in reachable_positions():
+            board = [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+            move, player, win, is_grid_complete = find_best_move(board)
+            winner = 'X' if has_line(cells, 'X') else 'O' if has_line(cells, 'O') else None
+            if winner or ' ' not in cells:
+                self.assertIsNone(move, cells)
+                self.assertEqual(win, winner is not None, cells)
+                continue
+
+            expected_player = 'X' if cells.count('X') < cells.count('O') else 'O'
+            self.assertEqual(player, expected_player, cells)
+            k = 3 * move[0] + move[1]
+            self.assertEqual(cells[k], ' ', cells)
+            child = cells[:k] + (player,) + cells[k + 1:]
+            self.assertEqual(win, has_line(child, player), cells)
+            self.assertEqual(is_grid_complete, ' ' not in child, cells)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -199,3 +199,31 @@ class TestPlayEndpoint(unittest.TestCase):
 
 
 
+
+    def test_play_binary_upload(self):
+        payload = {
+        "center": [0.353, 0.149],
+        "size": [0.12, 0.12]
+        }
+        response = self.app.post('/draw_grid', data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        # Raw PNG bytes, decoded with cv2.imdecode
+        with open('tests/images/first_move_player_start.png', 'rb') as image_file:
+            first_move = image_file.read()
+        response = self.app.post('/play', data=first_move, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+        response_data = json.loads(response.data)
+        self.assertEqual([[' ', ' ', ' '], [' ', 'O', ' '], [' ', ' ', ' ']], response_data["grid_state"])
+        self.assertEqual('letter: X in (0, 0)', response_data["move"])
+
+        # Multipart upload
+        with open('tests/images/second_move_player_start.png', 'rb') as image_file:
+            data = {"image": (BytesIO(image_file.read()), "second_move.png")}
+        response = self.app.post('/play', data=data, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        response_data = json.loads(response.data)
+        self.assertEqual([['X', 'O', ' '], [' ', 'O', ' '], [' ', ' ', ' ']], response_data["grid_state"])
+
+        response = self.app.post('/play', data=b"not an image", content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,65 @@
+import json
+import unittest
+import sys
+import os
+import threading
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jobs import JobManager, RobotBusyError, sse_stream, DONE, ERROR
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = JobManager()
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def test_job_reports_progress(self):
+        def draw(job):
+            job.emit("stroke_started", shape="X", stroke=1, strokes=1)
+            job.emit("stroke_finished", shape="X", stroke=1, strokes=1)
+
+        job = self.jobs.submit("play", draw, result={"move": "letter: X in (0, 0)"})
+        events = [event["event"] for event in sse_events(job)]
+        self.assertEqual(events, ["queued", "started", "stroke_started", "stroke_finished", "done"])
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(self.jobs.get(job.id).to_dict()["result"], {"move": "letter: X in (0, 0)"})
+        self.assertFalse(self.jobs.busy())
+
+    def test_error(self):
+        def fail(job):
+            raise RuntimeError("joint limit")
+
+        job = self.jobs.submit("draw_grid", fail)
+        events = list(sse_events(job))
+        self.assertEqual(events[-1]["event"], "error")
+        self.assertEqual(job.status, ERROR)
+        self.assertEqual(job.error, "joint limit")
+
+    def test_busy(self):
+        release = threading.Event()
+        job = self.jobs.submit("play", lambda job: release.wait(5))
+        self.assertTrue(self.jobs.busy())
+        with self.assertRaises(RobotBusyError):
+            self.jobs.submit("play", lambda job: None)
+        release.set()
+        list(sse_events(job))
+        self.jobs.submit("play", lambda job: None)
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.jobs.get("missing"))
+
+
+def sse_events(job):
+    """Parses the data lines of the server-sent event stream of a job."""
+    for block in sse_stream(job, keepalive=1.0):
+        for line in block.splitlines():
+            if line.startswith("data: "):
+                yield json.loads(line[len("data: "):])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import metrics
+from metrics import Counter, Histogram
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counter(self):
+        counter = Counter("test_requests_total", "Requests.", ("endpoint", "status"))
+        counter.inc(endpoint="play", status=400)
+        counter.inc(2, endpoint="play", status=400)
+        counter.inc(endpoint="draw_grid", status=500)
+        self.assertEqual(counter.value(endpoint="play", status=400), 3)
+        self.assertEqual(counter.value(endpoint="play", status=500), 0)
+        lines = counter.render()
+        self.assertIn("# TYPE test_requests_total counter", lines)
+        self.assertIn('test_requests_total{endpoint="play",status="400"} 3', lines)
+
+    def test_labels_must_match(self):
+        counter = Counter("test_labels_total", "Labels.", ("stage",))
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.inc(stage="frame", other="x")
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("test_seconds", "Durations.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("test_seconds_sum 2.65", lines)
+        self.assertIn("test_seconds_count 4", lines)
+
+    def test_histogram_time(self):
+        histogram = Histogram("test_block_seconds", "Blocks.", ("engine",))
+        with histogram.time(engine="table"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with histogram.time(engine="table"):
+                raise RuntimeError()
+        self.assertEqual(histogram.count(engine="table"), 2)
+        self.assertEqual(histogram.count(engine="nxn"), 0)
+
+    def test_render(self):
+        metrics.UNCHANGED_BOARD_TOTAL.inc(stage="grid")
+        text = metrics.render()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn("# TYPE oxo_vision_inference_seconds histogram", text)
+        self.assertIn('oxo_unchanged_board_rejections_total{stage="grid"}', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
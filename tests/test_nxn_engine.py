@@ -0,0 +1,69 @@
+import unittest
+import time
+from nxn_engine import find_best_move, check_win, Geometry, Search, WIN_SCORE
+
+
+class TestNxNEngine(unittest.TestCase):
+
+    def test_3x3_block_win(self):
+        board = [['X', 'X', ' '],
+                 ['O', ' ', ' '],
+                 [' ', ' ', ' ']]
+        move, player, win, is_grid_complete = find_best_move(board)
+        self.assertEqual(player, 'O')
+        self.assertEqual(move, (0, 2))
+        self.assertFalse(win)
+        self.assertFalse(is_grid_complete)
+
+    def test_4x4_win(self):
+        board = [['O', 'O', 'O', ' '],
+                 ['X', 'X', ' ', ' '],
+                 ['X', ' ', ' ', ' '],
+                 [' ', ' ', ' ', ' ']]
+        move, player, win, is_grid_complete = find_best_move(board)
+        self.assertEqual(player, 'O')
+        self.assertEqual(move, (0, 3))
+        self.assertTrue(win)
+
+    def test_5x5_block_four_in_a_row(self):
+        board = [[' ', ' ', ' ', ' ', ' '],
+                 [' ', 'X', ' ', ' ', ' '],
+                 [' ', ' ', 'X', 'O', ' '],
+                 [' ', ' ', ' ', 'X', 'O'],
+                 [' ', ' ', ' ', ' ', ' ']]
+        move, player, win, is_grid_complete = find_best_move(board, k=4, time_budget=0.5)
+        self.assertEqual(player, 'O')
+        self.assertIn(move, [(0, 0), (4, 4)])
+
+    def test_time_budget(self):
+        board = [[' '] * 5 for _ in range(5)]
+        start = time.perf_counter()
+        move, player, win, is_grid_complete = find_best_move(board, k=4, time_budget=0.2)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsNotNone(move)
+        self.assertEqual(player, 'O')
+
+    def test_table_reused_across_moves_keeps_win_distance(self):
+        geometry = Geometry.get(3, 3)
+        # X in (0, 0) and (0, 1), O in (1, 0), O to move: X wins in 3 plies
+        x, o = 0b11, 0b1000
+        table = {}
+        # Searched 2 plies below the root, as in the previous move of the game
+        Search(geometry, time.perf_counter() + 60, table).negamax(o, x, 6, 2, -WIN_SCORE - 1, WIN_SCORE + 1)
+        shared = Search(geometry, time.perf_counter() + 60, table).negamax(o, x, 6, 0, -WIN_SCORE - 1, WIN_SCORE + 1)[0]
+        fresh = Search(geometry, time.perf_counter() + 60, {}).negamax(o, x, 6, 0, -WIN_SCORE - 1, WIN_SCORE + 1)[0]
+        self.assertEqual(fresh, -(WIN_SCORE - 3))
+        self.assertEqual(shared, fresh)
+
+    def test_check_win_diagonal(self):
+        board = [[' ', ' ', ' ', 'X', ' '],
+                 [' ', ' ', 'X', ' ', ' '],
+                 [' ', 'X', ' ', ' ', ' '],
+                 ['X', ' ', ' ', ' ', ' '],
+                 [' ', ' ', ' ', ' ', ' ']]
+        self.assertEqual(check_win(board, k=4), (True, 'X', False))
+        self.assertEqual(check_win(board, k=5), (False, None, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import struct
+import tempfile
+import tictactoe_engine
+from tictactoe_engine import find_best_move, find_best_moves, load_opening_book, write_opening_book, book_status
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "opening_book.bin")
+
+    def tearDown(self):
+        # Drop the mapped book so other tests run on live search
+        tictactoe_engine._BOOK.clear()
+        tictactoe_engine._DENSE_TABLE.clear()
+        self.tmp_dir.cleanup()
+
+    def test_missing_book(self):
+        self.assertFalse(load_opening_book(self.path))
+
+    def test_round_trip(self):
+        boards = [
+            [['X', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']],
+            [['X', 'X', ' '], ['O', 'O', ' '], [' ', 'X', ' ']],
+            [['X', 'O', 'X'], ['O', 'X', 'O'], ['O', 'X', ' ']],
+            [['X', 'X', 'X'], ['O', 'O', ' '], [' ', ' ', ' ']],
+            [['X', 'O', 'X'], ['O', 'X', 'O'], ['O', 'X', 'O']],
+        ]
+        expected = [find_best_move(board) for board in boards]
+        expected_batch = find_best_moves(boards)
+
+        write_opening_book(self.path)
+        self.assertTrue(load_opening_book(self.path))
+        self.assertTrue(book_status()["loaded"])
+        self.assertEqual([find_best_move(board) for board in boards], expected)
+        for array, expected_array in zip(find_best_moves(boards), expected_batch):
+            self.assertEqual(array.tolist(), expected_array.tolist())
+
+    def test_stale_book(self):
+        write_opening_book(self.path)
+        with open(self.path, "r+b") as f:
+            header = f.read(tictactoe_engine.BOOK_HEADER_SIZE)
+            magic, version, num_codes, fingerprint = struct.unpack(tictactoe_engine.BOOK_HEADER_FORMAT, header)
+            f.seek(0)
+            f.write(struct.pack(tictactoe_engine.BOOK_HEADER_FORMAT, magic, version, num_codes, b"\0" * 32))
+        self.assertFalse(load_opening_book(self.path))
+        self.assertFalse(book_status()["loaded"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import roboticstoolbox as rtb
+import spatialmath as sm
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from path_timing import JointLimits, LITE6_QD_MAX, segment_joint_positions, time_optimal_path, time_optimal_profile
+from paths import ArcSegment, CartesianPath, LineSegment, Trapezoid
+
+
+class TestJointLimits(unittest.TestCase):
+
+    def test_safety_factor_range(self):
+        with self.assertRaises(ValueError):
+            JointLimits(safety_factor=0)
+        with self.assertRaises(ValueError):
+            JointLimits(safety_factor=1.5)
+
+    def test_from_robot_without_velocity_limits(self):
+        robot = rtb.models.DH.Puma560()
+        limits = JointLimits.from_robot(robot, safety_factor=0.8)
+        np.testing.assert_allclose(limits.qd, [LITE6_QD_MAX] * 6)
+        self.assertEqual(limits.qdd.shape, (6,))
+        self.assertEqual(limits.safety_factor, 0.8)
+
+    def test_from_robot_ignores_gripper_limits(self):
+        robot = rtb.models.DH.Puma560()
+        robot.qdlim = np.r_[np.full(6, 2.0), 0.2, 0.2]
+        np.testing.assert_allclose(JointLimits.from_robot(robot).qd, [2.0] * 6)
+
+    def test_tracking_bound_below_limits(self):
+        limits = JointLimits(qd=[2.0, 3.0], safety_factor=0.5, tracking_margin=0.2)
+        np.testing.assert_allclose(limits.tracking_qd(), [1.4, 2.1])
+        limits = JointLimits(qd=[2.0, 3.0], safety_factor=1.0, tracking_margin=0.2)
+        np.testing.assert_allclose(limits.tracking_qd(), [1.8, 2.7])
+
+
+
+class TestTimeOptimalProfile(unittest.TestCase):
+
+    def test_straight_joint_path_is_trapezoid(self):
+        # Only the first joint moves, 10 rad per meter of pen
+        s = np.linspace(0, 0.1, 201)
+        q = np.outer(s, [10, 0, 0])
+        limits = JointLimits(qd=2.0, qdd=8.0, tcp_speed=None, safety_factor=0.5)
+        profile = time_optimal_profile(s, q, limits)
+        expected = Trapezoid(0.1, speed=0.1, acceleration=0.4)
+        self.assertAlmostEqual(profile.speed, 0.1, places=6)
+        self.assertAlmostEqual(profile.duration, expected.duration, delta=0.01 * expected.duration)
+
+    def test_limits_hold_at_grid_points(self):
+        s = np.linspace(0, 0.05, 101)
+        q = np.c_[np.sin(40 * s), np.cos(25 * s), 3 * s]
+        limits = JointLimits(qd=[1.0, 1.5, 2.0], qdd=[5.0, 5.0, 5.0], tcp_speed=0.3, safety_factor=0.5)
+        profile = time_optimal_profile(s, q, limits)
+        dq = np.gradient(q, s, axis=0)
+        ddq = np.gradient(dq, s, axis=0)
+        u = np.r_[profile.u, 0.0]
+        qd = dq * np.sqrt(profile.x)[:, np.newaxis]
+        qdd = dq * u[:, np.newaxis] + ddq * profile.x[:, np.newaxis]
+        self.assertTrue(np.all(np.abs(qd) <= 0.5 * limits.qd + 1e-9))
+        self.assertTrue(np.all(np.abs(qdd) <= 0.5 * limits.qdd + 1e-6))
+        self.assertLessEqual(profile.speed, 0.15 + 1e-9)
+
+    def test_rest_to_rest(self):
+        s = np.linspace(0, 0.02, 11)
+        profile = time_optimal_profile(s, np.outer(s, [5, -5]), JointLimits(qd=1.0, qdd=4.0))
+        self.assertEqual(profile(0.0), (0.0, 0.0))
+        distance, speed = profile(profile.duration)
+        self.assertAlmostEqual(distance, 0.02)
+        self.assertAlmostEqual(speed, 0.0)
+        distances = [profile(t)[0] for t in np.linspace(0, profile.duration, 100)]
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+
+
+class TestTimeOptimalPath(unittest.TestCase):
+
+    def setUp(self):
+        self.robot = rtb.models.DH.Puma560()
+        self.q = self.robot.qn
+        self.frame = self.robot.fkine(self.q)
+
+    def test_joint_positions_follow_segment(self):
+        segment = ArcSegment((0, 0, 0), 0.01, 0.0, np.pi)
+        start = self.frame * sm.SE3(-0.01, 0, 0)
+        s, positions = segment_joint_positions(self.robot, start, segment, self.q)
+        self.assertEqual(len(s), len(positions))
+        for distance, q in zip(s[::5], positions[::5]):
+            np.testing.assert_allclose(self.robot.fkine(q).t, (start * sm.SE3(segment.point(distance))).t, atol=1e-6)
+
+    def test_faster_than_trapezoid_and_same_geometry(self):
+        path = CartesianPath(self.frame, [LineSegment((0, 0, 0), (0.06, 0, 0)), LineSegment((0.06, 0, 0), (0.06, 0, -0.01), draws=False)],
+                             speed=0.1, acceleration=0.5)
+        timed = time_optimal_path(self.robot, path, self.q, JointLimits.from_robot(self.robot))
+        self.assertLess(timed.duration, path.duration)
+        np.testing.assert_allclose(timed.end_pose.A, path.end_pose.A, atol=1e-9)
+        self.assertFalse(timed.draws(timed.duration))
+        np.testing.assert_array_equal(timed.fingerprint(), path.fingerprint())
+
+    def test_stalled_timing_keeps_trapezoid(self):
+        path = CartesianPath(self.frame, [LineSegment((0, 0, 0), (0.06, 0, 0))], speed=0.1, acceleration=0.5)
+        # Limits so low that the optimal timing would take hours
+        timed = time_optimal_path(self.robot, path, self.q, JointLimits(qd=1e-6, qdd=1e-6))
+        self.assertIsInstance(timed.timings[0], Trapezoid)
+        self.assertAlmostEqual(timed.duration, path.duration)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import spatialmath as sm
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from paths import ArcSegment, CartesianPath, LineSegment, Trapezoid
+
+
+class TestTrapezoid(unittest.TestCase):
+
+    def test_cruise(self):
+        profile = Trapezoid(0.1, speed=0.1, acceleration=0.5)
+        self.assertAlmostEqual(profile.duration, 0.1 / 0.1 + 0.1 / 0.5)
+        self.assertEqual(profile(0.0), (0.0, 0.0))
+        s, speed = profile(profile.duration / 2)
+        self.assertAlmostEqual(s, 0.05)
+        self.assertAlmostEqual(speed, 0.1)
+        s, speed = profile(profile.duration)
+        self.assertAlmostEqual(s, 0.1)
+        self.assertAlmostEqual(speed, 0.0)
+
+    def test_triangle(self):
+        profile = Trapezoid(0.001, speed=0.1, acceleration=0.5)
+        self.assertAlmostEqual(profile.speed, np.sqrt(0.5 * 0.001))
+        self.assertAlmostEqual(profile(profile.duration)[0], 0.001)
+
+    def test_continuous(self):
+        profile = Trapezoid(0.07, speed=0.1, acceleration=0.5)
+        times = np.linspace(0, profile.duration, 500)
+        distances = np.array([profile(t)[0] for t in times])
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+        self.assertLess(np.abs(np.diff(distances)).max(), 0.1 * times[1] * 1.01)
+
+
+class TestCartesianPath(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = sm.SE3(0.3, 0.1, 0.7) * sm.SE3.Rx(np.pi)
+        self.path = CartesianPath(self.frame, [
+            LineSegment((0.01, 0, -0.01), (0.01, 0, 0), draws=False),
+            ArcSegment((0, 0, 0), 0.01, 0.0, 2 * np.pi),
+            LineSegment((0.01, 0, 0), (0.01, 0, -0.01), draws=False),
+        ], speed=0.1, acceleration=0.5)
+
+    def test_ends(self):
+        np.testing.assert_allclose(self.path.start_pose.t, (self.frame * sm.SE3(0.01, 0, -0.01)).t, atol=1e-12)
+        np.testing.assert_allclose(self.path.end_pose.t, (self.frame * sm.SE3(0.01, 0, -0.01)).t, atol=1e-12)
+        np.testing.assert_allclose(self.path.sample(self.path.duration)[1], 0, atol=1e-12)
+
+    def test_arc_speed_limited_by_acceleration(self):
+        arc = self.path.timings[1]
+        self.assertAlmostEqual(arc.speed, np.sqrt(0.5 * 0.01))
+
+    def test_points_on_circle(self):
+        arc_start = self.path._starts[1]
+        for t in np.linspace(arc_start, self.path._starts[2], 20, endpoint=False):
+            pose, velocity = self.path.sample(t)
+            local = (self.frame.inv() * pose).t
+            self.assertAlmostEqual(np.hypot(local[0], local[1]), 0.01)
+            self.assertAlmostEqual(local[2], 0.0)
+            # Tangent to the circle
+            self.assertAlmostEqual(float(np.dot(self.frame.R.T @ velocity, local)), 0.0)
+            self.assertTrue(self.path.draws(t))
+        self.assertFalse(self.path.draws(0.0))
+
+    def test_fingerprint(self):
+        other = CartesianPath(self.frame, self.path.segments, speed=0.2, acceleration=0.5)
+        self.assertFalse(np.array_equal(self.path.fingerprint(), other.fingerprint()))
+
+
+if __name__ == '__main__':
+    unittest.main()
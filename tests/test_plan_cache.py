@@ -0,0 +1,93 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plan_cache import PlanCache, strokes_key
+from stroke_plans import StrokePlan
+
+BASE = np.eye(4)
+ORIGIN = np.eye(4)
+ORIGIN[:3, 3] = [0.4, 0.26, 0.05]
+
+
+def letter_strokes(x=0.35):
+    corner = np.eye(4)
+    corner[:3, 3] = [x, 0.15, 0.7]
+    return [[(corner, {"qd_max": 1}), (corner, {"treshold": 0.001, "qd_max": 1})], [(corner, {})]]
+
+
+class TestPlanCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def make_cache(self, origin=ORIGIN):
+        cache = PlanCache(self.path)
+        cache.open("Lite6", BASE, origin, np.zeros(6), 0.04)
+        return cache
+
+    def test_roundtrip_memory_mapped(self):
+        plan = StrokePlan(np.zeros(6), [np.random.rand(5, 6), np.random.rand(3, 6)])
+        self.make_cache().save(letter_strokes(), plan, name="X in (0, 0)")
+
+        cache = self.make_cache()
+        loaded = cache.load(letter_strokes())
+        self.assertIsInstance(loaded.strokes[0].base, np.memmap)
+        np.testing.assert_array_equal(loaded.start, plan.start)
+        self.assertEqual([len(stroke) for stroke in loaded.strokes], [5, 3])
+        for loaded_stroke, stroke in zip(loaded.strokes, plan.strokes):
+            np.testing.assert_array_equal(loaded_stroke, stroke)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_other_strokes_miss(self):
+        cache = self.make_cache()
+        cache.save(letter_strokes(), StrokePlan(np.zeros(6), [np.ones((2, 6))]))
+        self.assertIsNone(cache.load(letter_strokes(x=0.36)))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_calibration_change_invalidates(self):
+        self.make_cache().save(letter_strokes(), StrokePlan(np.zeros(6), [np.ones((2, 6))]))
+        moved = ORIGIN.copy()
+        moved[0, 3] += 0.01
+        self.assertIsNone(self.make_cache(moved).load(letter_strokes()))
+        # Float noise of a recomputed calibration keeps the plans
+        noisy = ORIGIN + 1e-12
+        self.assertIsNotNone(self.make_cache(noisy).load(letter_strokes()))
+
+    def test_keeps_recent_calibrations(self):
+        # Calibrations left by previous runs
+        for i in range(4):
+            directory = os.path.join(self.path, f"previous{i}")
+            os.makedirs(directory)
+            os.utime(directory, (i, i))
+        cache = PlanCache(self.path, keep=2)
+        cache.open("Lite6", BASE, ORIGIN, np.zeros(6), 0.04)
+        self.assertEqual(sorted(os.listdir(self.path)), sorted([os.path.basename(cache.directory), "previous3"]))
+
+    def test_never_prunes_open_calibrations(self):
+        # Opened by another player of this process, least recently used
+        other = PlanCache(self.path, keep=1)
+        other.open("Lite6", BASE, ORIGIN, np.zeros(6), 0.04)
+        os.utime(other.directory, (0, 0))
+        cache = PlanCache(self.path, keep=1)
+        cache.open("Lite6", BASE, ORIGIN + 1, np.zeros(6), 0.04)
+        self.assertTrue(os.path.isdir(other.directory))
+        self.assertTrue(os.path.isdir(cache.directory))
+
+    def test_strokes_key(self):
+        self.assertEqual(strokes_key(letter_strokes()), strokes_key(letter_strokes()))
+        strokes = letter_strokes()
+        strokes[0][0] = (strokes[0][0][0], {"qd_max": 2})
+        self.assertNotEqual(strokes_key(strokes), strokes_key(letter_strokes()))
+
+
+if __name__ == '__main__':
+    unittest.main()
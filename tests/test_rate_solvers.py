@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import sys
+import unittest
+
+import numpy as np
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rate_solvers import DLSRateSolver, QPRateSolver, make_rate_solver
+
+HAS_DRAKE = importlib.util.find_spec("pydrake") is not None
+
+
+def random_jacobian(seed):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(6, 6)), rng.normal(size=6) * 0.1
+
+
+class TestDLSRateSolver(unittest.TestCase):
+
+    def test_matches_inverse_away_from_singularities(self):
+        J, v = random_jacobian(0)
+        success, qd = DLSRateSolver().solve(J, v, qd_max=100)
+        self.assertTrue(success)
+        np.testing.assert_allclose(qd, np.linalg.solve(J, v), atol=1e-9)
+
+    def test_scaled_into_bounds(self):
+        J, v = random_jacobian(1)
+        unbounded = DLSRateSolver().solve(J, v, qd_max=100)[1]
+        qd_max = np.abs(unbounded).max() / 4
+        qd = DLSRateSolver().solve(J, v, qd_max=qd_max)[1]
+        self.assertLessEqual(np.abs(qd).max(), qd_max + 1e-12)
+        # Same direction as the unbounded solution
+        np.testing.assert_allclose(qd * 4, unbounded, atol=1e-9)
+
+    def test_singular_jacobian(self):
+        J, v = random_jacobian(2)
+        J[:, 5] = J[:, 4]
+        qd = DLSRateSolver().solve(J, v, qd_max=1)[1]
+        self.assertTrue(np.all(np.isfinite(qd)))
+        self.assertLessEqual(np.abs(qd).max(), 1 + 1e-12)
+
+
+class TestMakeRateSolver(unittest.TestCase):
+
+    def test_kinds(self):
+        self.assertIsInstance(make_rate_solver("dls"), DLSRateSolver)
+        with self.assertRaises(ValueError):
+            make_rate_solver("newton")
+
+    def test_auto(self):
+        solver = make_rate_solver("auto")
+        self.assertIsInstance(solver, QPRateSolver if HAS_DRAKE else DLSRateSolver)
+
+
+@unittest.skipUnless(HAS_DRAKE, "pydrake is not installed")
+class TestQPRateSolver(unittest.TestCase):
+
+    def test_reused_across_ticks(self):
+        solver = QPRateSolver()
+        for seed in range(5):
+            J, v = random_jacobian(seed)
+            success, qd = solver.solve(J, v, qd_max=100)
+            self.assertTrue(success)
+            np.testing.assert_allclose(qd, np.linalg.solve(J, v), atol=1e-4)
+
+    def test_bounds_updated(self):
+        solver = QPRateSolver()
+        J, v = random_jacobian(3)
+        solver.solve(J, v, qd_max=100)
+        qd_max = np.abs(np.linalg.solve(J, v)).max() / 4
+        success, qd = solver.solve(J, v, qd_max=qd_max)
+        self.assertTrue(success)
+        self.assertLessEqual(np.abs(qd).max(), qd_max + 1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
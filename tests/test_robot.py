@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import spatialmath as sm
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from robot import OXOPlayer
+
+
+def baseline_grid_targets(grid_center, grid_size, lift_height):
+    """Targets of the 3x3 `draw_grid` before the grid size became configurable."""
+    targets = []
+    for i in [-1, 1]:
+        targets += [
+            grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * i, -lift_height),
+            grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * i, 0),
+            grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * -i, 0),
+            grid_center * sm.SE3(grid_size/6 * i, grid_size/2 * -i, -lift_height),
+        ]
+    for i in [-1, 1]:
+        targets += [
+            grid_center * sm.SE3(grid_size/2 * -i, grid_size/6 * i, -lift_height),
+            grid_center * sm.SE3(grid_size/2 * -i, grid_size/6 * i, 0),
+            grid_center * sm.SE3(grid_size/2 * i, grid_size/6 * i, 0),
+        ]
+    return targets
+
+
+class TestGridStrokes(unittest.TestCase):
+
+    def player(self, grid_dim):
+        # Only the grid geometry is needed, without a robot connection
+        player = OXOPlayer.__new__(OXOPlayer)
+        player.grid_dim = grid_dim
+        player.motion = "waypoints"
+        return player
+
+    def test_3x3_grid_keeps_the_baseline_strokes(self):
+        grid_center = sm.SE3(0.3, -0.1, 0.75) * sm.SE3.Rx(np.pi)
+        strokes = self.player(3).grid_strokes(grid_center, 0.12, lift_height=0.01)
+        targets = [target for stroke in strokes for target, _ in stroke]
+        expected = baseline_grid_targets(grid_center, 0.12, 0.01)
+        self.assertEqual(len(targets), len(expected))
+        for target, reference in zip(targets, expected):
+            np.testing.assert_allclose(target.A, reference.A, atol=1e-12)
+
+    def test_nxn_grid_lines(self):
+        strokes = self.player(4).grid_strokes(sm.SE3(), 0.12)
+        self.assertEqual(len(strokes), 6)
+        offsets = [stroke[0][0].t[0] for stroke in strokes[:3]]
+        np.testing.assert_allclose(offsets, [-0.03, 0.0, 0.03], atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
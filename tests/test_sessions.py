@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sessions import load_robots
+
+
+class TestLoadRobots(unittest.TestCase):
+
+    def write(self, robots):
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump(robots, f)
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_defaults(self):
+        calibration = {"origin": [0.26, -0.4, 0.75], "x_point": [-0.26, -0.41, 0.75], "y_point": [0.27, -0.12, 0.75]}
+        robots = load_robots(self.write([
+            {"id": "left", "modes": ["REAL"], "robot_ip": "192.168.1.159", "calibration": calibration},
+            {"id": "sim"},
+        ]))
+        self.assertEqual([robot["id"] for robot in robots], ["left", "sim"])
+        self.assertEqual(robots[0]["calibration"], calibration)
+        self.assertEqual(robots[1]["modes"], ["SIMULATION"])
+
+    def test_duplicate_ids(self):
+        with self.assertRaises(ValueError):
+            load_robots(self.write([{"id": "a"}, {"id": "a"}]))
+
+    def test_incomplete_calibration(self):
+        with self.assertRaises(ValueError):
+            load_robots(self.write([{"id": "a", "calibration": {"origin": [0, 0, 0]}}]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import unittest
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from startup import StartupReport, IMPORT, INIT, BACKGROUND
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class TestStartupReport(unittest.TestCase):
+
+    def test_steps(self):
+        report = StartupReport()
+        with report.step(INIT, "engine table"):
+            pass
+        report.record(BACKGROUND, "vision warm-up", 2.0)
+        self.assertIsNone(report.to_dict()["ready_seconds"])
+        ready = report.mark_ready()
+
+        result = report.to_dict()
+        self.assertEqual(result["ready_seconds"], ready)
+        self.assertEqual([step["name"] for step in result["steps"]], ["engine table", "vision warm-up"])
+        self.assertEqual(result["background_seconds"], 2.0)
+        self.assertAlmostEqual(result["import_seconds"] + result["init_seconds"] + result["other_seconds"], ready)
+        self.assertIn("engine table", report.format())
+
+    def test_import_module(self):
+        report = StartupReport()
+        module = report.import_module("json")
+        self.assertIs(module, sys.modules["json"])
+        # Modules already loaded are not reported
+        self.assertEqual(report.steps, [])
+
+        sys.modules.pop("colorsys", None)
+        report.import_module("colorsys")
+        self.assertEqual([(step["kind"], step["name"]) for step in report.steps], [(IMPORT, "colorsys")])
+
+    def test_main_imports_no_robot_modules(self):
+        # Importing main must not load the modules of the SIMULATION and REAL modes
+        heavy = ["swift", "roboticstoolbox", "spatialgeometry", "spatialmath", "pydrake", "ultralytics", "robot"]
+        code = f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import cv2
+import numpy as np
+
+from jobs import JobManager
+from stream import GridVoter, StreamPlayer, read_frames
+
+EMPTY = [[' ', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']]
+ONE_X = [['X', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']]
+
+
+class FakePlayer:
+    """Stands in for OXOPlayer: records the boards it is asked to play on."""
+
+    def __init__(self):
+        self.grid_dim = 3
+        self.grid_size = 0.12
+        self.grid_tracker = None
+        self.played = []
+        self.drawn = []
+        # Cleared to hold the drawing of a move
+        self.drawing = threading.Event()
+        self.drawing.set()
+
+    def play(self, image, grid_state=None, draw=True, return_move=False):
+        self.played.append(grid_state)
+        move = ((1, 1), 'O')
+        if draw:
+            self.draw_move(*move)
+        response = {"grid_state": grid_state, "move": "letter: O in (1, 1)", "game_is_finished": False, "winner": None}
+        return (response, move) if return_move else response
+
+    def draw_move(self, move, player_letter):
+        self.drawing.wait(5)
+        self.drawn.append((move, player_letter))
+
+
+class TestGridVoter(unittest.TestCase):
+
+    def test_stable_after_min_votes(self):
+        voter = GridVoter(window=5, min_votes=3)
+        self.assertIsNone(voter.update(EMPTY))
+        self.assertIsNone(voter.update(EMPTY))
+        self.assertEqual(voter.update(EMPTY), EMPTY)
+
+    def test_outliers_are_voted_out(self):
+        voter = GridVoter(window=5, min_votes=4)
+        for grid_state in (ONE_X, ONE_X, EMPTY, ONE_X):
+            stable = voter.update(grid_state)
+        self.assertIsNone(stable)
+        self.assertEqual(voter.update(ONE_X), ONE_X)
+
+    def test_invalid_votes(self):
+        with self.assertRaises(ValueError):
+            GridVoter(window=3, min_votes=4)
+
+
+class TestStreamPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.player = FakePlayer()
+        self.streamer = StreamPlayer(self.player, window=3, min_votes=2)
+
+    def observe(self, grid_state, times=2):
+        responses = [self.streamer.observe(grid_state) for _ in range(times)]
+        return [r for r in responses if r is not None]
+
+    def test_first_board_is_the_reference(self):
+        self.assertEqual(self.observe(EMPTY), [])
+        self.assertEqual(self.streamer.reference, EMPTY)
+        self.assertEqual(self.player.played, [])
+
+    def test_robot_starts(self):
+        streamer = StreamPlayer(self.player, window=3, min_votes=2, robot_starts=True)
+        streamer.observe(EMPTY)
+        streamer.observe(EMPTY)
+        self.assertEqual(self.player.played, [EMPTY])
+
+    def test_new_mark_triggers_one_move(self):
+        self.observe(EMPTY)
+        responses = self.observe(ONE_X, times=4)
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(self.player.played, [ONE_X])
+        # The robot's own mark is expected and does not trigger another move
+        with_robot = [['X', ' ', ' '], [' ', 'O', ' '], [' ', ' ', ' ']]
+        self.assertEqual(self.streamer.reference, with_robot)
+        self.assertEqual(self.observe(with_robot, times=4), [])
+        self.assertEqual(self.streamer.moves, 1)
+
+    def test_flicker_does_not_trigger(self):
+        streamer = StreamPlayer(self.player, window=5, min_votes=4)
+        for grid_state in (EMPTY, EMPTY, EMPTY, EMPTY, ONE_X, EMPTY, ONE_X, EMPTY, ONE_X):
+            streamer.observe(grid_state)
+        self.assertEqual(self.player.played, [])
+
+    def test_moves_are_robot_jobs(self):
+        jobs = JobManager()
+        self.addCleanup(jobs.shutdown)
+        lock = threading.Lock()
+        streamer = StreamPlayer(self.player, window=3, min_votes=2, jobs=jobs, lock=lock)
+        self.player.drawing.clear()
+        for grid_state in (EMPTY, EMPTY, ONE_X):
+            streamer.observe(grid_state)
+        self.assertIsNotNone(streamer.observe(ONE_X))
+        self.assertEqual(self.player.played, [ONE_X])
+        # The robot draws in the background, frames are ignored until it is done
+        self.assertTrue(jobs.busy())
+        self.assertIsNone(streamer.process(np.zeros((4, 4, 3), dtype=np.uint8)))
+        self.player.drawing.set()
+        jobs.shutdown(wait=True)
+        self.assertEqual(self.player.drawn, [((1, 1), 'O')])
+
+    def test_no_move_while_play_decides(self):
+        lock = threading.Lock()
+        streamer = StreamPlayer(self.player, window=3, min_votes=2, lock=lock)
+        for grid_state in (EMPTY, EMPTY, ONE_X):
+            streamer.observe(grid_state)
+        with lock:
+            self.assertIsNone(streamer.observe(ONE_X))
+        self.assertEqual(self.player.played, [])
+        streamer.observe(ONE_X)
+        self.assertEqual(self.player.played, [ONE_X])
+
+    def test_no_move_before_grid_is_drawn(self):
+        self.player.grid_size = None
+        self.observe(EMPTY)
+        self.observe(ONE_X)
+        self.assertIsNone(self.streamer.reference)
+        self.assertEqual(self.player.played, [])
+
+
+class TestReadFrames(unittest.TestCase):
+
+    def test_read_video_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stream.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 100, (64, 48))
+            if not writer.isOpened():
+                self.skipTest("No video encoder available")
+            frame = np.zeros((48, 64, 3), dtype=np.uint8)
+            frame[:, :, 2] = 255  # red in BGR
+            for _ in range(3):
+                writer.write(frame)
+            writer.release()
+
+            frames = list(read_frames(path))
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[0].shape, (48, 64, 3))
+        self.assertGreater(frames[0][..., 0].mean(), 200)
+
+    def test_invalid_source(self):
+        with self.assertRaises(ValueError):
+            next(read_frames("does_not_exist.avi"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+import roboticstoolbox as rtb
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from stroke_plans import StrokePlan, StrokePlanner
+
+
+def fake_plan(key, should_stop):
+    if key == "unreachable":
+        return None
+    if should_stop():
+        return None
+    return StrokePlan(np.zeros(6), [np.ones((3, 6)), np.ones((2, 6))])
+
+
+class TestStrokePlan(unittest.TestCase):
+
+    def test_ticks_and_start(self):
+        plan = StrokePlan(np.zeros(6), [np.ones((3, 6)), np.ones((2, 6))])
+        self.assertEqual(plan.ticks, 5)
+        self.assertTrue(plan.can_start(np.full(6, 0.02)))
+        self.assertFalse(plan.can_start(np.array([0, 0, 0.1, 0, 0, 0])))
+
+    def test_start_pen_position(self):
+        robot = rtb.models.DH.Puma560()
+        plan = StrokePlan(robot.qn, [np.tile(robot.qn, (3, 1))])
+        self.assertTrue(plan.can_start(robot.qn + 0.001, robot=robot))
+        # Within the joint tolerance, but the pen is more than 1 cm away
+        self.assertFalse(plan.can_start(robot.qn + np.array([0.04, 0.04, 0, 0, 0, 0]), robot=robot))
+
+
+class TestStrokePlanner(unittest.TestCase):
+
+    def test_plans_every_key(self):
+        planner = StrokePlanner(fake_plan)
+        planner.start([(0, 0, "X"), (0, 0, "O"), "unreachable"])
+        self.assertTrue(planner.wait(5))
+        self.assertEqual(planner.get((0, 0, "X")).ticks, 5)
+        self.assertIsNone(planner.get("unreachable"))
+        self.assertIsNone(planner.get((1, 1, "X")))
+        stats = planner.stats()
+        self.assertEqual((stats["planned"], stats["pending"], stats["failed"]), (2, 0, 1))
+
+    def test_restart_drops_previous_plans(self):
+        planner = StrokePlanner(fake_plan)
+        planner.start([(0, 0, "X")])
+        planner.wait(5)
+        planner.start([(1, 1, "O")])
+        planner.wait(5)
+        self.assertIsNone(planner.get((0, 0, "X")))
+        self.assertIsNotNone(planner.get((1, 1, "O")))
+
+    def test_paused_and_cancelled(self):
+        ticks = []
+        started = threading.Event()
+
+        def slow_plan(key, should_stop):
+            started.set()
+            while not should_stop():
+                ticks.append(key)
+            return None
+
+        planner = StrokePlanner(slow_plan)
+        with planner.paused():
+            planner.start(["a", "b"])
+            started.wait(5)
+            count = len(ticks)
+            # No tick runs while paused
+            self.assertFalse(planner.wait(0.3))
+            self.assertEqual(len(ticks), count)
+            planner.cancel()
+        self.assertEqual(planner.stats()["pending"], 0)
+        self.assertIsNone(planner.get("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from tictactoe_engine import find_best_move
+import copy
+import numpy as np
+from tictactoe_engine import find_best_move, find_best_moves, encode_boards, minimax, lookup_move_values, build_table, reachable_positions, SYMMETRIES
 
 class TestTicTacToeEngine(unittest.TestCase):
 
@@ -16,7 +18,7 @@ class TestTicTacToeEngine(unittest.TestCase):
                  [' ', ' ', ' ']]
         move, player, win, is_grid_complete= find_best_move(board)
         self.assertEqual(player, 'O')
-        self.assertEqual(move, (1, 2))
+        self.assertEqual(move, (1, 1))
         self.assertFalse(is_grid_complete)
 
     def test_find_best_move_one_move2(self):
@@ -25,7 +27,7 @@ class TestTicTacToeEngine(unittest.TestCase):
                  [' ', ' ', ' ']]
         move, player, win, is_grid_complete= find_best_move(board)
         self.assertEqual(player, 'O')
-        self.assertEqual(move, (1, 1))
+        self.assertEqual(move, (1, 2))
         self.assertFalse(is_grid_complete)
 
     def test_test_find_best_move_block_win(self):
@@ -134,6 +136,67 @@ class TestTicTacToeEngine(unittest.TestCase):
         self.assertFalse(win)
         self.assertTrue(is_grid_complete)
 
+    def test_move_values_match_minimax(self):
+        board = [['X', ' ', 'O'],
+                 [' ', 'X', ' '],
+                 [' ', ' ', ' ']]
+        values = lookup_move_values(board, 'O')
+        for i in range(3):
+            for j in range(3):
+                if board[i][j] != ' ':
+                    self.assertIsNone(values[3 * i + j])
+                    continue
+                child = copy.deepcopy(board)
+                child[i][j] = 'O'
+                self.assertEqual(values[3 * i + j], minimax(child, 0, True, float('-inf'), float('inf'), 'O'))
+
+    def test_move_values_follow_symmetries(self):
+        cells = ('X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', 'X')
+        board = [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+        values = lookup_move_values(board, 'O')
+        for perm in SYMMETRIES:
+            transformed = [cells[k] for k in perm]
+            transformed_board = [transformed[i:i + 3] for i in range(0, 9, 3)]
+            transformed_values = lookup_move_values(transformed_board, 'O')
+            self.assertEqual(transformed_values, [values[k] for k in perm])
+
+    def test_build_table(self):
+        stats = build_table()
+        self.assertGreater(stats["positions"], 0)
+        self.assertGreater(stats["memory_bytes"], 0)
+        self.assertGreaterEqual(stats["build_seconds"], 0)
+        self.assertEqual(len(reachable_positions()), 8533)
+
+    def test_find_best_moves_matches_find_best_move(self):
+        positions = reachable_positions()
+        boards = np.array([[list(cells[i:i + 3]) for i in range(0, 9, 3)] for cells in positions])
+        moves, players, wins, completes = find_best_moves(boards)
+        for k, board in enumerate(boards.tolist()):
+            move, player, win, is_grid_complete = find_best_move(board)
+            self.assertEqual(move, tuple(moves[k]) if moves[k][0] >= 0 else None)
+            self.assertEqual(player, players[k] or None)
+            self.assertEqual(win, wins[k])
+            self.assertEqual(is_grid_complete, completes[k])
+
+    def test_find_best_moves_inputs(self):
+        board = [['X', 'X', ' '],
+                 ['O', ' ', ' '],
+                 [' ', ' ', ' ']]
+        digits = [[1, 1, 0],
+                  [2, 0, 0],
+                  [0, 0, 0]]
+        codes = encode_boards([board])
+        self.assertEqual(codes.tolist(), [1 + 3 + 2 * 27])
+        for boards in ([board], [digits], codes):
+            moves, players, wins, completes = find_best_moves(boards)
+            self.assertEqual(moves.tolist(), [[0, 2]])
+            self.assertEqual(players.tolist(), ['O'])
+        with self.assertRaises(ValueError):
+            find_best_moves(np.array([3 ** 9]))
+        for boards in (np.full((1, 3, 3), 5), np.full((1, 3, 3), -1), np.zeros((1, 9), dtype=int)):
+            with self.assertRaises(ValueError):
+                find_best_moves(boards)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,13 @@
+import threading
 import unittest
 import sys
 import os
 # Add the parent directory to the sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from vision import image_to_tictactoe_grid
+import cv2
+import numpy as np
+from vision import image_to_tictactoe_grid, decode_image, BatchingDetector, bb_to_tictactoe_grid, preprocess_bboxes, GridTracker, FrameChangeDetector, VisionCache
 
 class TestVision(unittest.TestCase):
 
@@ -42,5 +45,189 @@ class TestVision(unittest.TestCase):
         # Assert that the actual grid state matches the expected grid state
         self.assertEqual(actual_grid_state, expected_grid_state)
 
+class TestBoundingBoxes(unittest.TestCase):
+
+    def test_preprocess_bboxes(self):
+        conf = np.array([0.9, 0.8, 0.7, 0.4])
+        cls = np.array([2, 1, 0, 1])
+        xywh = np.array([[300, 200, 300, 300], [200, 100, 50, 50], [300, 200, 50, 50], [400, 300, 50, 50]], dtype=float)
+        bboxes = preprocess_bboxes((conf, cls, xywh), ["O", "X", "grid"])
+        self.assertEqual(bboxes["grid"].tolist(), [[300, 200, 300, 300]])
+        self.assertEqual(bboxes["X"].tolist(), [[200, 100, 50, 50]])
+        self.assertEqual(bboxes["O"].tolist(), [[300, 200, 50, 50]])
+
+    def test_bb_to_tictactoe_grid(self):
+        bboxes = {
+            "grid": np.array([[300, 200, 300, 300]], dtype=float),
+            "X": np.array([[200, 100, 50, 50], [400, 300, 50, 50]], dtype=float),
+            "O": np.array([[300, 200, 50, 50]], dtype=float),
+        }
+        expected = [['X', ' ', ' '],
+                    [' ', 'O', ' '],
+                    [' ', ' ', 'X']]
+        self.assertEqual(bb_to_tictactoe_grid(bboxes), expected)
+        # Lists of boxes are still accepted
+        self.assertEqual(bb_to_tictactoe_grid({name: boxes.tolist() for name, boxes in bboxes.items()}), expected)
+
+    def test_bb_to_tictactoe_grid_4x4(self):
+        bboxes = {"grid": [[200, 200, 400, 400]], "O": [[350, 50, 20, 20]], "X": []}
+        grid_state = bb_to_tictactoe_grid(bboxes, grid_dim=4)
+        self.assertEqual(grid_state[0], [' ', ' ', ' ', 'O'])
+        self.assertEqual(len(grid_state), 4)
+
+
+class TestDecodeImage(unittest.TestCase):
+
+    def setUp(self):
+        self.image = np.zeros((64, 96, 3), dtype=np.uint8)
+        self.image[:, :, 0] = 200  # red in RGB
+        self.png = cv2.imencode(".png", cv2.cvtColor(self.image, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+    def test_decode_rgb(self):
+        image = decode_image(self.png)
+        self.assertEqual(image.shape, (64, 96, 3))
+        np.testing.assert_array_equal(image, self.image)
+
+    def test_reduced_decode(self):
+        self.assertEqual(decode_image(self.png, reduction=4).shape, (16, 24, 3))
+        with self.assertRaises(ValueError):
+            decode_image(self.png, reduction=3)
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            decode_image(b"not an image")
+
+
+class TestBatchingDetector(unittest.TestCase):
+
+    def test_coinciding_requests_share_a_batch(self):
+        calls = []
+
+        def detect_fn(images, **kwargs):
+            calls.append((len(images), kwargs))
+            return [(int(image[0, 0, 0]), kwargs.get("imgsz")) for image in images]
+
+        batcher = BatchingDetector(max_batch=4, max_wait=0.2, detect_fn=detect_fn)
+        results = {}
+
+        def request(value, imgsz):
+            results[value] = batcher.detect(np.full((4, 4, 3), value, dtype=np.uint8), imgsz=imgsz)
+
+        threads = [threading.Thread(target=request, args=(value, 640)) for value in range(4)]
+        threads.append(threading.Thread(target=request, args=(9, 320)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, {0: (0, 640), 1: (1, 640), 2: (2, 640), 3: (3, 640), 9: (9, 320)})
+        # Requests with another inference size are batched separately
+        self.assertEqual(sorted(size for size, _ in calls), [1, 4])
+        self.assertEqual(batcher.stats()["images"], 5)
+
+    def test_errors_reach_every_request(self):
+        def detect_fn(images, **kwargs):
+            raise RuntimeError("model failed")
+
+        batcher = BatchingDetector(max_wait=0.0, detect_fn=detect_fn)
+        with self.assertRaises(RuntimeError):
+            batcher.detect(np.zeros((4, 4, 3), dtype=np.uint8))
+
+
+class TestGridTracker(unittest.TestCase):
+
+    def test_roi_without_grid(self):
+        tracker = GridTracker()
+        self.assertIsNone(tracker.roi((480, 640, 3)))
+
+    def test_roi_with_margin(self):
+        tracker = GridTracker(margin=0.25)
+        tracker.grid_box = (320, 240, 200, 100)
+        self.assertEqual(tracker.roi((480, 640, 3)), (170, 165, 470, 315))
+
+    def test_roi_clipped_to_frame(self):
+        tracker = GridTracker(margin=0.5)
+        tracker.grid_box = (50, 50, 200, 200)
+        self.assertEqual(tracker.roi((480, 640, 3)), (0, 0, 250, 250))
+
+    def test_reset(self):
+        tracker = GridTracker()
+        tracker.grid_box = (50, 50, 20, 20)
+        tracker.reset()
+        self.assertIsNone(tracker.roi((480, 640, 3)))
+
+class TestFrameChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = np.full((480, 640, 3), 255, dtype=np.uint8)
+        self.frame[100:380, 210:215] = 0
+        self.frame[100:380, 420:425] = 0
+
+    def test_no_reference(self):
+        detector = FrameChangeDetector()
+        self.assertTrue(detector.has_changed(self.frame))
+        self.assertEqual(detector.stats()["misses"], 1)
+
+    def test_identical_frame(self):
+        detector = FrameChangeDetector()
+        detector.update(self.frame, (150, 50, 500, 430))
+        self.assertFalse(detector.has_changed(self.frame.copy()))
+        self.assertEqual(detector.stats()["hits"], 1)
+
+    def test_new_mark(self):
+        detector = FrameChangeDetector()
+        detector.update(self.frame, (150, 50, 500, 430))
+        frame = self.frame.copy()
+        for k in range(40):
+            frame[120 + k:124 + k, 240 + k:244 + k] = 0
+            frame[120 + k:124 + k, 280 - k:284 - k] = 0
+        self.assertTrue(detector.has_changed(frame))
+
+    def test_change_outside_roi(self):
+        detector = FrameChangeDetector()
+        detector.update(self.frame, (150, 50, 500, 430))
+        frame = self.frame.copy()
+        frame[:, :100] = 0
+        self.assertFalse(detector.has_changed(frame))
+
+class TestVisionCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        cache = VisionCache()
+        key = cache.key(b"image")
+        self.assertIsNone(cache.get(key))
+        grid_state = [['X', ' ', ' '], [' ', 'O', ' '], [' ', ' ', ' ']]
+        cache.put(key, {"grid": [[10, 10, 5, 5]]}, grid_state)
+        entry = cache.get(key)
+        self.assertEqual(entry["grid_state"], grid_state)
+        # Entries are copies, the cached result cannot be modified through them
+        entry["grid_state"][0][0] = 'O'
+        self.assertEqual(cache.get(key)["grid_state"], grid_state)
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_key_depends_on_context(self):
+        key = VisionCache.key(b"image", "left", 3, 1)
+        self.assertEqual(key, VisionCache.key(b"image", "left", 3, 1))
+        self.assertNotEqual(key, VisionCache.key(b"image", "right", 3, 1))
+        self.assertNotEqual(key, VisionCache.key(b"image", "left", 4, 1))
+        self.assertNotEqual(key, VisionCache.key(b"image", "left", 3, 2))
+
+    def test_lru_eviction(self):
+        cache = VisionCache(max_entries=2)
+        for name in (b"a", b"b"):
+            cache.put(cache.key(name), {}, [])
+        cache.get(cache.key(b"a"))
+        cache.put(cache.key(b"c"), {}, [])
+        self.assertIsNotNone(cache.get(cache.key(b"a")))
+        self.assertIsNone(cache.get(cache.key(b"b")))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_age_eviction(self):
+        cache = VisionCache(max_age=0)
+        cache.put(cache.key(b"a"), {}, [])
+        self.assertIsNone(cache.get(cache.key(b"a")))
+        self.assertEqual(cache.stats()["entries"], 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+# Add the parent directory to the sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+from workers import SharedImage, RobotController
+
+
+class FakePlayer:
+    """Stands in for OXOPlayer in the robot-controller process."""
+
+    def __init__(self, grid_dim=3):
+        self.grid_dim = grid_dim
+        self.grid_size = None
+        self.last_move = None
+        self.on_progress = None
+
+    def draw_grid(self, grid_center, grid_size):
+        self.grid_size = grid_size
+        self.on_progress("stroke_started", shape="grid", stroke=1, strokes=1)
+        self.on_progress("stroke_finished", shape="grid", stroke=1, strokes=1)
+
+    def play(self, image, grid_state=None, draw=True):
+        self.last_move = ((0, 0), 'X')
+        return {"grid_state": grid_state, "pid": os.getpid()}
+
+    def fail(self):
+        raise ValueError("joint limit")
+
+
+def make_fake_player(grid_dim=3):
+    return FakePlayer(grid_dim)
+
+
+def make_broken_player():
+    raise ValueError("no robot")
+
+
+class TestSharedImage(unittest.TestCase):
+
+    def test_round_trip(self):
+        image = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+        with SharedImage(image) as shared:
+            name, shape, dtype = shared.descriptor
+            shm = SharedMemory(name=name)
+            np.testing.assert_array_equal(np.ndarray(shape, dtype=dtype, buffer=shm.buf), image)
+            shm.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+
+class TestRobotController(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.controller = RobotController(make_fake_player, grid_dim=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.controller.close()
+
+    def test_calls_run_in_the_controller_process(self):
+        grid_state = [[' '] * 3 for _ in range(3)]
+        response, state = self.controller.call("play", None, grid_state=grid_state)
+        self.assertEqual(response["grid_state"], grid_state)
+        self.assertNotEqual(response["pid"], os.getpid())
+        self.assertEqual(state["last_move"], ((0, 0), 'X'))
+
+    def test_progress_events(self):
+        events = []
+        _, state = self.controller.call("draw_grid", None, 0.12, on_progress=lambda event, **info: events.append(event))
+        self.assertEqual(events, ["stroke_started", "stroke_finished"])
+        self.assertEqual(state["grid_size"], 0.12)
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(RuntimeError):
+            self.controller.call("fail")
+
+    def test_factory_error(self):
+        with self.assertRaises(RuntimeError):
+            RobotController(make_broken_player)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,18 @@
 """
 Receive the real world positions of grid, x and o and return the position and letter of the next move
 """
+import hashlib
+import os
+import struct
+import sys
+import time
+
 import numpy as np
 
+import bitboard_engine
+
+from bitboard_engine import CELL_BITS, FULL_MASK, WINS, board_to_bits
+
 def evaluate(board):
     """
     Evaluates the board to check for a win.
@@ -28,7 +38,7 @@ def evaluate(board):
 
     return 0
 
-def minimax(board, depth, is_max, alpha, beta, player_letter):
+def minimax(board, depth, is_max, alpha, beta, player_letter=None):
     """
     Minimax algorithm to find the best move.
 
@@ -38,7 +48,11 @@ def minimax(board, depth, is_max, alpha, beta, player_letter):
         is_max (bool): Flag indicating if the current move is maximizing.
         alpha (float): Alpha value for alpha-beta pruning.
         beta (float): Beta value for alpha-beta pruning.
-        player_letter (str): Letter representing the current player ('X' or 'O').
+        player_letter (str): Unused, the side to move is given by `is_max`. Kept so that calls
+            with the original signature still work.
+
+    Scores favour X, so the maximizing side places X and the minimizing side places O,
+    whichever letter the search is run for.
 
     Returns:
         int: Best score for the current move.
@@ -56,8 +70,8 @@ def minimax(board, depth, is_max, alpha, beta, player_letter):
         for i in range(3):
             for j in range(3):
                 if board[i][j] == ' ':
-                    board[i][j] = player_letter
-                    value = minimax(board, depth + 1, False, alpha, beta, player_letter)
+                    board[i][j] = 'X'
+                    value = minimax(board, depth + 1, False, alpha, beta)
                     max_eval = max(max_eval, value)
                     alpha = max(alpha, value)
                     board[i][j] = ' '
@@ -66,12 +80,11 @@ def minimax(board, depth, is_max, alpha, beta, player_letter):
         return max_eval
     else:
         min_eval = float('inf')
-        opponent_letter = 'O' if player_letter == 'X' else 'X'
         for i in range(3):
             for j in range(3):
                 if board[i][j] == ' ':
-                    board[i][j] = opponent_letter
-                    value = minimax(board, depth + 1, True, alpha, beta, player_letter)
+                    board[i][j] = 'O'
+                    value = minimax(board, depth + 1, True, alpha, beta)
                     min_eval = min(min_eval, value)
                     beta = min(beta, value)
                     board[i][j] = ' '
@@ -80,6 +93,9 @@ def minimax(board, depth, is_max, alpha, beta, player_letter):
         return min_eval
 
 def find_best_move(board):
+    if _BOOK:
+        return _book_lookup(board)
+
     x_count = sum(row.count('X') for row in board)
     o_count = sum(row.count('O') for row in board)
     if x_count > o_count:
@@ -98,13 +114,14 @@ def find_best_move(board):
 
     best_move = (-1, -1)
     best_val = float('-inf') if player_letter == 'X' else float('inf')
-    
+    # Values of every candidate move come from the solved table, so the loop
+    # below only applies the tie-breaking rules.
+    move_values = lookup_move_values(board, player_letter)
+
     for i in range(3):
         for j in range(3):
             if board[i][j] == ' ':
-                board[i][j] = player_letter
-                move_val = minimax(board, 0, player_letter == 'O', float('-inf'), float('inf'), player_letter)
-                board[i][j] = ' '
+                move_val = move_values[3 * i + j]
 
                 if (player_letter == 'X' and move_val > best_val) or (player_letter == 'O' and move_val < best_val):
                     best_move = (i, j)
@@ -157,7 +174,452 @@ def check_draw(board):
         return True
     else:
         return False
-    
 
 
+# ---------------------------------------------------------------------------
+# Solved-game table
+#
+# Tic-tac-toe only has a few thousand reachable positions, so the values that
+# `minimax` would compute are stored once per position and reused. Positions
+# are keyed by their canonical form under the 8 symmetries of the board: a
+# position and its rotations/reflections share a single entry. The search
+# itself runs on the bitboards of `bitboard_engine`.
+# ---------------------------------------------------------------------------
+
+
+def _symmetries():
+    """
+    Builds the 8 symmetries of the 3x3 board as permutations of flat indices.
+
+    Returns:
+        tuple: Permutations `perm` such that the transformed board holds
+        `cells[perm[k]]` at flat index `k`.
+    """
+    def rotate(perm):
+        return tuple(perm[3 * (2 - c) + r] for r in range(3) for c in range(3))
+
+    def mirror(perm):
+        return tuple(perm[3 * r + (2 - c)] for r in range(3) for c in range(3))
+
+    perms = []
+    perm = tuple(range(9))
+    for _ in range(4):
+        perms.append(perm)
+        perms.append(mirror(perm))
+        perm = rotate(perm)
+    return tuple(perms)
+
+
+SYMMETRIES = _symmetries()
+
+# _PERMUTED_BITS[s][mask] is the 9-bit mask transformed by SYMMETRIES[s].
+_PERMUTED_BITS = tuple(
+    tuple(sum(1 << k for k in range(9) if mask >> perm[k] & 1) for mask in range(1 << 9))
+    for perm in SYMMETRIES
+)
+
+# (canonical position code, is_max) -> value of the position at depth 0.
+_NODE_TABLE = {}
+# (canonical position code, player_letter) -> values of the 9 candidate moves in canonical order.
+_MOVE_TABLE = {}
+_TABLE_STATS = {"build_seconds": 0.0}
+
+
+def _canonicalize(x_bits, o_bits):
+    """
+    Finds the canonical code of a position under the board symmetries.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+
+    Returns:
+        tuple: (canonical code, index of the symmetry that produces it).
+    """
+    best_code, best_index = None, None
+    for index, permuted in enumerate(_PERMUTED_BITS):
+        code = permuted[x_bits] << 9 | permuted[o_bits]
+        if best_code is None or code < best_code:
+            best_code, best_index = code, index
+    return best_code, best_index
+
+
+def _shift(value):
+    # A value one ply deeper loses one point of magnitude, as `score - depth` does in minimax.
+    if value > 0:
+        return value - 1
+    if value < 0:
+        return value + 1
+    return 0
+
+
+def _node_value(x_bits, o_bits, is_max):
+    """
+    Exact value of `minimax(board, 0, is_max, -inf, inf)`, memoized.
+
+    Args:
+        x_bits (int): Cells taken by X.
+        o_bits (int): Cells taken by O.
+        is_max (bool): Flag indicating if the current move is maximizing (X to play).
+
+    Returns:
+        int: Value of the position.
+    """
+    if WINS[x_bits]:
+        return 10
+    if WINS[o_bits]:
+        return -10
+    taken = x_bits | o_bits
+    if taken == FULL_MASK:
+        return 0
+
+    key = (_canonicalize(x_bits, o_bits)[0], is_max)
+    value = _NODE_TABLE.get(key)
+    if value is not None:
+        return value
+
+    child_values = [
+        _node_value(x_bits | bit, o_bits, False) if is_max
+        else _node_value(x_bits, o_bits | bit, True)
+        for bit in CELL_BITS if not taken & bit
+    ]
+    value = _shift(max(child_values) if is_max else min(child_values))
+    _NODE_TABLE[key] = value
+    return value
+
+
+def lookup_move_values(board, player_letter):
+    """
+    Returns the minimax value of every candidate move, as computed by `find_best_move`.
+
+    Args:
+        board (list): 3x3 grid representing the Tic-Tac-Toe board state.
+        player_letter (str): Letter of the player to move ('X' or 'O').
+
+    Returns:
+        list: 9 values in row-major order, None for occupied cells.
+    """
+    x_bits, o_bits = board_to_bits(board)
+    code, index = _canonicalize(x_bits, o_bits)
+    canonical_values = _MOVE_TABLE.get((code, player_letter))
+    if canonical_values is None:
+        x_canonical, o_canonical = _PERMUTED_BITS[index][x_bits], _PERMUTED_BITS[index][o_bits]
+        taken = x_canonical | o_canonical
+        is_max = player_letter == 'O'
+        canonical_values = tuple(
+            None if taken & bit
+            else _node_value(x_canonical | bit, o_canonical, is_max) if player_letter == 'X'
+            else _node_value(x_canonical, o_canonical | bit, is_max)
+            for bit in CELL_BITS
+        )
+        _MOVE_TABLE[(code, player_letter)] = canonical_values
+
+    values = [None] * 9
+    for k, original in enumerate(SYMMETRIES[index]):
+        values[original] = canonical_values[k]
+    return values
+
+
+def reachable_positions():
+    """
+    Enumerates every position reachable in a game, whichever letter starts.
+
+    Returns:
+        list: Flat boards (tuples of 9 letters) in discovery order.
+    """
+    seen = set()
+    positions = []
+    stack = [(' ',) * 9]
+    while stack:
+        cells = stack.pop()
+        if cells in seen:
+            continue
+        seen.add(cells)
+        positions.append(cells)
+        if _is_terminal(cells):
+            continue
+        x_count, o_count = cells.count('X'), cells.count('O')
+        letters = ('X', 'O') if x_count == o_count else (('O',) if x_count > o_count else ('X',))
+        for letter in letters:
+            for k in range(9):
+                if cells[k] == ' ':
+                    stack.append(cells[:k] + (letter,) + cells[k + 1:])
+    return positions
+
+
+def _is_terminal(cells):
+    x_bits, o_bits = board_to_bits((cells[0:3], cells[3:6], cells[6:9]))
+    return WINS[x_bits] or WINS[o_bits] or (x_bits | o_bits) == FULL_MASK
+
+
+def build_table():
+    """
+    Precomputes the move values of every reachable position.
+
+    Returns:
+        dict: Table statistics, see `table_stats`.
+    """
+    start = time.perf_counter()
+    for cells in reachable_positions():
+        if _is_terminal(cells):
+            continue
+        x_count, o_count = cells.count('X'), cells.count('O')
+        player_letter = 'X' if x_count < o_count else 'O'
+        board = [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+        lookup_move_values(board, player_letter)
+    _TABLE_STATS["build_seconds"] = time.perf_counter() - start
+    return table_stats()
+
+
+def table_stats():
+    """
+    Reports the size and build time of the solved-game table.
+
+    Returns:
+        dict: Number of entries, approximate memory in bytes and build time in seconds.
+    """
+    memory = sys.getsizeof(_NODE_TABLE) + sys.getsizeof(_MOVE_TABLE)
+    memory += sum(sys.getsizeof(key) for key in _NODE_TABLE)
+    memory += sum(sys.getsizeof(key) + sys.getsizeof(values) for key, values in _MOVE_TABLE.items())
+    return {
+        "positions": len(_MOVE_TABLE),
+        "nodes": len(_NODE_TABLE),
+        "memory_bytes": memory,
+        "build_seconds": round(_TABLE_STATS["build_seconds"], 4),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Batched lookups
+#
+# Every 3x3 board, reachable or not, is numbered by its base-3 code
+# (' ' = 0, 'X' = 1, 'O' = 2, cell k weighted by 3**k). The results of
+# `find_best_move` for all 3**9 codes are stored in flat arrays so that many
+# boards are answered with a single fancy-indexing operation.
+# ---------------------------------------------------------------------------
+
+NUM_CODES = 3 ** 9
+POWERS_OF_3 = 3 ** np.arange(9, dtype=np.int32)
+PLAYER_LETTERS = np.array(['', 'X', 'O'])
+
+_DENSE_TABLE = {}
+
+
+def encode_boards(boards):
+    """
+    Encodes boards to their base-3 codes.
+
+    Args:
+        boards (array-like): (N, 3, 3) array of letters (' ', 'X', 'O') or of digits (0, 1, 2).
+
+    Returns:
+        np.ndarray: (N,) array of codes.
+
+    Raises:
+        ValueError: If the boards are not (N, 3, 3) or hold digits other than 0, 1 and 2.
+    """
+    boards = np.asarray(boards)
+    if boards.ndim != 3 or boards.shape[1:] != (3, 3):
+        raise ValueError(f"Expected boards of shape (N, 3, 3), got {boards.shape}.")
+    if boards.dtype.kind in 'iu':
+        if boards.size and (boards.min() < 0 or boards.max() > 2):
+            raise ValueError("Board digits must be 0, 1 or 2.")
+        digits = boards.reshape(-1, 9).astype(np.int32)
+    else:
+        digits = (boards == 'X').reshape(-1, 9) * 1 + (boards == 'O').reshape(-1, 9) * 2
+    return digits @ POWERS_OF_3
+
+
+def decode_board(code):
+    """
+    Decodes a base-3 code to a 3x3 list board.
+
+    Args:
+        code (int): Board code.
+
+    Returns:
+        list: 3x3 grid representing the Tic-Tac-Toe board state.
+    """
+    cells = []
+    for _ in range(9):
+        code, digit = divmod(int(code), 3)
+        cells.append(' XO'[digit])
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+def dense_table():
+    """
+    Returns the results of `find_best_move` for every board code, building them on first use.
+
+    Returns:
+        dict: Arrays indexed by board code: "move" (flat cell index, -1 if none),
+        "player" (0 none, 1 X, 2 O), "win", "complete" and "value" (minimax value of the move).
+    """
+    if not _DENSE_TABLE:
+        move = np.full(NUM_CODES, -1, dtype=np.int8)
+        player = np.zeros(NUM_CODES, dtype=np.int8)
+        win = np.zeros(NUM_CODES, dtype=bool)
+        complete = np.zeros(NUM_CODES, dtype=bool)
+        value = np.zeros(NUM_CODES, dtype=np.int8)
+        for code in range(NUM_CODES):
+            board = decode_board(code)
+            best_move, player_letter, win[code], complete[code] = find_best_move(board)
+            if best_move is not None:
+                move[code] = 3 * best_move[0] + best_move[1]
+                value[code] = lookup_move_values(board, player_letter)[move[code]]
+            player[code] = ' XO'.index(player_letter) if player_letter else 0
+        _DENSE_TABLE.update(move=move, player=player, win=win, complete=complete, value=value)
+    return _DENSE_TABLE
+
+
+def find_best_moves(boards):
+    """
+    Finds the best move of many boards at once.
+
+    Args:
+        boards (array-like): (N, 3, 3) array of letters or digits, or (N,) array of board codes
+            (see `encode_boards`).
+
+    Returns:
+        tuple: Arrays (moves, player_letters, wins, is_grid_complete) of length N, with the
+        meaning of `find_best_move`. Moves are (row, col) pairs, (-1, -1) when there is no move;
+        player letters are '' when there is none.
+    """
+    boards = np.asarray(boards)
+    if boards.ndim == 1:
+        codes = boards.astype(np.int64)
+        if codes.size and (codes.min() < 0 or codes.max() >= NUM_CODES):
+            raise ValueError("Board codes must be between 0 and 3**9 - 1.")
+    else:
+        codes = encode_boards(boards)
+
+    table = dense_table()
+    flat_moves = table["move"][codes]
+    moves = np.stack(np.divmod(flat_moves, 3), axis=-1).astype(np.int8)
+    moves[flat_moves < 0] = -1
+    return moves, PLAYER_LETTERS[table["player"][codes]], table["win"][codes], table["complete"][codes]
+
+
+# ---------------------------------------------------------------------------
+# Opening book
+#
+# The dense table is written to disk by `build_opening_book.py` and memory
+# mapped at import, so every worker process shares one page-cached copy
+# instead of rebuilding it. The file starts with a header holding a
+# fingerprint of the engine sources; a missing or stale book is ignored and
+# the engine falls back to live search.
+# ---------------------------------------------------------------------------
+
+BOOK_PATH = os.environ.get(
+    "OXO_OPENING_BOOK",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights", "opening_book.bin"),
+)
+BOOK_MAGIC = b"OXOBOOK\0"
+BOOK_VERSION = 1
+# magic, version, number of codes, engine fingerprint, padded to 64 bytes
+BOOK_HEADER_FORMAT = "<8sHI32s18x"
+BOOK_HEADER_SIZE = struct.calcsize(BOOK_HEADER_FORMAT)
+BOOK_FIELDS = ("move", "player", "win", "complete", "value")
+
+_BOOK = {}
+
+
+def engine_fingerprint():
+    """
+    Hashes the engine sources, so that a book written by another engine version is detected as stale.
+
+    Returns:
+        bytes: SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for path in (os.path.abspath(__file__), os.path.abspath(bitboard_engine.__file__)):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def write_opening_book(path=BOOK_PATH):
+    """
+    Serializes the dense table of every board code to a binary opening book.
+
+    Args:
+        path (str): Output file.
+
+    Returns:
+        int: Size of the file in bytes.
+    """
+    table = dense_table()
+    header = struct.pack(BOOK_HEADER_FORMAT, BOOK_MAGIC, BOOK_VERSION, NUM_CODES, engine_fingerprint())
+    body = np.stack([table[field].astype(np.int8) for field in BOOK_FIELDS])
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Write next to the target and rename, so running workers never map a partial file.
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body.tobytes())
+    os.replace(tmp_path, path)
+    return BOOK_HEADER_SIZE + body.nbytes
+
+
+def load_opening_book(path=BOOK_PATH):
+    """
+    Memory-maps an opening book and serves `find_best_move` and `find_best_moves` from it.
+
+    Args:
+        path (str): Book file.
+
+    Returns:
+        bool: True if the book was loaded, False if it is missing or stale.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(BOOK_HEADER_SIZE)
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    expected_size = BOOK_HEADER_SIZE + len(BOOK_FIELDS) * NUM_CODES
+    if len(header) < BOOK_HEADER_SIZE or size != expected_size:
+        print(f"Opening book {path} is invalid, falling back to live search")
+        return False
+    magic, version, num_codes, fingerprint = struct.unpack(BOOK_HEADER_FORMAT, header)
+    if magic != BOOK_MAGIC or version != BOOK_VERSION or num_codes != NUM_CODES or fingerprint != engine_fingerprint():
+        print(f"Opening book {path} is stale, falling back to live search")
+        return False
+
+    body = np.memmap(path, dtype=np.int8, mode="r", offset=BOOK_HEADER_SIZE, shape=(len(BOOK_FIELDS), NUM_CODES))
+    arrays = dict(zip(BOOK_FIELDS, body))
+    arrays["win"] = arrays["win"].view(bool)
+    arrays["complete"] = arrays["complete"].view(bool)
+    _DENSE_TABLE.clear()
+    _DENSE_TABLE.update(arrays)
+    _BOOK.update(path=path, size=size)
+    return True
+
+
+def book_status():
+    """
+    Reports whether the engine runs from the opening book.
+
+    Returns:
+        dict: "loaded", and "path" and "size" of the book when loaded.
+    """
+    return {"loaded": bool(_BOOK), **_BOOK}
+
+
+def _book_lookup(board):
+    code = 0
+    for k in (8, 7, 6, 5, 4, 3, 2, 1, 0):
+        cell = board[k // 3][k % 3]
+        code = code * 3 + (1 if cell == 'X' else 2 if cell == 'O' else 0)
+    move = int(_DENSE_TABLE["move"][code])
+    player = int(_DENSE_TABLE["player"][code])
+    return (
+        divmod(move, 3) if move >= 0 else None,
+        ' XO'[player] if player else None,
+        bool(_DENSE_TABLE["win"][code]),
+        bool(_DENSE_TABLE["complete"][code]),
+    )
+
 
+load_opening_book()
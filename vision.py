@@ -1,47 +1,183 @@
-from ultralytics import YOLO
-MODEL = YOLO("weights/best.pt")
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+MODEL_PATH = "weights/best.pt"
 CLASS_NAMES = ["O", "X", "grid"]
 
+# Inference backends and the weights they run. The exported files are produced by
+# export_model.py; ultralytics picks the runtime (PyTorch, ONNX Runtime, OpenVINO)
+# from the file type and returns the same Results structure for all of them.
+BACKENDS = {
+    "torch": MODEL_PATH,
+    "onnx": "weights/best.onnx",
+    "onnx-int8": "weights/best_int8.onnx",
+    "openvino": "weights/best_openvino_model",
+    "openvino-int8": "weights/best_int8_openvino_model",
+}
+BACKEND = os.environ.get("VISION_BACKEND", "torch")
+
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+# Set once the model has run a first inference, which pays the loading and JIT cost.
+MODEL_READY = threading.Event()
+
+
+def set_backend(backend):
+    """
+    Selects the inference backend. The model is reloaded on next use.
+
+    Args:
+        backend (str): One of BACKENDS.
+    """
+    global BACKEND, _MODEL
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown vision backend {backend}, expected one of {list(BACKENDS)}.")
+    with _MODEL_LOCK:
+        BACKEND = backend
+        _MODEL = None
+        MODEL_READY.clear()
+
+
+def get_model():
+    """
+    Returns the YOLO model of the selected backend, loading it on first use.
+
+    Returns:
+        YOLO: Detection model.
+    """
+    global _MODEL
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                from ultralytics import YOLO
+                path = BACKENDS[BACKEND]
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"{path} not found, run export_model.py to use the {BACKEND} backend.")
+                _MODEL = YOLO(path, task="detect")
+    return _MODEL
+
+
+def warm_up(image_size=640):
+    """
+    Loads the model and runs a dummy inference so that the first real request is not the slowest one.
+
+    Args:
+        image_size (int): Side of the dummy image.
+    """
+    get_model()(np.zeros((image_size, image_size, 3), dtype=np.uint8), verbose=False)
+    MODEL_READY.set()
+
+
+def start_warm_up(image_size=640, on_done=None):
+    """
+    Runs `warm_up` in a background thread.
+
+    Args:
+        image_size (int): Side of the dummy image.
+        on_done (callable): Called with the duration of the warm-up in seconds once it succeeded.
+
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    def run():
+        start = time.perf_counter()
+        try:
+            warm_up(image_size)
+        except Exception as e:
+            print(f"Vision warm-up failed: {e}")
+        else:
+            if on_done:
+                on_done(time.perf_counter() - start)
+
+    thread = threading.Thread(target=run, name="vision-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_model_ready():
+    return MODEL_READY.is_set()
+
+
+# cv2.imdecode flags decoding JPEG/PNG images at 1/1, 1/2, 1/4 or 1/8 of their resolution.
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def decode_image(image_bytes, reduction=1):
+    """
+    Decodes an encoded JPEG/PNG image in one step, without intermediate copies.
+
+    Args:
+        image_bytes (bytes | memoryview): Encoded image, e.g. the body of a request.
+        reduction (int): Decodes at 1/reduction of the resolution (1, 2, 4 or 8). JPEG images
+            skip the discarded coefficients, which is faster than decoding then resizing.
+
+    Returns:
+        np.ndarray: RGB image, the channel order of the images decoded with PIL.
+    """
+    if reduction not in DECODE_FLAGS:
+        raise ValueError(f"Unsupported reduction {reduction}, expected one of {list(DECODE_FLAGS)}.")
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), DECODE_FLAGS[reduction])
+    if image is None:
+        raise ValueError("Could not decode the image data.")
+    # BGR to RGB as a view, the pixels are not copied
+    return image[:, :, ::-1]
 
-def bb_to_tictactoe_grid(bounding_boxes_dict):
+
+def bb_to_tictactoe_grid(bounding_boxes_dict, grid_dim=3):
     """
     Converts bounding box coordinates to a Tic-Tac-Toe grid state.
 
     Args:
-        bounding_boxes_dict (dict): Dictionary containing bounding box coordinates.
+        bounding_boxes_dict (dict): Dictionary of (N, 4) xywh arrays (or lists) by class name.
+        grid_dim (int): Number of cells per side of the grid.
 
     Returns:
-        list: 3x3 grid representing the Tic-Tac-Toe board state.
+        list: grid_dim x grid_dim grid representing the Tic-Tac-Toe board state.
     """
     # Extract the bounding box of the grid
-    grid_center_x, grid_center_y, grid_w, grid_h = bounding_boxes_dict['grid'][0]
-    cell_w = grid_w / 3
-    cell_h = grid_h / 3
-    GRID_SIZE = cell_w, cell_h
+    grid_center_x, grid_center_y, grid_w, grid_h = bounding_boxes_dict['grid'][0][:4]
+    cell_w = grid_w / grid_dim
+    cell_h = grid_h / grid_dim
     # Define the boundaries for the grid cells
-    left_boundary = grid_center_x - (1.5 * cell_w)
-    top_boundary = grid_center_y - (1.5 * cell_h)
-
-    # Define a function to get the cell position given a point
-    def get_cell(position):
-        col = int((position[0] - left_boundary) // cell_w)
-        row = int((position[1] - top_boundary) // cell_h)
-        return row, col
-
-    # Initialize an empty 3x3 grid
-    grid_state = [[' ' for _ in range(3)] for _ in range(3)]
-    
-    # Fill in the 'X' marks
-    for position in bounding_boxes_dict.get('X', []):
-        row, col = get_cell(position[:2])
-        grid_state[row][col] = 'X'
-    
-    # Fill in the 'O' marks
-    for position in bounding_boxes_dict.get('O', []):
-        row, col = get_cell(position[:2])
-        grid_state[row][col] = 'O'
-
-    return grid_state
+    left_boundary = grid_center_x - (grid_dim / 2 * cell_w)
+    top_boundary = grid_center_y - (grid_dim / 2 * cell_h)
+
+    grid_state = np.full((grid_dim, grid_dim), ' ', dtype='<U1')
+    # Assign the cells of all marks of a letter at once, O written after X
+    for letter in ('X', 'O'):
+        positions = np.asarray(bounding_boxes_dict.get(letter, []), dtype=float)
+        if not len(positions):
+            continue
+        cols = ((positions[:, 0] - left_boundary) // cell_w).astype(int)
+        rows = ((positions[:, 1] - top_boundary) // cell_h).astype(int)
+        grid_state[rows, cols] = letter
+
+    return grid_state.tolist()
+
+
+def boxes_to_numpy(boxes):
+    """
+    Moves the confidences, classes and xywh coordinates of detection boxes to NumPy in one go.
+
+    Args:
+        boxes (Boxes): Boxes of an ultralytics result.
+
+    Returns:
+        tuple: (conf (N,), cls (N,), xywh (N, 4)) arrays.
+    """
+    return boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy().astype(np.int64), boxes.xywh.cpu().numpy()
 
 
 def preprocess_bboxes(bboxes, class_names, conf_threshold=0.5):
@@ -49,40 +185,429 @@ def preprocess_bboxes(bboxes, class_names, conf_threshold=0.5):
     Preprocesses bounding boxes to filter by confidence threshold.
 
     Args:
-        bboxes (list): List of bounding boxes.
+        bboxes (Boxes | tuple): Boxes of a result, or their arrays from `boxes_to_numpy`.
         class_names (list): List of class names.
         conf_threshold (float): Confidence threshold for filtering.
 
+    Returns:
+        dict: Dictionary of filtered (N, 4) xywh arrays by class name, most confident first.
+    """
+    conf, cls, xywh = bboxes if isinstance(bboxes, tuple) else boxes_to_numpy(bboxes)
+    keep = conf > conf_threshold
+    return {class_name: xywh[keep & (cls == class_idx)] for class_idx, class_name in enumerate(class_names)}
+
+
+def grid_confidence(bboxes, class_names):
+    """
+    Returns the confidence of the best grid detection.
+
+    Args:
+        bboxes (Boxes | tuple): Boxes of a result, or their arrays from `boxes_to_numpy`.
+        class_names (list): List of class names.
+
+    Returns:
+        float: Highest grid confidence, 0 if no grid was detected.
+    """
+    conf, cls, _ = bboxes if isinstance(bboxes, tuple) else boxes_to_numpy(bboxes)
+    grid_conf = conf[cls == class_names.index("grid")]
+    return float(grid_conf.max()) if len(grid_conf) else 0.0
+
+
+def detect(image, **kwargs):
+    """
+    Runs the detection model on an image.
+
+    Args:
+        image (np.ndarray | str): Image data or path to the image file.
+        **kwargs: Inference arguments passed to the model (e.g. imgsz).
+
+    Returns:
+        tuple: (dictionary of filtered bounding boxes by class name, grid confidence).
+    """
+    if _BATCHER is not None and isinstance(image, np.ndarray):
+        return _BATCHER.detect(image, **kwargs)
+    return detect_batch([image], **kwargs)[0]
+
+
+def detect_batch(images, **kwargs):
+    """
+    Runs the detection model on several images in one call.
+
+    Args:
+        images (list): Images data or paths to the image files.
+        **kwargs: Inference arguments passed to the model (e.g. imgsz).
+
+    Returns:
+        list: (dictionary of filtered bounding boxes by class name, grid confidence) per image.
+    """
+    results = get_model()(images, stream=False, **kwargs)
+    MODEL_READY.set()
+    detections = []
+    for r in results:
+        arrays = boxes_to_numpy(r.boxes)
+        detections.append((preprocess_bboxes(arrays, CLASS_NAMES), grid_confidence(arrays, CLASS_NAMES)))
+    return detections
+
+
+class BatchingDetector:
+    """
+    Groups the detections requested at about the same time by several threads into one batch.
+
+    Requests wait at most `max_wait` seconds for others to join; the batch is run by a single
+    background thread as soon as it holds `max_batch` images or the wait is over. Requests with
+    different inference arguments (e.g. `imgsz` of a tracked region) go in different batches.
+
+    Args:
+        max_batch (int): Maximum number of images per model call.
+        max_wait (float): Seconds the first request of a batch waits for others.
+        detect_fn (callable): Batched detection, `detect_batch` by default.
+    """
+
+    def __init__(self, max_batch=8, max_wait=0.01, detect_fn=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.detect_fn = detect_fn or detect_batch
+        self.batches = 0
+        self.images = 0
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="vision-batcher", daemon=True)
+        self._thread.start()
+
+    def detect(self, image, **kwargs):
+        """
+        Same as `detect`, run in the next batch.
+        """
+        request = {"image": image, "kwargs": kwargs, "done": threading.Event(), "result": None, "error": None}
+        with self._condition:
+            self._pending.append(request)
+            self._condition.notify_all()
+        request["done"].wait()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["result"]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch and time.monotonic() < deadline:
+                    self._condition.wait(max(deadline - time.monotonic(), 0))
+                key = sorted(self._pending[0]["kwargs"].items())
+                batch = [r for r in self._pending if sorted(r["kwargs"].items()) == key][:self.max_batch]
+                taken = {id(r) for r in batch}
+                self._pending = [r for r in self._pending if id(r) not in taken]
+            try:
+                results = self.detect_fn([r["image"] for r in batch], **batch[0]["kwargs"])
+                for request, result in zip(batch, results):
+                    request["result"] = result
+            except Exception as e:
+                for request in batch:
+                    request["error"] = e
+            self.batches += 1
+            self.images += len(batch)
+            for request in batch:
+                request["done"].set()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": self.images / self.batches if self.batches else 0.0,
+        }
+
+
+_BATCHER = None
+
+
+def enable_batching(max_batch=8, max_wait=0.01):
+    """
+    Sends the detections of array images through a shared `BatchingDetector`, e.g. when several
+    robots share the model.
+
+    Returns:
+        BatchingDetector: The batcher.
+    """
+    global _BATCHER
+    if _BATCHER is None:
+        _BATCHER = BatchingDetector(max_batch, max_wait)
+    return _BATCHER
+
+
+class GridTracker:
+    """
+    Remembers where the grid was last detected so that later frames are only searched around it.
+
+    The grid does not move once drawn, so each frame is cropped to the last grid box plus a
+    margin and inferred at a reduced image size. A full-frame pass is made when no grid is known,
+    when the grid is lost or its confidence drops, or when it touches the border of the crop.
+
+    Args:
+        margin (float): Margin around the grid box, as a fraction of its size.
+        roi_imgsz (int): Inference size used on the cropped region.
+        min_conf (float): Grid confidence below which the region is searched again on the full frame.
+    """
+
+    def __init__(self, margin=0.2, roi_imgsz=320, min_conf=0.6):
+        self.margin = margin
+        self.roi_imgsz = roi_imgsz
+        self.min_conf = min_conf
+        self.grid_box = None
+        self.roi_passes = 0
+        self.full_frame_passes = 0
+
+    def reset(self):
+        self.grid_box = None
+
+    def roi(self, image_shape):
+        """
+        Region to infer on, in pixels of the full frame.
+
+        Args:
+            image_shape (tuple): Shape of the full frame.
+
+        Returns:
+            tuple: (x0, y0, x1, y1), or None when no grid is known.
+        """
+        if self.grid_box is None:
+            return None
+        height, width = image_shape[:2]
+        x, y, w, h = self.grid_box
+        half_w, half_h = w * (0.5 + self.margin), h * (0.5 + self.margin)
+        x0, y0 = max(int(x - half_w), 0), max(int(y - half_h), 0)
+        x1, y1 = min(int(np.ceil(x + half_w)), width), min(int(np.ceil(y + half_h)), height)
+        return x0, y0, x1, y1
+
+    def detect(self, image):
+        """
+        Detects the boxes of an image, on the tracked region when possible.
+
+        Args:
+            image (np.ndarray | str): Image data or path to the image file. Paths are always
+                inferred on the full frame.
+
+        Returns:
+            dict: Dictionary of filtered bounding boxes by class name, in full-frame pixels.
+        """
+        roi = self.roi(image.shape) if isinstance(image, np.ndarray) else None
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            bboxes, grid_conf = detect(image[y0:y1, x0:x1], imgsz=self.roi_imgsz)
+            if grid_conf >= self.min_conf and len(bboxes['grid']) and self._inside_crop(bboxes['grid'][0], x1 - x0, y1 - y0):
+                self.roi_passes += 1
+                # Map the boxes back to full-frame coordinates
+                for boxes in bboxes.values():
+                    boxes[:, :2] += (x0, y0)
+                self.grid_box = tuple(bboxes['grid'][0].tolist())
+                return bboxes
+
+        self.full_frame_passes += 1
+        bboxes, grid_conf = detect(image)
+        self.grid_box = tuple(bboxes['grid'][0].tolist()) if grid_conf >= self.min_conf and len(bboxes['grid']) else None
+        return bboxes
+
+    @staticmethod
+    def _inside_crop(box, width, height, tolerance=2):
+        x, y, w, h = box
+        return x - w / 2 > tolerance and y - h / 2 > tolerance and x + w / 2 < width - tolerance and y + h / 2 < height - tolerance
+
+
+class FrameChangeDetector:
+    """
+    Cheap check of whether a frame differs from the last processed one, run before inference.
+
+    Frames are reduced to a small grayscale thumbnail of the grid region; a frame has changed
+    when the fraction of thumbnail pixels whose gray level moved by more than `pixel_threshold`
+    exceeds `threshold`.
+
+    Args:
+        threshold (float): Fraction of changed pixels above which the frame has changed.
+        pixel_threshold (int): Gray level difference for a pixel to count as changed.
+        size (int): Side of the thumbnail.
+    """
+
+    def __init__(self, threshold=0.002, pixel_threshold=25, size=64):
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.size = size
+        self.reference = None
+        self.reference_roi = None
+        self.reference_shape = None
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, image, roi=None):
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            image = image[y0:y1, x0:x1]
+        thumbnail = cv2.resize(image, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY)
+        return thumbnail.astype(np.int16)
+
+    def has_changed(self, image):
+        """
+        Compares a frame with the reference frame, on the region of the reference.
+
+        Args:
+            image (np.ndarray): Frame to check. Paths always count as changed.
+
+        Returns:
+            bool: False if the frame is the same as the reference (a hit), True otherwise.
+        """
+        if self.reference is None or not isinstance(image, np.ndarray) or image.shape != self.reference_shape:
+            self.misses += 1
+            return True
+        signature = self.signature(image, self.reference_roi)
+        changed = np.count_nonzero(np.abs(signature - self.reference) > self.pixel_threshold) / signature.size
+        if changed > self.threshold:
+            self.misses += 1
+            return True
+        self.hits += 1
+        return False
+
+    def update(self, image, roi=None):
+        """
+        Stores the frame as the reference of the next comparisons.
+
+        Args:
+            image (np.ndarray): Processed frame.
+            roi (tuple): (x0, y0, x1, y1) region to compare, the whole frame if None.
+        """
+        if not isinstance(image, np.ndarray):
+            self.reset()
+            return
+        self.reference = self.signature(image, roi)
+        self.reference_roi = roi
+        self.reference_shape = image.shape
+
+    def reset(self):
+        self.reference = None
+        self.reference_roi = None
+        self.reference_shape = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "threshold": self.threshold}
+
+
+class VisionCache:
+    """
+    Bounded LRU cache of vision results, keyed on a hash of the encoded image bytes and of the
+    context they were read in (robot, grid size, decode reduction).
+
+    Kiosk retries and frontend resubmits send byte-identical images; a hit skips decoding and
+    inference altogether.
+
+    Args:
+        max_entries (int): Number of results kept, least recently used evicted first.
+        max_age (float): Seconds after which a result is evicted.
+    """
+
+    def __init__(self, max_entries=64, max_age=300.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(image_bytes, *context):
+        """
+        Hashes an image and the context its result depends on.
+
+        Args:
+            image_bytes (bytes): Encoded image.
+            *context: Values the result depends on, e.g. the robot id, the grid size and the
+                decode reduction, so that a result is only reused in the same context.
+
+        Returns:
+            bytes: The key.
+        """
+        digest = hashlib.blake2b(image_bytes, digest_size=16)
+        digest.update(repr(context).encode())
+        return digest.digest()
+
+    def get(self, key):
+        """
+        Returns a copy of the cached result, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.max_age:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key, detections, grid_state):
+        """
+        Stores the detection dict and grid state of an image.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = (now, copy.deepcopy({"detections": detections, "grid_state": grid_state}))
+            self._entries.move_to_end(key)
+            expired = [k for k, (created, _) in self._entries.items() if now - created > self.max_age]
+            for k in expired:
+                del self._entries[k]
+            self.evictions += len(expired)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def image_to_detections(image, tracker=None):
+    """
+    Detects the grid and marks of an image.
+
+    Args:
+        image (np.ndarray | str): Image data or path to the image file.
+        tracker (GridTracker): Restricts the inference to the last known grid region if provided.
+
     Returns:
         dict: Dictionary of filtered bounding boxes by class name.
     """
-    result = {class_name: [] for class_name in class_names}
-    for box in bboxes:
-        conf = box.conf.item()
-        if conf > conf_threshold:
-            # Extract xywh and class index
-            xywh = box.xywh.cpu().numpy()[0].tolist()  # Convert to numpy, get the first row, convert to list
-            class_idx = int(box.cls.item())
-            # Add to result
-            class_name = class_names[class_idx]
-            result[class_name].append(xywh)
+    if tracker is not None:
+        return tracker.detect(image)
+    return detect(image)[0]
 
-    return result
 
-def image_to_tictactoe_grid(image):
+def image_to_tictactoe_grid(image, grid_dim=3, tracker=None):
     """
     Converts an image to a Tic-Tac-Toe grid state.
 
     Args:
         image (str): Path to the image file.
+        grid_dim (int): Number of cells per side of the grid.
+        tracker (GridTracker): Restricts the inference to the last known grid region if provided.
 
     Returns:
-        list: 3x3 grid representing the Tic-Tac-Toe board state.
+        list: grid_dim x grid_dim grid representing the Tic-Tac-Toe board state.
     """
-    results = MODEL(image, stream=False)
-    for r in results:
-        bboxes = preprocess_bboxes(r.boxes, CLASS_NAMES)
-    return bb_to_tictactoe_grid(bboxes)
+    return bb_to_tictactoe_grid(image_to_detections(image, tracker), grid_dim)
 
 
 
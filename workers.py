@@ -0,0 +1,273 @@
+"""
+Split process model: a robot-controller process and a pool of vision worker processes.
+
+In the default mode model inference, the Swift simulation and the velocity loop of `move_to`
+share one process, and inference CPU spikes delay control steps. With `--workers N`:
+
+- `RobotController` runs `OXOPlayer` (and `Lite6API`) alone in a dedicated process and
+  executes the commands it receives on a local IPC queue.
+- `VisionPool` runs the detection in N worker processes. Frames are copied once into shared
+  memory and the workers attach to it by name, so only a small descriptor is pickled.
+- `RemotePlayer` gives the Flask process the `OXOPlayer` interface used by the endpoints on
+  top of both.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import metrics
+import vision
+from vision import GridTracker, FrameChangeDetector, image_to_detections, bb_to_tictactoe_grid
+
+
+class SharedImage:
+    """
+    Copy of an image in a shared memory block, released when the context exits.
+
+    Args:
+        image (np.ndarray): Image to share.
+    """
+
+    def __init__(self, image):
+        self.shm = SharedMemory(create=True, size=max(image.nbytes, 1))
+        np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf)[...] = image
+        self.descriptor = (self.shm.name, image.shape, image.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _init_vision_worker(backend):
+    if backend:
+        vision.set_backend(backend)
+    try:
+        vision.warm_up()
+    except Exception as e:
+        # An initializer error would break the whole pool, detections will report it instead
+        print(f"Vision warm-up failed: {e}")
+
+
+def _is_model_ready():
+    return vision.is_model_ready()
+
+
+def _detect_shared(descriptor, grid_box, tracker_params):
+    name, shape, dtype = descriptor
+    shm = SharedMemory(name=name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        # Workers are stateless: the tracked grid region travels with the request
+        tracker = GridTracker(**tracker_params)
+        tracker.grid_box = grid_box
+        detections = image_to_detections(image, tracker)
+        del image
+        return detections, tracker.grid_box, tracker.roi_passes, tracker.full_frame_passes
+    finally:
+        shm.close()
+
+
+class VisionPool:
+    """
+    Pool of processes running the detection model.
+
+    Args:
+        workers (int): Number of worker processes.
+        backend (str): Inference backend of the workers, see `vision.BACKENDS`.
+    """
+
+    def __init__(self, workers=2, backend=None):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_vision_worker,
+            initargs=(backend,),
+        )
+        # Starts the workers now, each loads and warms up the model
+        self._started = [self._executor.submit(_is_model_ready) for _ in range(workers)]
+
+    def is_ready(self):
+        return all(future.done() and future.exception() is None and future.result() for future in self._started)
+
+    def detect(self, image, tracker=None):
+        """
+        Detects the boxes of an image in a worker process.
+
+        Args:
+            image (np.ndarray): Image data.
+            tracker (GridTracker): Tracked grid region, updated with the result if provided.
+
+        Returns:
+            dict: Dictionary of filtered bounding boxes by class name.
+        """
+        tracker_params = {}
+        grid_box = None
+        if tracker is not None:
+            tracker_params = {"margin": tracker.margin, "roi_imgsz": tracker.roi_imgsz, "min_conf": tracker.min_conf}
+            grid_box = tracker.grid_box
+        with SharedImage(np.ascontiguousarray(image)) as shared:
+            detections, grid_box, roi_passes, full_frame_passes = self._executor.submit(
+                _detect_shared, shared.descriptor, grid_box, tracker_params).result()
+        if tracker is not None:
+            tracker.grid_box = grid_box
+            tracker.roi_passes += roi_passes
+            tracker.full_frame_passes += full_frame_passes
+        return detections
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _robot_loop(factory, factory_kwargs, commands, replies):
+    try:
+        player = factory(**factory_kwargs)
+    except Exception as e:
+        replies.put(("error", f"Robot controller failed to start: {e}"))
+        return
+    player.on_progress = lambda event, **info: replies.put(("progress", event, info))
+    replies.put(("result", None))
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        method, args, kwargs = command
+        try:
+            result = getattr(player, method)(*args, **kwargs)
+        except Exception as e:
+            replies.put(("error", str(e)))
+        else:
+            replies.put(("result", (result, {"last_move": player.last_move, "grid_size": player.grid_size})))
+
+
+class RobotController:
+    """
+    Process owning the `OXOPlayer` and its robot connection.
+
+    Args:
+        factory (callable): Top-level function building the `OXOPlayer`, called in the new process.
+        **factory_kwargs: Arguments of the factory.
+    """
+
+    def __init__(self, factory, **factory_kwargs):
+        context = get_context("spawn")
+        self._commands = context.Queue()
+        self._replies = context.Queue()
+        self._lock = threading.Lock()
+        self.process = context.Process(
+            target=_robot_loop,
+            args=(factory, factory_kwargs, self._commands, self._replies),
+            name="robot-controller",
+            daemon=True,
+        )
+        self.process.start()
+        # Waits for the player to be built, raising its error if it fails
+        self._wait()
+
+    def call(self, method, *args, on_progress=None, **kwargs):
+        """
+        Calls a method of the player in the controller process and waits for its result.
+
+        Args:
+            method (str): Name of the `OXOPlayer` method.
+            on_progress (callable): Receives the progress events reported while the method runs.
+
+        Returns:
+            tuple: (return value of the method, dict of player state: last_move, grid_size).
+        """
+        with self._lock:
+            self._commands.put((method, args, kwargs))
+            return self._wait(on_progress)
+
+    def _wait(self, on_progress=None):
+        while True:
+            kind, *payload = self._replies.get()
+            if kind == "progress":
+                event, info = payload
+                if on_progress:
+                    on_progress(event, **info)
+            elif kind == "error":
+                raise RuntimeError(payload[0])
+            else:
+                return payload[0]
+
+    def close(self, timeout=5.0):
+        self._commands.put(None)
+        self.process.join(timeout)
+
+
+class RemotePlayer:
+    """
+    `OXOPlayer` interface of the Flask process in the split process model.
+
+    Frames are checked for changes and tracked here, detected in the `VisionPool`, and the
+    decided grid state is sent to the `RobotController`, which runs the engine and the motions.
+
+    Args:
+        controller (RobotController): Process owning the player.
+        vision_pool (VisionPool): Processes running the detection.
+        grid_dim (int): Number of cells per side of the grid.
+        change_threshold (float): Threshold of the `FrameChangeDetector`.
+    """
+
+    def __init__(self, controller, vision_pool, grid_dim=3, change_threshold=0.002):
+        self.controller = controller
+        self.vision_pool = vision_pool
+        self.grid_dim = grid_dim
+        self.grid_tracker = GridTracker()
+        self.change_detector = FrameChangeDetector(threshold=change_threshold)
+        self.previous_grid_state = None
+        self.last_detections = None
+        self.last_move = None
+        self.grid_size = None
+        self.on_progress = None
+
+    def _call(self, method, *args, **kwargs):
+        result, state = self.controller.call(method, *args, on_progress=self.on_progress, **kwargs)
+        self.last_move = state["last_move"]
+        self.grid_size = state["grid_size"]
+        return result
+
+    def draw_grid(self, grid_center, grid_size, **kwargs):
+        self.grid_tracker.reset()
+        self.change_detector.reset()
+        self._call("draw_grid", grid_center, grid_size, **kwargs)
+
+    def draw_move(self, move, player_letter):
+        self._call("draw_move", move, player_letter)
+
+    def detect(self, image):
+        """
+        Same as `OXOPlayer.detect`, run in the vision pool.
+        """
+        return self.vision_pool.detect(image, self.grid_tracker)
+
+    def play(self, image, grid_state=None, draw=True, return_move=False):
+        """
+        Same as `OXOPlayer.play`, with the detection run in the vision pool.
+        """
+        if grid_state is None:
+            # Reject frames identical to the previous one before running the detection
+            if self.previous_grid_state is not None and not self.change_detector.has_changed(image):
+                metrics.UNCHANGED_BOARD_TOTAL.inc(stage="frame")
+                unchanged = {"error": "Please play first, the board has not changed"}
+                return (unchanged, None) if return_move else unchanged
+            with metrics.VISION_INFERENCE_SECONDS.time():
+                self.last_detections = self.detect(image)
+                grid_state = bb_to_tictactoe_grid(self.last_detections, self.grid_dim)
+            self.change_detector.update(image, self.grid_tracker.roi(image.shape))
+        response, move = self._call("play", None, grid_state=grid_state, draw=draw, return_move=True)
+        if "grid_state" in response:
+            self.previous_grid_state = response["grid_state"]
+        return (response, move) if return_move else response
+
+    def cleanup(self):
+        self.controller.close()
+        self.vision_pool.shutdown(wait=False)